@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取放物品吞吐量测试
+Agent连接模拟运动控制器（Sensor/simulated_actuator.py，按速度模型模拟升降/旋转/取物耗时），
+按设定速率产生放入/取出请求，统计每分钟完成的操作数、请求排队时间和平台排队时间
+
+大模型识别用固定延迟的模拟响应代替，不调用视觉模型API；库存写入临时文件，不影响真实数据
+
+用法:
+    python benchmark_actuator.py --rate 6 --duration 120 --speed 10
+    python benchmark_actuator.py --rate 12 --workers 4 --pty --json actuator.json
+
+--rate 为真实时间下每分钟到达的请求数；--speed 为模拟倍速（到达间隔、识别延迟和动作耗时同比缩短），
+报告中的吞吐量和延迟已换算回真实时间
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+SENSOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Sensor')
+if SENSOR_DIR not in sys.path:
+    sys.path.append(SENSOR_DIR)
+
+# 模拟识别结果：(名称, 类别, 最佳温度, 保质期)
+FOODS = [
+    ("苹果", "水果", 4, 7),
+    ("牛奶", "乳制品", 4, 10),
+    ("牛肉", "肉类", -5, 20),
+    ("冰淇淋", "烘焙", -18, 60),
+    ("三明治", "谷物", 6, 3),
+    ("橙汁", "饮料", 8, 10),
+]
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def latency_summary(samples, scale):
+    """samples为模拟时间（秒），换算为真实时间（毫秒）"""
+    return {
+        "count": len(samples),
+        "mean": 1000 * scale * sum(samples) / len(samples) if samples else 0.0,
+        "p50": 1000 * scale * percentile(samples, 0.5),
+        "p95": 1000 * scale * percentile(samples, 0.95),
+        "max": 1000 * scale * max(samples) if samples else 0.0
+    }
+
+
+def make_fake_vlm(vlm_seconds, counter):
+    """替代 call_qwen_vl：固定延迟后返回随机物品，名称带序号保证物品ID不重复"""
+    lock = threading.Lock()
+
+    def call_qwen_vl(image_path, prompt, image_data=None, mime_type="image/jpeg"):
+        time.sleep(vlm_seconds)
+        with lock:
+            counter[0] += 1
+            index = counter[0]
+        name, category, temp, days = random.choice(FOODS)
+        return {"success": True, "response": json.dumps({
+            "food_name": f"{name}{index}",
+            "optimal_temp": temp,
+            "shelf_life_days": days,
+            "category": category,
+            "level": 2,
+            "section": random.randrange(4),
+            "reasoning": "benchmark"
+        }, ensure_ascii=False)}
+
+    return call_qwen_vl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="取放物品吞吐量测试（模拟运动控制器）")
+    parser.add_argument("--rate", type=float, default=6, help="每分钟到达的请求数（真实时间）")
+    parser.add_argument("--duration", type=float, default=120, help="产生请求的时长（秒，真实时间）")
+    parser.add_argument("--add-ratio", type=float, default=0.5, help="放入请求所占比例")
+    parser.add_argument("--workers", type=int, default=1, help="并发处理请求的线程数（模拟Web服务器线程）")
+    parser.add_argument("--vlm-ms", type=float, default=1500, help="模拟识别耗时（毫秒，真实时间）")
+    parser.add_argument("--speed", type=float, default=10, help="模拟倍速")
+    parser.add_argument("--pipeline", type=int, default=2, help="运动控制器在途命令数")
+    parser.add_argument("--pty", action="store_true", help="通过pty串口回环连接模拟控制器")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="结果写入JSON文件")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    os.environ["FRIDGE_MOTION_PORT"] = "sim:pty" if args.pty else "sim"
+    os.environ["FRIDGE_SIM_SPEED"] = str(args.speed)
+    os.environ["FRIDGE_MOTION_PIPELINE"] = str(args.pipeline)
+    from smart_fridge_qwen import SmartFridgeQwenAgent
+    from metrics import SPAN_HISTOGRAM
+
+    agent = SmartFridgeQwenAgent()
+    # 使用临时库存文件，从空冰箱开始
+    agent.fridge_data_file = os.path.join(tempfile.mkdtemp(prefix="fridge_actuator_"), "inventory.json")
+    agent.fridge_data = agent.initialize_fridge_data()
+    counter = [0]
+    agent.call_qwen_vl = make_fake_vlm(args.vlm_ms / 1000.0 / args.speed, counter)
+    capacity = agent.total_levels * agent.sections_per_level
+
+    requests_queue = queue.Queue()
+    results = []
+    results_lock = threading.Lock()
+
+    def execute(kind):
+        if kind == "take_out":
+            item_ids = list(agent.fridge_data["items"])
+            if not item_ids:
+                kind = "add"
+            else:
+                return kind, agent.get_item_from_fridge(random.choice(item_ids))
+        if len(agent.fridge_data["items"]) >= capacity:
+            item_ids = list(agent.fridge_data["items"])
+            return "take_out", agent.get_item_from_fridge(random.choice(item_ids))
+        return kind, agent.add_item_to_fridge("benchmark.jpg", image_data=b"benchmark")
+
+    def worker():
+        while True:
+            request = requests_queue.get()
+            if request is None:
+                break
+            kind, arrived = request
+            started = time.perf_counter()
+            try:
+                kind, result = execute(kind)
+            except Exception as e:
+                # 多线程时两个请求可能取同一个物品
+                result = {"success": False, "error": str(e)}
+            finished = time.perf_counter()
+            with results_lock:
+                results.append({"kind": kind, "success": bool(result.get("success")),
+                                "queue": started - arrived, "service": finished - started,
+                                "total": finished - arrived})
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.workers)]
+    for thread in threads:
+        thread.start()
+
+    # 泊松到达：间隔服从指数分布
+    sim_duration = args.duration / args.speed
+    mean_interval = 60.0 / args.rate / args.speed
+    start = time.perf_counter()
+    submitted = 0
+    next_arrival = start
+    while next_arrival - start < sim_duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        kind = "add" if random.random() < args.add_ratio else "take_out"
+        requests_queue.put((kind, time.perf_counter()))
+        submitted += 1
+        next_arrival += random.expovariate(1.0 / mean_interval)
+
+    backlog = requests_queue.qsize()
+    for _ in threads:
+        requests_queue.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    real_elapsed = elapsed * args.speed
+    completed = [r for r in results if r["success"]]
+    actuator_wait = SPAN_HISTOGRAM.snapshot().get("span=actuator_queue", {})
+    report = {
+        "config": vars(args),
+        "submitted": submitted,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "backlog_at_end_of_arrivals": backlog,
+        "by_kind": {kind: sum(1 for r in completed if r["kind"] == kind) for kind in ("add", "take_out")},
+        "real_seconds": real_elapsed,
+        "operations_per_minute": 60 * len(completed) / real_elapsed if real_elapsed else 0.0,
+        "queue_latency_ms": latency_summary([r["queue"] for r in results], args.speed),
+        "service_time_ms": latency_summary([r["service"] for r in results], args.speed),
+        "total_latency_ms": latency_summary([r["total"] for r in results], args.speed),
+        "actuator_wait_ms": {key: 1000 * args.speed * value for key, value in actuator_wait.items()
+                             if key in ("avg", "p50", "p95", "p99")},
+        "controller": agent.motion.get_stats() if agent.motion else {},
+        "simulator": agent.motion.simulator.get_stats() if agent.motion else {}
+    }
+    if agent.motion is not None:
+        agent.motion.close()
+        transport = getattr(agent.motion, "simulator_transport", None)
+        if transport is not None:
+            transport.close()
+
+    queue_ms = report["queue_latency_ms"]
+    total_ms = report["total_latency_ms"]
+    print(f"📦 到达 {submitted} 个请求（{args.rate:.1f}/分钟），完成 {len(completed)} 个 "
+          f"（放入 {report['by_kind']['add']}，取出 {report['by_kind']['take_out']}），失败 {report['failed']}")
+    print(f"⏱️  吞吐量 {report['operations_per_minute']:.1f} 次/分钟, "
+          f"请求排队 平均 {queue_ms['mean']:.0f}ms p95 {queue_ms['p95']:.0f}ms, "
+          f"总耗时 平均 {total_ms['mean']:.0f}ms p95 {total_ms['p95']:.0f}ms")
+    if report["actuator_wait_ms"]:
+        print(f"🦾 平台排队 平均 {report['actuator_wait_ms'].get('avg', 0):.0f}ms "
+              f"p95 {report['actuator_wait_ms'].get('p95', 0):.0f}ms, "
+              f"控制器应答 平均 {report['controller'].get('avg_ack_ms', 0) * args.speed:.0f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
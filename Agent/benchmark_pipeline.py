@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视觉流程基准测试
+在录制的视频文件/图片目录上重放，测量各检测流程的帧率、分阶段延迟和触发事件，
+结果输出为JSON，便于对比检测器改动前后的表现
+
+用法:
+    python benchmark_pipeline.py clips/kitchen.mp4 clips/night/ \\
+        --targets detect_faces,detect_and_count_faces,capture --output bench.json
+
+目标:
+    detect_faces            Agent的人脸检测（SmartFridgeQwenAgent.detect_faces）
+    detect_and_count_faces  传感器进程的人脸检测（Sensor/face_detection.py）
+    capture                 按键拍照（Sensor/internal_camera.py 的 capture_jpeg）
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+SENSOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Sensor')
+if SENSOR_DIR not in sys.path:
+    sys.path.append(SENSOR_DIR)
+from frame_source import open_frame_source
+
+TARGETS = ("detect_faces", "detect_and_count_faces", "capture")
+
+
+class StageTimer:
+    """记录各阶段耗时（秒）"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def wrap(self, obj, attr, stage):
+        """替换对象上的方法，调用时记录耗时"""
+        method = getattr(obj, attr)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(obj, attr, wrapper)
+
+    def summary(self):
+        result = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            result[stage] = {
+                "count": count,
+                "mean_ms": 1000 * sum(ordered) / count,
+                "p50_ms": 1000 * ordered[int(round(0.5 * (count - 1)))],
+                "p95_ms": 1000 * ordered[int(round(0.95 * (count - 1)))],
+                "max_ms": 1000 * ordered[-1]
+            }
+        return result
+
+
+class EventCounter:
+    """按录像时间统计触发和冷却后的事件"""
+
+    def __init__(self, cooldown):
+        self.cooldown = cooldown
+        self.triggers = 0
+        self.event_times = []
+
+    def trigger(self, media_time):
+        self.triggers += 1
+        if not self.event_times or media_time - self.event_times[-1] >= self.cooldown:
+            self.event_times.append(round(media_time, 3))
+
+
+def _result(target, clip, frames, elapsed, timer, events=None, extra=None):
+    result = {
+        "target": target,
+        "clip": clip,
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": timer.summary()
+    }
+    if events is not None:
+        result["triggers"] = events.triggers
+        result["events"] = len(events.event_times)
+        result["event_times"] = events.event_times
+    if extra:
+        result.update(extra)
+    return result
+
+
+def bench_detect_faces(clip, args):
+    """Agent人脸检测流程"""
+    # 先用录像作为帧来源创建Agent，避免打开真实摄像头
+    os.environ['FRIDGE_CAMERA_SOURCE'] = clip
+    from smart_fridge_qwen import SmartFridgeQwenAgent
+
+    agent = SmartFridgeQwenAgent()
+    if agent.cap is None or agent.face_tracker is None:
+        raise RuntimeError(f"无法在 {clip} 上初始化人脸检测")
+    agent.cap.release()
+    agent.cap = source = open_frame_source(clip, realtime=args.realtime)
+
+    timer = StageTimer()
+    timer.wrap(agent.cap, "read", "frame_read")
+    timer.wrap(agent.motion_gate, "update", "motion_gate")
+    timer.wrap(agent.face_tracker, "update", "face_detect")
+    events = EventCounter(agent.face_detection_cooldown)
+
+    frames = 0
+    start = time.perf_counter()
+    while args.max_frames is None or frames < args.max_frames:
+        before = source.frame_index
+        step_start = time.perf_counter()
+        triggered = agent.detect_faces()
+        if source.frame_index == before:
+            break  # 录像结束
+        timer.record("total", time.perf_counter() - step_start)
+        frames += 1
+        if triggered:
+            events.trigger(source.timestamp)
+    elapsed = time.perf_counter() - start
+
+    source.release()
+    return _result("detect_faces", clip, frames, elapsed, timer, events, {
+        "backend": agent.face_detector.name,
+        "tracking": agent.face_tracker.get_stats()
+    })
+
+
+def bench_detect_and_count_faces(clip, args):
+    """传感器进程人脸检测流程（不发送串口和Web事件）"""
+    from face_detection import FaceDetector
+
+    detector = FaceDetector(camera_index=clip, serial_port=None)
+    if detector.cap is None:
+        raise RuntimeError(f"无法打开 {clip}")
+    detector.cap.release()
+    detector.cap = source = open_frame_source(clip, realtime=args.realtime)
+
+    timer = StageTimer()
+    timer.wrap(detector.cap, "read", "frame_read")
+    timer.wrap(detector.motion_gate, "update", "motion_gate")
+    timer.wrap(detector.face_tracker, "update", "face_detect")
+    events = EventCounter(detector.event_cooldown)
+    detector.send_serial_event = lambda: None
+    detector.send_web_event = lambda: events.trigger(source.timestamp)
+
+    frames = 0
+    start = time.perf_counter()
+    while args.max_frames is None or frames < args.max_frames:
+        step_start = time.perf_counter()
+        if detector.detect_and_count_faces() is None:
+            break
+        timer.record("total", time.perf_counter() - step_start)
+        frames += 1
+    elapsed = time.perf_counter() - start
+
+    source.release()
+    return _result("detect_and_count_faces", clip, frames, elapsed, timer, events, {
+        "backend": detector.face_detector.name,
+        "tracking": detector.face_tracker.get_stats()
+    })
+
+
+def bench_capture(clip, args):
+    """按键拍照：后台采集线程按实时速度重放，定时取最清晰帧并编码"""
+    from internal_camera import FaceDetector
+
+    camera = FaceDetector(camera_index=clip)
+    camera.stop_capture()
+    camera.cap.release()
+    # 采集线程依赖实时帧率，这里总是按录像帧率重放
+    camera.cap = open_frame_source(clip, realtime=True)
+    camera.start_capture()
+
+    timer = StageTimer()
+    timer.wrap(camera, "best_frame", "best_frame")
+    sizes = []
+
+    start = time.perf_counter()
+    for _ in range(args.captures):
+        time.sleep(args.capture_interval)
+        step_start = time.perf_counter()
+        data, _ = camera.capture_jpeg()
+        timer.record("total", time.perf_counter() - step_start)
+        if data is not None:
+            sizes.append(len(data))
+        if not camera.cap.isOpened():
+            break
+    elapsed = time.perf_counter() - start
+
+    camera.release()
+    return _result("capture", clip, len(sizes), elapsed, timer, extra={
+        "captures": len(sizes),
+        "mean_jpeg_bytes": sum(sizes) / len(sizes) if sizes else 0
+    })
+
+
+BENCHMARKS = {
+    "detect_faces": bench_detect_faces,
+    "detect_and_count_faces": bench_detect_and_count_faces,
+    "capture": bench_capture,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视觉流程基准测试")
+    parser.add_argument("clips", nargs="+", help="视频文件或图片目录")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="逗号分隔: " + ", ".join(TARGETS))
+    parser.add_argument("--realtime", action="store_true", help="检测流程按录像帧率重放（默认最快速度）")
+    parser.add_argument("--max-frames", type=int, default=None, help="每个片段最多处理的帧数")
+    parser.add_argument("--captures", type=int, default=10, help="拍照次数")
+    parser.add_argument("--capture-interval", type=float, default=0.5, help="拍照间隔（秒）")
+    parser.add_argument("--output", help="结果写入JSON文件（默认输出到标准输出）")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的目标: {', '.join(unknown)}")
+
+    results = []
+    for clip in args.clips:
+        for target in targets:
+            try:
+                results.append(BENCHMARKS[target](clip, args))
+            except Exception as e:
+                results.append({"target": target, "clip": clip, "error": str(e)})
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "realtime": args.realtime,
+        "results": results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
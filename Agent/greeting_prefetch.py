@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接近问候预取
+看到运动（人脸确认之前）就在后台生成问候语和推荐，人走到冰箱前确认接近时直接使用，
+不再在接近事件里同步调用大模型
+
+- 同一时间最多一个后台生成任务，重复触发直接忽略
+- 结果带生成时间和库存版本，超过有效期或库存变化后视为过期，下次触发重新生成
+- 生成函数返回错误（带 error 字段或 success 为 False）时视为失败，不缓存
+- 接近时预取仍在进行则等待它完成（只等剩余时间），没有预取则同步生成（与原来的行为一致）
+- 接近回调运行在检测循环/事件总线分发线程上，用 take_async 在后台线程中取结果，不阻塞回调
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# 预取结果有效期（秒），与推荐缓存的刷新间隔一致
+DEFAULT_TTL_SECONDS = 60
+
+
+def is_failure(payload) -> bool:
+    """生成函数以返回值报告失败（例如 {"error": ...}）而不是抛出异常"""
+    return not isinstance(payload, dict) or "error" in payload or payload.get("success") is False
+
+
+class GreetingPrefetcher:
+    def __init__(self, build: Callable[[], Dict], version: Callable[[], int] = None,
+                 ttl: float = DEFAULT_TTL_SECONDS, on_ready: Callable[[Dict], None] = None,
+                 wait_seconds: float = 15.0):
+        """
+        Args:
+            build: 生成问候和推荐的函数，返回可JSON序列化的字典
+            version: 返回当前库存版本号，版本变化时预取结果失效
+            ttl: 预取结果有效期（秒）
+            on_ready: 后台生成完成后的回调（例如推送给前端）
+            wait_seconds: 接近时等待进行中的预取的最长时间
+        """
+        self.build = build
+        self.version = version or (lambda: 0)
+        self.ttl = ttl
+        self.on_ready = on_ready
+        self.wait_seconds = wait_seconds
+
+        self._lock = threading.Lock()
+        self._built = threading.Condition(self._lock)
+        self._payload = None
+        self._built_at = 0.0
+        self._built_version = None
+        self._building = False
+        self._used = False
+
+        # 统计信息
+        self.triggers = 0
+        self.builds = 0
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.build_seconds_total = 0.0
+
+    def _fresh(self, now) -> bool:
+        return (self._payload is not None and now - self._built_at < self.ttl
+                and self._built_version == self.version())
+
+    def trigger(self, reason: str = "motion") -> bool:
+        """投机预取：已有有效结果或正在生成时不做任何事，返回是否启动了后台生成"""
+        with self._lock:
+            self.triggers += 1
+            if self._building or self._fresh(time.time()):
+                return False
+            self._building = True
+        threading.Thread(target=self._build, args=(reason,), name="greeting-prefetch", daemon=True).start()
+        return True
+
+    def _build(self, reason):
+        started = time.perf_counter()
+        try:
+            payload = self.build()
+            if is_failure(payload):
+                raise RuntimeError(payload.get("error") if isinstance(payload, dict) else payload)
+        except Exception as e:
+            logger.error(f"问候预取失败: {e}")
+            with self._lock:
+                self.failures += 1
+                self._building = False
+                self._built.notify_all()
+            return
+        self._store(payload, time.perf_counter() - started)
+        logger.info(f"🔮 问候已预取（{reason}，{1000 * (time.perf_counter() - started):.0f}ms）")
+        if self.on_ready is not None:
+            try:
+                self.on_ready(payload)
+            except Exception as e:
+                logger.error(f"预取回调失败: {e}")
+
+    def _store(self, payload, seconds):
+        with self._lock:
+            if self._payload is not None and not self._used:
+                self.wasted += 1
+            self._payload = payload
+            self._built_at = time.time()
+            self._built_version = self.version()
+            self._building = False
+            self._used = False
+            self.builds += 1
+            self._built.notify_all()
+            self.build_seconds_total += seconds
+
+    def take(self) -> Dict:
+        """
+        接近确认时取结果：有效的预取结果直接返回，否则同步生成
+        返回的字典带 prefetched 字段和 prefetch_age_ms
+        """
+        with self._lock:
+            if self._building:
+                # 运动时已开始生成，只需等待剩余时间
+                self._built.wait_for(lambda: not self._building, timeout=self.wait_seconds)
+            now = time.time()
+            if self._fresh(now):
+                self.hits += 1
+                self._used = True
+                return {**self._payload, "prefetched": True,
+                        "prefetch_age_ms": round(1000 * (now - self._built_at))}
+            self.misses += 1
+        started = time.perf_counter()
+        payload = self.build()
+        if is_failure(payload):
+            # 错误结果直接返回给本次接近，不缓存，下次重新生成
+            with self._lock:
+                self.failures += 1
+            return {**payload, "prefetched": False} if isinstance(payload, dict) \
+                else {"error": str(payload), "prefetched": False}
+        self._store(payload, time.perf_counter() - started)
+        with self._lock:
+            self._used = True
+        return {**payload, "prefetched": False}
+
+    def take_async(self, callback: Callable[[Dict], None]) -> threading.Thread:
+        """在后台线程中执行 take()，完成后调用 callback(payload)；返回该线程，需要结果的调用方可以 join"""
+        def deliver():
+            try:
+                payload = self.take()
+            except Exception as e:
+                logger.error(f"接近问候生成失败: {e}")
+                payload = {"error": str(e), "prefetched": False}
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"接近问候回调失败: {e}")
+
+        thread = threading.Thread(target=deliver, name="greeting-deliver", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self):
+        with self._lock:
+            self._payload = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "triggers": self.triggers,
+                "builds": self.builds,
+                "failures": self.failures,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "wasted": self.wasted,
+                "building": self._building,
+                "fresh": self._fresh(time.time()),
+                "avg_build_ms": 1000 * self.build_seconds_total / self.builds if self.builds else 0.0
+            }
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量级性能指标模块
+- 直方图：固定分桶 + 最近样本窗口（计算p50/p95/p99）
+- 计数器、仪表
+- span() 计时上下文/装饰器
+- 导出Prometheus文本格式
+"""
+
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+# 默认分桶（秒），覆盖从毫秒级文件写入到数十秒的大模型调用
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 计算分位数使用的最近样本数
+DEFAULT_WINDOW = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: Tuple, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramSeries:
+    """单个标签组合的直方图数据"""
+
+    def __init__(self, buckets, window):
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+
+class Histogram:
+    """带分位数的直方图"""
+
+    def __init__(self, name: str, description: str,
+                 buckets=DEFAULT_BUCKETS, window: int = DEFAULT_WINDOW):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(self.buckets, self.window)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+            series.recent.append(value)
+
+    def quantiles(self, labels: Optional[Dict[str, str]] = None) -> Dict[float, float]:
+        """最近样本窗口内的分位数"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            samples = sorted(series.recent) if series else []
+        return self._compute_quantiles(samples)
+
+    @staticmethod
+    def _compute_quantiles(samples) -> Dict[float, float]:
+        if not samples:
+            return {q: 0.0 for q in QUANTILES}
+        result = {}
+        for q in QUANTILES:
+            index = min(len(samples) - 1, int(round(q * (len(samples) - 1))))
+            result[q] = samples[index]
+        return result
+
+    def snapshot(self) -> Dict:
+        """以字典形式导出（用于JSON接口）"""
+        with self._lock:
+            items = [(key, series.count, series.sum, sorted(series.recent))
+                     for key, series in self._series.items()]
+        result = {}
+        for key, count, total, samples in items:
+            label = ",".join(f"{k}={v}" for k, v in key) or "all"
+            quantiles = self._compute_quantiles(samples)
+            result[label] = {
+                "count": count,
+                "avg": total / count if count else 0.0,
+                "p50": quantiles[0.5],
+                "p95": quantiles[0.95],
+                "p99": quantiles[0.99]
+            }
+        return result
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(series.bucket_counts), series.count, series.sum, sorted(series.recent))
+                     for key, series in sorted(self._series.items())]
+
+        for key, bucket_counts, count, total, _ in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+
+        # 分位数单独导出为summary，避免与直方图同名
+        summary_name = f"{self.name}_recent"
+        lines.append(f"# HELP {summary_name} {self.description} (p50/p95/p99 over last {self.window} samples)")
+        lines.append(f"# TYPE {summary_name} summary")
+        for key, _, _, _, samples in items:
+            for q, value in self._compute_quantiles(samples).items():
+                lines.append(f"{summary_name}{_format_labels(key, {'quantile': str(q)})} {_format_value(value)}")
+            lines.append(f"{summary_name}_sum{_format_labels(key)} {_format_value(float(sum(samples)))}")
+            lines.append(f"{summary_name}_count{_format_labels(key)} {len(samples)}")
+
+        return "\n".join(lines)
+
+
+class Counter:
+    """单调递增计数器：可直接累加，也可在导出时通过回调读取其他组件维护的累计值"""
+
+    def __init__(self, name: str, description: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} counter"]
+        if self.callback is not None:
+            try:
+                lines.append(f"{self.name} {_format_value(float(self.callback()))}")
+            except Exception:
+                pass
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    """仪表：可直接设置，也可在导出时通过回调取值"""
+
+    def __init__(self, name: str, description: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            try:
+                lines.append(f"{self.name} {_format_value(float(self.callback()))}")
+            except Exception:
+                pass
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def histogram(self, name: str, description: str = "", **kwargs) -> Histogram:
+        return self._get_or_create(Histogram, name, description, **kwargs)
+
+    def counter(self, name: str, description: str = "", callback=None) -> Counter:
+        return self._get_or_create(Counter, name, description, callback)
+
+    def gauge(self, name: str, description: str = "", callback=None) -> Gauge:
+        return self._get_or_create(Gauge, name, description, callback)
+
+    def render_prometheus(self) -> str:
+        """导出Prometheus文本格式"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def snapshot(self) -> Dict:
+        """导出所有直方图的分位数摘要"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics if isinstance(m, Histogram)}
+
+
+# 全局注册表
+registry = MetricsRegistry()
+
+# 各阶段耗时
+SPAN_HISTOGRAM = registry.histogram(
+    "fridge_span_duration_seconds",
+    "Duration of instrumented operations in seconds"
+)
+
+
+@contextmanager
+def span(name: str):
+    """记录一段代码的耗时（秒），按span名称分组"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_HISTOGRAM.observe(time.perf_counter() - start, {"span": name})
+
+
+def timed(name: str):
+    """函数耗时装饰器"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
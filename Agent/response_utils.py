@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web响应优化
+- 使用orjson序列化API响应（未安装时回退到标准json）
+- 按Accept-Encoding协商br/gzip压缩JSON、HTML、CSS、JS
+- 静态资源带内容哈希，配合长期缓存头
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+from datetime import date
+
+from flask import request
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Flask < 2.2
+    DefaultJSONProvider = None
+
+logger = logging.getLogger(__name__)
+
+# 小于该大小的响应不压缩
+MIN_COMPRESS_SIZE = 500
+
+# 可压缩的响应类型
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+}
+
+# 带版本号的静态资源缓存一年
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _orjson_default(obj):
+    """orjson无法直接处理的类型，保持与Flask默认格式一致"""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if DefaultJSONProvider is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """基于orjson的JSON序列化，失败时回退到标准实现"""
+
+        def dumps(self, obj, **kwargs):
+            if orjson is not None and not kwargs:
+                try:
+                    return orjson.dumps(
+                        obj,
+                        default=_orjson_default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                    ).decode("utf-8")
+                except TypeError:
+                    pass
+            return super().dumps(obj, **kwargs)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            if orjson is not None:
+                try:
+                    body = orjson.dumps(
+                        obj,
+                        default=_orjson_default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                    )
+                    return self._app.response_class(body, mimetype=self.mimetype)
+                except TypeError:
+                    pass
+            return super().response(*args, **kwargs)
+else:
+    OrjsonProvider = None
+
+
+def _choose_encoding(accept_encoding: str):
+    """根据Accept-Encoding选择压缩算法"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+# 静态资源压缩结果缓存: (路径, ETag, 编码) -> 压缩数据
+_static_cache = {}
+STATIC_CACHE_MAX_ENTRIES = 64
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response):
+    """after_request钩子：对可压缩的响应做br/gzip压缩"""
+    # 静态文件以直通模式返回，内容较小，读入内存后压缩并缓存结果
+    is_static = response.direct_passthrough and request.endpoint == "static"
+    if not is_static and (response.direct_passthrough or response.is_streamed):
+        return response
+    if (response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    encoding = _choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    cache_key = (request.path, etag, encoding) if is_static and etag else None
+    compressed = _static_cache.get(cache_key) if cache_key else None
+
+    if compressed is None:
+        if is_static:
+            response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        compressed = _compress(data, encoding)
+        if cache_key:
+            if len(_static_cache) >= STATIC_CACHE_MAX_ENTRIES:
+                _static_cache.clear()
+            _static_cache[cache_key] = compressed
+    elif is_static:
+        # 命中缓存：关闭原始文件句柄，直接返回压缩数据
+        response.close()
+        response.direct_passthrough = False
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    response.headers["Content-Length"] = str(len(compressed))
+    response.headers.pop("Accept-Ranges", None)
+
+    # 压缩后内容不同，ETag需区分
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+    return response
+
+
+class StaticAssets:
+    """静态资源内容哈希，生成带版本号的URL"""
+
+    def __init__(self, static_folder: str, url_path: str = "/static"):
+        self.static_folder = static_folder
+        self.url_path = url_path
+        self._hashes = {}
+
+    def file_hash(self, filename: str) -> str:
+        """计算静态文件的内容哈希（按修改时间缓存）"""
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return ""
+
+        cached = self._hashes.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "rb") as f:
+            digest = hashlib.md5(f.read()).hexdigest()[:12]
+        self._hashes[filename] = (mtime, digest)
+        return digest
+
+    def url(self, filename: str) -> str:
+        """带内容哈希的静态资源URL"""
+        digest = self.file_hash(filename)
+        url = f"{self.url_path}/{filename}"
+        return f"{url}?v={digest}" if digest else url
+
+
+def init_app(app):
+    """为Flask应用启用响应优化"""
+    if OrjsonProvider is not None and orjson is not None:
+        app.json = OrjsonProvider(app)
+        logger.info("API响应使用orjson序列化")
+
+    assets = StaticAssets(app.static_folder, app.static_url_path)
+
+    @app.context_processor
+    def inject_static_url():
+        return {"static_url": assets.url}
+
+    @app.after_request
+    def static_cache_headers(response):
+        # 带版本号的静态资源内容不会变化，可以长期缓存
+        if request.path.startswith(app.static_url_path + "/") and request.args.get("v"):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    # 最后注册，保证在其他after_request之后执行（Flask按注册的逆序调用）
+    app.after_request_funcs.setdefault(None, []).insert(0, compress_response)
+
+    return assets
@@ -5,10 +5,31 @@ import base64
 import logging
 import cv2
 import numpy as np
+import sys
 import time
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from metrics import span, timed
+
+# 传感器模块（运动门控等）位于 ../Sensor
+SENSOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Sensor')
+if SENSOR_DIR not in sys.path:
+    sys.path.append(SENSOR_DIR)
+from motion_gate import MotionGate
+from face_detectors import create_face_detector
+from frame_source import open_frame_source
+from face_tracking import FaceTracker, DistanceFilter
+from frame_scheduler import AdaptiveScheduler
+from distance_calibration import load_distance_model
+from motion_planner import MotionCostModel, plan_retrievals
+from proximity_state import ProximityStateMachine
+try:
+    from motion_controller import MotionController
+    from simulated_actuator import create_simulated_controller
+    from serial_manager import SerialPortManager
+except ImportError:  # 未安装pyserial时只打印动作，不驱动平台
+    MotionController = None
 
 # 配置日志
 logging.basicConfig(
@@ -44,40 +65,112 @@ class SmartFridgeQwenAgent:
         self.face_detection_enabled = True
         self.face_detection_thread = None
         self.face_detection_running = False
-        self.last_face_detection_time = 0
         self.face_detection_cooldown = 3.0  # 3秒冷却时间
         
         # 人脸检测参数
-        self.REFERENCE_FACE_WIDTH = 150  # 像素
-        self.REFERENCE_DISTANCE = 50  # 厘米
-        self.DETECTION_DISTANCE = 50  # 检测距离阈值
+        self.DETECTION_DISTANCE = 50  # 检测距离阈值（厘米）
+        
+        # 检测模式："fast" 缩放+ROI+按距离推算最小人脸尺寸，"full" 整帧检测
+        self.face_detection_mode = os.getenv('FRIDGE_FACE_DETECTION_MODE', 'fast')
+        self.face_detection_width = 320  # fast模式下检测使用的帧宽度
+        self.face_detection_roi = None  # 感兴趣区域 (x, y, w, h)，按画面比例，None为整帧
+        # 检测后端：haar / yunet / ssd（DNN模型缺失时回退到haar）
+        self.face_detection_backend = os.getenv('FRIDGE_FACE_BACKEND', 'haar')
+        self.face_detection_threads = int(os.getenv('FRIDGE_FACE_THREADS', '0')) or None
+        
+        # 先检测后跟踪：auto/kcf/mosse/csrt/template，none 为每帧检测
+        self.face_tracker_type = os.getenv('FRIDGE_FACE_TRACKER', 'auto')
+        self.face_redetect_interval = 10  # 连续跟踪10帧后重新检测
+        self.face_tracker = None
+        # 距离中值滤波，单帧误检不触发接近事件
+        self.distance_filter = DistanceFilter()
+        
+        # 运动门控：画面无变化时跳过人脸检测
+        self.motion_gate = MotionGate()
+        self.stats_log_interval = 60  # 每60秒记录一次门控统计
+        
+        # 自适应帧率：无人时低频，运动/人脸时提高，事件触发后冷却期降频
+        # 帧率可通过 FRIDGE_SCHED_IDLE_FPS / MOTION_FPS / ACTIVE_FPS / COOLDOWN_FPS 配置
+        self.frame_scheduler = AdaptiveScheduler.from_env(cooldown_seconds=self.face_detection_cooldown)
+        
+        # 接近状态机：本进程检测循环、事件总线和HTTP上报的接近事件共用，每次接近只触发一次
+        self.proximity = ProximityStateMachine.from_env(
+            enter_distance=self.DETECTION_DISTANCE,
+            dedup_seconds=self.face_detection_cooldown
+        )
+        self.proximity.add_listener(self._on_approach)
+        # FRIDGE_PROXIMITY_ENTER_CM 可覆盖检测距离
+        self.DETECTION_DISTANCE = self.proximity.enter_distance
+        self.last_face_distance = None
+        # 画面从静止变为有运动时的回调（人脸确认之前，用于预取问候等投机工作）
+        self.motion_listeners = []
+        self.motion_active = False
+        
+        # 帧来源：摄像头索引，或录制的视频文件/图片目录（用于重放测试）
+        self.camera_source = os.getenv('FRIDGE_CAMERA_SOURCE', '0')
+        # 距离模型：从标定文件按摄像头ID/来源读取（distance_calibration.py 生成），未标定时使用默认模型
+        self.camera_id = os.getenv('FRIDGE_CAMERA_ID', 'front')
+        self.distance_model = load_distance_model(self.camera_id, self.camera_source)
+        
+        # 运动控制器：FRIDGE_MOTION_PORT=auto 自动发现串口，也可指定串口（如 /dev/ttyUSB0），sim / sim:pty 使用模拟控制器，
+        # 未设置时只打印动作
+        self.motion = None
+        # 平台同一时间只能执行一个取放动作序列，并发请求在此排队
+        self.actuator_lock = threading.Lock()
+        self.init_motion_controller()
+        # 平台当前位置 (层, 扇区) 和移动耗时模型（批量取物时规划顺序）
+        self.platform_position = (0, 0)
+        self.motion_cost_model = MotionCostModel.from_env(sections=self.sections_per_level)
         
         # 初始化摄像头
         self.cap = None
-        self.face_cascade = None
+        self.face_detector = None
         self.init_face_detection()
         
         # 加载冰箱数据
         self.fridge_data = self.load_fridge_data()
+        
+        # 库存版本号：每次保存数据时递增，用于缓存失效
+        self.inventory_version = 0
     
     def init_face_detection(self):
         """初始化人脸检测"""
         try:
-            # 初始化摄像头
-            self.cap = cv2.VideoCapture(0)
+            # 初始化摄像头（帧共享服务运行时从共享内存读取，不独占设备）
+            self.cap = open_frame_source(self.camera_source)
             if not self.cap.isOpened():
                 logger.warning("无法打开摄像头，人脸检测功能将被禁用")
                 self.face_detection_enabled = False
                 self.cap = None
                 return
             
+            # 标定模型换算到实际采集宽度（重放来源不报告宽度时保持不变）
+            self.distance_model = self.distance_model.scaled_to(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            
             # 加载人脸检测器
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            if self.face_cascade.empty():
+            self.face_detector = create_face_detector(
+                backend=self.face_detection_backend,
+                mode=self.face_detection_mode,
+                # 最小人脸尺寸按离开距离计算，进入/离开之间的人脸仍能检测到（迟滞）
+                detection_distance=self.proximity.leave_distance,
+                distance_model=self.distance_model,
+                input_width=self.face_detection_width,
+                threads=self.face_detection_threads,
+                roi=self.face_detection_roi
+            )
+            logger.info(f"人脸检测后端: {self.face_detector.name}")
+            if self.face_detector.empty():
                 logger.warning("无法加载人脸检测器，人脸检测功能将被禁用")
                 self.face_detection_enabled = False
                 return
             
+            self.face_tracker = FaceTracker(
+                self.face_detector,
+                tracker=self.face_tracker_type,
+                redetect_interval=self.face_redetect_interval
+            )
+            logger.info(f"人脸跟踪器: {self.face_tracker.tracker_kind}")
+            
             logger.info("人脸检测初始化成功")
             
         except Exception as e:
@@ -85,13 +178,10 @@ class SmartFridgeQwenAgent:
             self.face_detection_enabled = False
     
     def estimate_distance(self, face_width: int) -> float:
-        """根据人脸框宽度估算距离"""
-        if face_width <= 0:
-            return float('inf')
-        # 使用简单的反比例关系估算距离
-        distance = (self.REFERENCE_FACE_WIDTH * self.REFERENCE_DISTANCE) / face_width
-        return distance
+        """根据人脸框宽度估算距离（使用标定的距离模型）"""
+        return self.distance_model.estimate(face_width)
     
+    @timed("detect_faces")
     def detect_faces(self) -> bool:
         """检测人脸并判断是否触发接近事件"""
         if not self.face_detection_enabled or self.cap is None:
@@ -102,25 +192,35 @@ class SmartFridgeQwenAgent:
             if not ret:
                 return False
             
-            # 转换为灰度图
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # 运动门控：无运动时不运行人脸检测
+            if self.motion_gate is not None and not self.motion_gate.update(frame):
+                self.face_tracker.reset()
+                self.distance_filter.reset()
+                self.frame_scheduler.report()
+                self.last_face_distance = None
+                self.motion_active = False
+                return False
             
-            # 检测人脸
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+            if not self.motion_active:
+                self.motion_active = True
+                self._notify_motion()
             
-            # 检查是否需要触发事件
+            # 检测或跟踪人脸（检测框为原图坐标）
+            faces = self.face_tracker.update(frame)
+            
+            nearest = None
             if len(faces) >= 1:
-                for (x, y, w, h) in faces:
-                    distance = self.estimate_distance(w)
-                    if distance <= self.DETECTION_DISTANCE:
-                        return True
+                # 人站定后画面变化小，检测到人脸时保持门控打开
+                if self.motion_gate is not None:
+                    self.motion_gate.keep_alive()
+                nearest = min(self.estimate_distance(w) for (x, y, w, h) in faces)
             
-            return False
+            self.frame_scheduler.report(motion=True, face=nearest is not None)
+            
+            # 使用滤波后的距离判断是否触发事件
+            distance = self.distance_filter.update(nearest)
+            self.last_face_distance = distance
+            return distance is not None and distance <= self.DETECTION_DISTANCE
             
         except Exception as e:
             logger.error(f"人脸检测出错: {e}")
@@ -148,28 +248,62 @@ class SmartFridgeQwenAgent:
             self.face_detection_thread.join(timeout=2)
         logger.info("人脸检测监控已停止")
     
+    def get_face_detection_stats(self) -> Dict:
+        """获取人脸检测的门控和CPU占用统计"""
+        stats = self.motion_gate.get_stats() if self.motion_gate is not None else {}
+        if self.face_tracker is not None:
+            stats["tracking"] = self.face_tracker.get_stats()
+        stats["scheduler"] = self.frame_scheduler.get_stats()
+        return stats
+    
     def _face_detection_loop(self):
         """人脸检测循环"""
+        last_stats_time = time.time()
         while self.face_detection_running:
             try:
-                if self.detect_faces():
-                    current_time = time.time()
-                    
-                    # 防抖检查
-                    if current_time - self.last_face_detection_time >= self.face_detection_cooldown:
-                        self.last_face_detection_time = current_time
-                        logger.info("👤 检测到人脸接近 - 触发接近传感器事件")
-                        
-                        # 这里可以添加触发接近传感器事件的逻辑
-                        # 例如：调用Web API、发送通知等
-                        self._trigger_proximity_event()
+                if self.motion_gate is not None and time.time() - last_stats_time >= self.stats_log_interval:
+                    last_stats_time = time.time()
+                    logger.info(self.motion_gate.format_stats())
+                    logger.info(self.frame_scheduler.format_stats())
+                
+                self.detect_faces()
+                # 迟滞、停留时间和去重由接近状态机判断，确认接近时回调 _on_approach
+                self.proximity.update(self.last_face_distance, source="agent", camera_id=self.camera_id)
                 
-                time.sleep(0.1)  # 短暂休眠以减少CPU使用
+                # 按当前状态的帧率等待下一帧
+                self.frame_scheduler.wait()
                 
             except Exception as e:
                 logger.error(f"人脸检测循环出错: {e}")
                 time.sleep(1)
     
+    def attach_event_bus(self, event_bus):
+        """订阅事件总线：其他进程的接近事件与本进程的检测一起去重，运动事件转给运动回调"""
+        event_bus.subscribe("proximity", self._on_bus_proximity)
+        event_bus.subscribe("motion", lambda event: self._notify_motion(event.get("source") or "event_bus"))
+
+    def _on_bus_proximity(self, event):
+        self.proximity.report(event.get("source") or "event_bus",
+                              camera_id=event["data"].get("camera_id"),
+                              distance=event["data"].get("distance_cm"))
+
+    def add_motion_listener(self, callback):
+        """注册运动回调 callback(source)，每段运动开始时调用一次"""
+        self.motion_listeners.append(callback)
+
+    def _notify_motion(self, source="agent"):
+        for callback in self.motion_listeners:
+            try:
+                callback(source)
+            except Exception as e:
+                logger.error(f"运动回调失败: {e}")
+
+    def _on_approach(self, event):
+        """每次接近只调用一次（无论由哪个来源确认）"""
+        self.frame_scheduler.report(event=True)
+        logger.info(f"👤 检测到人脸接近 - 触发接近传感器事件（来源 {event['source']}）")
+        self._trigger_proximity_event()
+
     def _trigger_proximity_event(self):
         """触发接近传感器事件"""
         try:
@@ -226,15 +360,59 @@ class SmartFridgeQwenAgent:
         
         return data
     
+    @timed("save_fridge_data")
     def save_fridge_data(self):
         """保存冰箱数据"""
         self.fridge_data["last_update"] = datetime.now().isoformat()
         with open(self.fridge_data_file, 'w', encoding='utf-8') as f:
             json.dump(self.fridge_data, f, ensure_ascii=False, indent=2)
+        self.inventory_version += 1
+    
+    def init_motion_controller(self):
+        """
+        打开运动控制器串口
+        FRIDGE_MOTION_PORT=auto 自动发现控制器，指定端口时只连接该端口；两者都在后台重连，
+        控制器断开时动作命令立即失败（degraded），不阻塞请求
+        """
+        port = os.getenv('FRIDGE_MOTION_PORT')
+        if not port:
+            return
+        if MotionController is None:
+            logger.warning("未安装pyserial，无法驱动运动平台")
+            return
+        max_in_flight = int(os.getenv('FRIDGE_MOTION_PIPELINE', '2'))
+        try:
+            if port.startswith('sim'):
+                self.motion = create_simulated_controller(
+                    use_pty=port == 'sim:pty',
+                    speed=float(os.getenv('FRIDGE_SIM_SPEED', '1')),
+                    max_in_flight=max_in_flight
+                )
+                return
+            self.motion = SerialPortManager(
+                baudrate=int(os.getenv('FRIDGE_MOTION_BAUDRATE', '9600')),
+                patterns=None if port == 'auto' else [port],
+                max_in_flight=max_in_flight
+            ).start()
+        except Exception as e:
+            logger.error(f"运动控制器初始化失败: {e}")
+            self.motion = None
+    
+    def get_motion_status(self) -> Dict:
+        """运动控制器连接状态：disabled（未配置）、connecting、ready、degraded"""
+        if self.motion is None:
+            return {"state": "disabled", "ready": False}
+        if hasattr(self.motion, "get_status"):
+            return self.motion.get_status()
+        # 模拟控制器直接连接，没有重连管理
+        return {"state": "ready" if self.motion.healthy else "degraded", "ready": self.motion.healthy,
+                "port": self.motion.port_name, "controller": self.motion.get_stats()}
     
     def lift(self, level_index: int):
         """控制圆形平台上升到指定层"""
         if 0 <= level_index < self.total_levels:
+            if self.motion is not None:
+                return self.motion.lift(level_index)
             print(f"reached level {level_index}")
             return True
         else:
@@ -244,6 +422,8 @@ class SmartFridgeQwenAgent:
     def turn(self, section_index: int):
         """控制圆形平台旋转到指定扇区"""
         if 0 <= section_index < self.sections_per_level:
+            if self.motion is not None:
+                return self.motion.turn(section_index)
             print(f"turned to section {section_index}")
             return True
         else:
@@ -252,11 +432,60 @@ class SmartFridgeQwenAgent:
     
     def fetch(self):
         """控制机械臂取物"""
+        if self.motion is not None:
+            return self.motion.fetch()
         print("fetched object")
         return True
     
-    def encode_image(self, image_path: str) -> str:
-        """将图片编码为base64"""
+    def move_and_fetch(self, level: int, section: int) -> bool:
+        """执行完整的 升降 → 旋转 → 取物 动作序列"""
+        return self.run_actuator_sequence(level, section) is None
+    
+    def run_actuator_sequence(self, level: int, section: int) -> Optional[str]:
+        """执行 升降 → 旋转 → 取物，成功返回 None，失败返回原因（控制器的应答或连接状态）"""
+        if not (0 <= level < self.total_levels and 0 <= section < self.sections_per_level):
+            print(f"Invalid target: level {level}, section {section}")
+            return f"invalid target: level {level}, section {section}"
+        with span("actuator_queue"):
+            self.actuator_lock.acquire()
+        try:
+            return self._run_actuator_sequence(level, section)
+        finally:
+            self.actuator_lock.release()
+    
+    def _run_actuator_sequence(self, level: int, section: int) -> Optional[str]:
+        with span("actuator_sequence"):
+            if self.motion is not None:
+                # 升降和旋转一起下发（流水线），都应答后再取物
+                with span("lift_and_turn"):
+                    lift = self.motion.lift(level, wait=False)
+                    turn = self.motion.turn(section, wait=False)
+                    lift.wait()
+                    turn.wait()
+                for command in (lift, turn):
+                    if not command.ok:
+                        return f"{command.name}: {command.response}"
+                self.platform_position = (level, section)
+                with span("fetch"):
+                    fetch = self.motion.fetch(wait=False)
+                    fetch.wait()
+                return None if fetch.ok else f"{fetch.name}: {fetch.response}"
+            with span("lift"):
+                if not self.lift(level):
+                    return "lift failed"
+            with span("turn"):
+                if not self.turn(section):
+                    return "turn failed"
+            self.platform_position = (level, section)
+            with span("fetch"):
+                if not self.fetch():
+                    return "fetch failed"
+        return None
+    
+    def encode_image(self, image_path: str, image_data: Optional[bytes] = None) -> str:
+        """将图片编码为base64，已有内存数据时不再读取磁盘"""
+        if image_data is not None:
+            return base64.b64encode(image_data).decode('utf-8')
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
     
@@ -327,6 +556,7 @@ class SmartFridgeQwenAgent:
         
         return best_level
     
+    @timed("get_fridge_status")
     def get_fridge_status(self) -> Dict:
         """获取冰箱当前状态"""
         current_time = datetime.now()
@@ -354,10 +584,12 @@ class SmartFridgeQwenAgent:
             "available_sections": self.fridge_data["level_usage"]
         }
     
-    def call_qwen_vl(self, image_path: str, prompt: str) -> Dict:
+    @timed("call_qwen_vl")
+    def call_qwen_vl(self, image_path: str, prompt: str,
+                     image_data: Optional[bytes] = None, mime_type: str = "image/jpeg") -> Dict:
         """调用Qwen VL模型"""
         try:
-            base64_image = self.encode_image(image_path)
+            base64_image = self.encode_image(image_path, image_data)
             
             # 添加重试机制
             max_retries = 3
@@ -369,7 +601,7 @@ class SmartFridgeQwenAgent:
                             {
                                 "role": "user",
                                 "content": [
-                                    {"image": f"data:image/jpeg;base64,{base64_image}"},
+                                    {"image": f"data:{mime_type};base64,{base64_image}"},
                                     {"text": prompt}
                                 ]
                             }
@@ -402,8 +634,12 @@ class SmartFridgeQwenAgent:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def add_item_to_fridge(self, image_path: str) -> Dict:
-        """添加物品到冰箱 - 完全由大模型处理"""
+    def add_item_to_fridge(self, image_path: str, image_data: Optional[bytes] = None,
+                           mime_type: str = "image/jpeg") -> Dict:
+        """添加物品到冰箱 - 完全由大模型处理
+
+        image_data: 已在内存中的图片数据（如流式上传的缓冲区），提供时不再重新读取image_path
+        """
         try:
             # 获取冰箱当前状态
             fridge_status = self.get_fridge_status()
@@ -494,7 +730,7 @@ class SmartFridgeQwenAgent:
 请只返回JSON格式的结果，不要其他文字。"""
 
             # 调用大模型
-            result = self.call_qwen_vl(image_path, system_prompt)
+            result = self.call_qwen_vl(image_path, system_prompt, image_data, mime_type)
             
             if not result["success"]:
                 return result
@@ -607,10 +843,15 @@ class SmartFridgeQwenAgent:
                                 "error": "冰箱已满，没有可用空间。建议：1. 清理过期物品 2. 重新整理冰箱空间 3. 考虑取出一些不常用的物品"
                             }
                     
-                    # 控制冰箱移动到指定位置
-                    self.lift(int(food_info["level"]))
-                    self.turn(int(food_info["section"]))
-                    self.fetch()
+                    # 控制冰箱移动到指定位置；动作失败时不记录物品
+                    actuator_error = self.run_actuator_sequence(int(food_info["level"]), int(food_info["section"]))
+                    if actuator_error is not None:
+                        logger.error(f"放入物品时运动平台动作失败: {actuator_error}")
+                        return {
+                            "success": False,
+                            "error": f"运动平台未能完成放入动作: {actuator_error}",
+                            "food_name": food_info["food_name"]
+                        }
                     
                     # 记录物品信息
                     item_id = f"{food_info['food_name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -632,7 +873,8 @@ class SmartFridgeQwenAgent:
                         "shelf_life_days": shelf_life_days,
                         "added_time": datetime.now().isoformat(),
                         "expiry_date": expiry_date,
-                        "reasoning": food_info.get("reasoning", "")
+                        "reasoning": food_info.get("reasoning", ""),
+                        "image_path": image_path
                     }
                     
                     # 更新层使用情况
@@ -809,10 +1051,15 @@ class SmartFridgeQwenAgent:
         level = item["level"]
         section = item["section"]
         
-        # 控制冰箱移动到指定位置
-        self.lift(level)
-        self.turn(section)
-        self.fetch()
+        # 控制冰箱移动到指定位置；动作失败时库存保持不变
+        actuator_error = self.run_actuator_sequence(level, section)
+        if actuator_error is not None:
+            logger.error(f"取出 {item['name']} 时运动平台动作失败: {actuator_error}")
+            return {
+                "success": False,
+                "item_name": item["name"],
+                "error": f"运动平台未能取出 {item['name']}: {actuator_error}"
+            }
         
         # 更新数据
         self.fridge_data["level_usage"][str(level)][str(section)] = False
@@ -825,6 +1072,56 @@ class SmartFridgeQwenAgent:
             "message": f"已取出 {item['name']}"
         }
     
+    def get_items_from_fridge(self, item_ids: List[str]) -> Dict:
+        """批量取出物品：规划取物顺序，减少平台在各层之间来回移动"""
+        found = []
+        missing = []
+        for item_id in item_ids:
+            if item_id in self.fridge_data["items"]:
+                if item_id not in found:
+                    found.append(item_id)
+            else:
+                missing.append(item_id)
+        
+        targets = [(self.fridge_data["items"][item_id]["level"], self.fridge_data["items"][item_id]["section"])
+                   for item_id in found]
+        plan = plan_retrievals(targets, start=self.platform_position, model=self.motion_cost_model)
+        order = [found[index] for index in plan["order"]]
+        logger.info(f"🗺️ 批量取物 {len(order)} 件: 规划移动 {plan['planned_seconds']:.1f}s，"
+                    f"原顺序 {plan['naive_seconds']:.1f}s，节省 {plan['saved_seconds']:.1f}s")
+        
+        results = []
+        with span("batch_retrieval"):
+            for item_id in order:
+                result = self.get_item_from_fridge(item_id)
+                result["item_id"] = item_id
+                results.append(result)
+        
+        retrieved = sum(1 for r in results if r.get("success"))
+        failed = len(results) - retrieved
+        return {
+            "success": bool(results) and failed == 0,
+            "results": results,
+            "order": order,
+            "missing": missing,
+            "plan": {
+                "planned_travel_seconds": plan["planned_seconds"],
+                "naive_travel_seconds": plan["naive_seconds"],
+                "saved_seconds": plan["saved_seconds"],
+                "fetch_seconds": plan["fetch_seconds"]
+            },
+            "message": f"已取出 {retrieved} 件物品" + (f"，{failed} 件取出失败" if failed else "")
+                       + (f"，{len(missing)} 件不存在" if missing else "")
+        }
+    
+    def get_referenced_images(self) -> List[str]:
+        """获取库存物品引用的图片路径（上传目录回收时保留这些图片）"""
+        return [
+            item.get("image_path")
+            for item in list(self.fridge_data["items"].values())
+            if item.get("image_path")
+        ]
+    
     def get_fridge_inventory(self) -> Dict:
         """获取冰箱库存"""
         current_time = datetime.now()
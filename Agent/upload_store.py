@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传图片存储模块
+- 流式接收：边读边计算哈希、校验文件头并写盘，只经过一次拷贝
+- 内容寻址：以SHA-256命名文件，相同图片只保存一份
+- 生命周期：按容量和时间预算回收未被库存引用的图片
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认上传大小上限：10MB
+DEFAULT_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# 每次读取的块大小
+CHUNK_SIZE = 64 * 1024
+
+# 上传目录默认预算：200MB，未引用图片保留7天
+DEFAULT_MAX_STORE_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# 新文件的保护期，避免回收正在识别中的图片
+DEFAULT_GRACE_SECONDS = 300
+
+# 临时文件前缀
+TMP_PREFIX = ".upload_"
+
+# 支持的图片文件头（魔数）-> (扩展名, MIME类型)
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', '.jpg', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', '.png', 'image/png'),
+    (b'GIF87a', '.gif', 'image/gif'),
+    (b'GIF89a', '.gif', 'image/gif'),
+    (b'BM', '.bmp', 'image/bmp'),
+]
+
+
+class UploadError(Exception):
+    """上传文件不合法（过大、为空或不是图片）"""
+    pass
+
+
+class UploadTooLarge(UploadError):
+    """上传文件超过大小上限"""
+    pass
+
+
+def detect_image_type(header: bytes) -> Optional[Dict]:
+    """根据文件头识别图片类型，无法识别时返回None"""
+    # WEBP: RIFF....WEBP
+    if len(header) >= 12 and header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return {"extension": ".webp", "mime_type": "image/webp"}
+
+    for signature, extension, mime_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return {"extension": extension, "mime_type": mime_type}
+
+    return None
+
+
+def ingest_upload_stream(stream, upload_dir: str = "uploads",
+                         max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES, lock=None) -> Dict:
+    """
+    流式接收上传文件
+
+    一次读取过程中同时完成：计算SHA-256、校验图片文件头、写入临时文件、
+    在内存中保留完整数据。完成后以内容哈希命名文件，
+    返回的data可直接交给编码阶段使用，无需再次从磁盘读取。
+
+    Args:
+        stream: 可读的二进制流（如 werkzeug FileStorage.stream）
+        upload_dir: 保存目录
+        max_bytes: 允许的最大字节数
+        lock: 只在查重和重命名时持有的锁（读取和哈希不持有），与回收线程互斥
+
+    Returns:
+        包含 path、sha256、size、mime_type、data、deduplicated 的字典
+
+    Raises:
+        UploadTooLarge: 超过大小上限
+        UploadError: 文件为空或不是支持的图片格式
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+    image_type = None
+
+    fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, suffix=".part", dir=upload_dir)
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                if len(buffer) + len(chunk) > max_bytes:
+                    raise UploadTooLarge(f"文件超过大小上限 {max_bytes / (1024 * 1024):.1f}MB")
+
+                buffer.extend(chunk)
+
+                # 收到足够的文件头后立即校验，非图片文件尽早拒绝
+                if image_type is None and len(buffer) >= 12:
+                    image_type = detect_image_type(bytes(buffer[:12]))
+                    if image_type is None:
+                        raise UploadError("不支持的文件类型，请上传JPEG/PNG/WEBP/GIF/BMP图片")
+
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+
+        if not buffer:
+            raise UploadError("上传文件为空")
+
+        if image_type is None:
+            image_type = detect_image_type(bytes(buffer[:12]))
+            if image_type is None:
+                raise UploadError("不支持的文件类型，请上传JPEG/PNG/WEBP/GIF/BMP图片")
+
+        sha256 = hasher.hexdigest()
+        final_path = os.path.join(upload_dir, f"{sha256}{image_type['extension']}")
+        with lock or contextlib.nullcontext():
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                # 相同内容已存在：丢弃临时文件，刷新已有文件的时间
+                os.remove(tmp_path)
+                os.utime(final_path)
+            else:
+                os.replace(tmp_path, final_path)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {
+        "path": final_path,
+        "sha256": sha256,
+        "size": len(buffer),
+        "mime_type": image_type["mime_type"],
+        "data": bytes(buffer),
+        "deduplicated": deduplicated
+    }
+
+
+class UploadStore:
+    """
+    受管理的上传图片目录
+
+    文件以内容哈希命名，重复上传只保存一份。后台回收线程会保留
+    仍被库存物品引用的图片，其余图片超过时间预算或目录超过容量预算时删除
+    （先删最旧的）。
+    """
+
+    def __init__(self, upload_dir: str = "uploads",
+                 max_total_bytes: int = DEFAULT_MAX_STORE_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+                 grace_seconds: float = DEFAULT_GRACE_SECONDS,
+                 referenced_paths: Optional[Callable[[], Iterable[str]]] = None):
+        """
+        Args:
+            upload_dir: 上传目录
+            max_total_bytes: 目录容量预算（字节）
+            max_age_seconds: 未引用图片的最长保留时间
+            grace_seconds: 新文件保护期，保护期内不回收
+            referenced_paths: 返回当前被库存引用的图片路径的函数
+        """
+        self.upload_dir = upload_dir
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.grace_seconds = grace_seconds
+        self.referenced_paths = referenced_paths or (lambda: [])
+
+        self._lock = threading.Lock()
+        self._gc_thread = None
+        self._gc_stop = threading.Event()
+
+        # 统计信息
+        self.stats = {
+            "uploads": 0,
+            "dedup_hits": 0,
+            "bytes_received": 0,
+            "bytes_deduplicated": 0,
+            "gc_runs": 0,
+            "gc_files_removed": 0,
+            "gc_bytes_freed": 0,
+            "last_gc_time": None
+        }
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+
+    def ingest(self, stream, max_bytes: int = DEFAULT_MAX_UPLOAD_BYTES) -> Dict:
+        """流式接收上传文件并写入存储目录"""
+        # 读取和哈希期间不持锁，临时文件在保护期内不会被回收
+        upload = ingest_upload_stream(stream, upload_dir=self.upload_dir, max_bytes=max_bytes,
+                                      lock=self._lock)
+        with self._lock:
+            self.stats["uploads"] += 1
+            self.stats["bytes_received"] += upload["size"]
+            if upload["deduplicated"]:
+                self.stats["dedup_hits"] += 1
+                self.stats["bytes_deduplicated"] += upload["size"]
+        return upload
+
+    def _list_files(self):
+        """列出目录中的文件: [(path, size, mtime, is_tmp)]"""
+        files = []
+        try:
+            with os.scandir(self.upload_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((entry.path, st.st_size, st.st_mtime, entry.name.startswith(TMP_PREFIX)))
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _referenced_names(self) -> set:
+        """当前被库存引用的文件名集合"""
+        names = set()
+        try:
+            for path in self.referenced_paths():
+                if path:
+                    names.add(os.path.basename(path))
+        except Exception as e:
+            logger.error(f"获取库存引用图片失败: {e}")
+        return names
+
+    def collect_garbage(self) -> Dict:
+        """执行一次回收，返回本次回收结果"""
+        now = time.time()
+        removed_files = 0
+        freed_bytes = 0
+
+        with self._lock:
+            referenced = self._referenced_names()
+            files = self._list_files()
+            total_bytes = sum(size for _, size, _, _ in files)
+
+            candidates = []
+            for path, size, mtime, is_tmp in files:
+                age = now - mtime
+                if age < self.grace_seconds:
+                    continue
+                # 残留的临时文件直接删除
+                if is_tmp:
+                    candidates.append((0, path, size))
+                    continue
+                if os.path.basename(path) in referenced:
+                    continue
+                candidates.append((mtime, path, size))
+
+            # 先删最旧的；超过时间预算的一律删除，其余只在超出容量预算时删除
+            candidates.sort()
+            for mtime, path, size in candidates:
+                expired = mtime == 0 or now - mtime > self.max_age_seconds
+                if not expired and total_bytes <= self.max_total_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"删除上传图片失败 {path}: {e}")
+                    continue
+                removed_files += 1
+                freed_bytes += size
+                total_bytes -= size
+
+            self.stats["gc_runs"] += 1
+            self.stats["gc_files_removed"] += removed_files
+            self.stats["gc_bytes_freed"] += freed_bytes
+            self.stats["last_gc_time"] = now
+
+        if removed_files:
+            logger.info(f"🧹 上传目录回收: 删除{removed_files}个文件，释放{freed_bytes // 1024}KB")
+
+        return {
+            "removed_files": removed_files,
+            "freed_bytes": freed_bytes,
+            "total_bytes": total_bytes
+        }
+
+    def start_gc(self, interval: float = 600):
+        """启动后台回收线程"""
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+
+        def loop():
+            while not self._gc_stop.is_set():
+                try:
+                    self.collect_garbage()
+                except Exception as e:
+                    logger.error(f"上传目录回收出错: {e}")
+                self._gc_stop.wait(interval)
+
+        self._gc_stop.clear()
+        self._gc_thread = threading.Thread(target=loop, daemon=True)
+        self._gc_thread.start()
+        logger.info(f"上传目录回收线程已启动 (间隔{interval}秒)")
+
+    def stop_gc(self):
+        """停止后台回收线程"""
+        self._gc_stop.set()
+        if self._gc_thread:
+            self._gc_thread.join(timeout=2)
+
+    def get_stats(self) -> Dict:
+        """获取存储统计信息"""
+        files = [f for f in self._list_files() if not f[3]]
+        referenced = self._referenced_names()
+        referenced_files = [f for f in files if os.path.basename(f[0]) in referenced]
+
+        stats = dict(self.stats)
+        stats.update({
+            "file_count": len(files),
+            "total_bytes": sum(f[1] for f in files),
+            "referenced_files": len(referenced_files),
+            "referenced_bytes": sum(f[1] for f in referenced_files),
+            "max_total_bytes": self.max_total_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "oldest_file_age": (time.time() - min(f[2] for f in files)) if files else 0
+        })
+        return stats
@@ -4,14 +4,21 @@
 智慧冰箱Web界面
 """
 
-from flask import Flask, render_template, jsonify, request, Response
+from flask import Flask, render_template, jsonify, request, Response, make_response
+from werkzeug.exceptions import HTTPException
 import json
 import os
 import logging
+import queue
 import threading
 import time
 from datetime import datetime
 from smart_fridge_qwen import SmartFridgeQwenAgent
+from greeting_prefetch import GreetingPrefetcher
+from event_bus import EventBusServer, bus_enabled
+from upload_store import UploadStore, UploadError, UploadTooLarge, DEFAULT_MAX_UPLOAD_BYTES
+import response_utils
+from metrics import registry
 
 # 配置日志
 logging.basicConfig(
@@ -21,8 +28,97 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# 上传大小上限，可通过环境变量 FRIDGE_MAX_UPLOAD_MB 调整
+app.config['MAX_CONTENT_LENGTH'] = int(
+    os.getenv('FRIDGE_MAX_UPLOAD_MB', DEFAULT_MAX_UPLOAD_BYTES // (1024 * 1024))
+) * 1024 * 1024
+UPLOAD_DIR = "uploads"
+# 响应压缩、orjson序列化、静态资源长期缓存
+response_utils.init_app(app)
+
+# 请求耗时统计
+REQUEST_HISTOGRAM = registry.histogram(
+    "fridge_http_request_duration_seconds",
+    "HTTP request latency by route in seconds"
+)
+REQUEST_COUNTER = registry.counter(
+    "fridge_http_requests_total",
+    "HTTP requests by route, method and status"
+)
+
+@app.before_request
+def start_request_timer():
+    request.environ['fridge.start_time'] = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = request.environ.get('fridge.start_time')
+    if start is not None:
+        # 使用路由规则而不是实际路径，避免标签数量膨胀
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        REQUEST_HISTOGRAM.observe(time.perf_counter() - start, {"route": route, "method": request.method})
+        REQUEST_COUNTER.inc(labels={"route": route, "method": request.method, "status": str(response.status_code)})
+    return response
 fridge = SmartFridgeQwenAgent()
 
+# 上传图片存储：内容寻址去重，后台回收未被库存引用的图片
+upload_store = UploadStore(
+    upload_dir=UPLOAD_DIR,
+    max_total_bytes=int(os.getenv('FRIDGE_UPLOAD_STORE_MB', 200)) * 1024 * 1024,
+    max_age_seconds=float(os.getenv('FRIDGE_UPLOAD_MAX_AGE_HOURS', 24 * 7)) * 3600,
+    referenced_paths=fridge.get_referenced_images
+)
+upload_store.start_gc(interval=600)
+
+registry.gauge("fridge_upload_store_bytes", "Total size of the upload store in bytes",
+               callback=lambda: upload_store.get_stats()["total_bytes"])
+registry.gauge("fridge_upload_store_files", "Number of files in the upload store",
+               callback=lambda: upload_store.get_stats()["file_count"])
+registry.gauge("fridge_inventory_items", "Number of items in the fridge",
+               callback=lambda: len(fridge.fridge_data["items"]))
+registry.gauge("fridge_face_detection_idle_cpu_percent",
+               "CPU usage of the face detection thread while no motion is seen",
+               callback=lambda: fridge.get_face_detection_stats().get("idle_cpu_percent", 0))
+registry.gauge("fridge_face_detection_fps",
+               "Effective face detection loop rate in frames per second",
+               callback=lambda: fridge.get_face_detection_stats().get("scheduler", {}).get("effective_fps", 0))
+registry.gauge("fridge_face_detection_cascade_ratio",
+               "Fraction of frames on which the face cascade was run",
+               callback=lambda: fridge.get_face_detection_stats().get("cascade_ratio", 0))
+registry.gauge("fridge_proximity_approaches", "Approaches confirmed by the shared proximity state machine",
+               callback=lambda: fridge.proximity.get_stats()["approaches"])
+registry.gauge("fridge_proximity_events_suppressed",
+               "Proximity events dropped as duplicates of an approach already in progress",
+               callback=lambda: fridge.proximity.get_stats()["suppressed"])
+registry.gauge("fridge_greeting_prefetch_hit_ratio",
+               "Fraction of approaches served from a greeting prefetched on motion",
+               callback=lambda: greeting_prefetcher.get_stats()["hit_ratio"])
+registry.gauge("fridge_sse_clients", "Connected dashboard SSE clients",
+               callback=lambda: len(sse_clients))
+registry.gauge("fridge_motion_controller_ready",
+               "Whether the motion controller serial link is connected and healthy",
+               callback=lambda: 1 if fridge.get_motion_status().get("ready") else 0)
+
+# 各摄像头工作进程的健康状态（由 Sensor/multi_camera.py 上报）
+camera_health = {}
+camera_health_lock = threading.Lock()
+CAMERA_FPS_GAUGE = registry.gauge("fridge_camera_detection_fps",
+                                  "Effective detection rate per camera in frames per second")
+CAMERA_UP_GAUGE = registry.gauge("fridge_camera_up", "Whether the camera worker is alive and reporting")
+CAMERA_RESTARTS_GAUGE = registry.gauge("fridge_camera_worker_restarts", "Number of camera worker restarts")
+CAMERA_DETECT_GAUGE = registry.gauge("fridge_camera_detect_milliseconds",
+                                     "Mean per-frame detection time per camera in milliseconds")
+
+# 按键进程的事件队列统计（由 Sensor/button.py 上报）
+button_stats = {}
+BUTTON_QUEUE_GAUGE = registry.gauge("fridge_button_queue_depth", "GPIO button events waiting for a worker")
+BUTTON_DROPPED_GAUGE = registry.gauge("fridge_button_events_dropped",
+                                      "GPIO button events dropped because the queue was full")
+BUTTON_DEBOUNCED_GAUGE = registry.gauge("fridge_button_events_debounced",
+                                        "GPIO button events ignored by per-button debounce")
+BUTTON_LATENCY_GAUGE = registry.gauge("fridge_button_queue_latency_milliseconds",
+                                      "Mean time from GPIO edge to worker pickup in milliseconds")
+
 # 启动人脸检测监控
 try:
     fridge.start_face_detection_monitor()
@@ -171,67 +267,80 @@ def get_temperature_info(level):
     }
     return temperature_levels.get(level, {"temp": 0, "name": "未知", "emoji": "❓"})
 
+# 主页HTML只渲染一次（内容不依赖请求）
+_index_html = None
+
 @app.route('/')
 def index():
     """主页"""
-    return render_template('index.html')
+    global _index_html
+    if _index_html is None:
+        _index_html = render_template('index.html')
+    
+    response = make_response(_index_html)
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
+
+def build_fridge_status():
+    """构建冰箱状态数据（/api/fridge-status 与 /api/dashboard 共用）"""
+    # 获取冰箱库存
+    inventory_result = fridge.get_fridge_inventory()
+    
+    if not inventory_result["success"]:
+        return {"error": "获取库存失败"}
+    
+    # 处理库存数据
+    items = []
+    for item in inventory_result["inventory"]:
+        emoji = get_food_emoji(item["name"], item["category"])
+        expiry_progress = calculate_expiry_progress(
+            fridge.fridge_data["items"][item["item_id"]]["expiry_date"]
+        )
+        temp_info = get_temperature_info(item["level"])
+        
+        items.append({
+            "id": item["item_id"],
+            "name": item["name"],
+            "emoji": emoji,
+            "category": item["category"],
+            "level": item["level"],
+            "section": item["section"],
+            "temp_info": temp_info,
+            "days_remaining": item["days_remaining"],
+            "is_expired": item["is_expired"],
+            "expiry_progress": expiry_progress
+        })
+    
+    # 获取层使用情况
+    level_usage = fridge.fridge_data["level_usage"]
+    
+    # 计算统计信息
+    total_items = len(items)
+    expired_items = len([item for item in items if item["is_expired"]])
+    expiring_soon = len([item for item in items if item["expiry_progress"]["status"] == "expiring_soon"])
+    long_term_items = len([item for item in items if item["expiry_progress"]["status"] == "long_term"])
+    fresh_items = total_items - expired_items - expiring_soon - long_term_items
+    
+    return {
+        "success": True,
+        "items": items,
+        "level_usage": level_usage,
+        "stats": {
+            "total_items": total_items,
+            "expired_items": expired_items,
+            "expiring_soon": expiring_soon,
+            "fresh_items": fresh_items,
+            "long_term_items": long_term_items
+        },
+        "temperature_levels": fridge.temperature_levels
+    }
 
 @app.route('/api/fridge-status')
 def get_fridge_status():
     """获取冰箱状态API"""
     try:
-        # 获取冰箱库存
-        inventory_result = fridge.get_fridge_inventory()
-        
-        if not inventory_result["success"]:
-            return jsonify({"error": "获取库存失败"})
-        
-        # 处理库存数据
-        items = []
-        for item in inventory_result["inventory"]:
-            emoji = get_food_emoji(item["name"], item["category"])
-            expiry_progress = calculate_expiry_progress(
-                fridge.fridge_data["items"][item["item_id"]]["expiry_date"]
-            )
-            temp_info = get_temperature_info(item["level"])
-            
-            items.append({
-                "id": item["item_id"],
-                "name": item["name"],
-                "emoji": emoji,
-                "category": item["category"],
-                "level": item["level"],
-                "section": item["section"],
-                "temp_info": temp_info,
-                "days_remaining": item["days_remaining"],
-                "is_expired": item["is_expired"],
-                "expiry_progress": expiry_progress
-            })
-        
-        # 获取层使用情况
-        level_usage = fridge.fridge_data["level_usage"]
-        
-        # 计算统计信息
-        total_items = len(items)
-        expired_items = len([item for item in items if item["is_expired"]])
-        expiring_soon = len([item for item in items if item["expiry_progress"]["status"] == "expiring_soon"])
-        long_term_items = len([item for item in items if item["expiry_progress"]["status"] == "long_term"])
-        fresh_items = total_items - expired_items - expiring_soon - long_term_items
-        
-        return jsonify({
-            "success": True,
-            "items": items,
-            "level_usage": level_usage,
-            "stats": {
-                "total_items": total_items,
-                "expired_items": expired_items,
-                "expiring_soon": expiring_soon,
-                "fresh_items": fresh_items,
-                "long_term_items": long_term_items
-            },
-            "temperature_levels": fridge.temperature_levels
-        })
-        
+        return jsonify(build_fridge_status())
     except Exception as e:
         return jsonify({"error": str(e)})
 
@@ -284,79 +393,148 @@ physical_button_status = {
     "last_action_result": None
 }
 
-# 全局变量存储SSE客户端
+# SSE客户端：每个连接一个有界消息队列，通知只入队，由各连接的响应生成器写出
 sse_clients = []
+sse_clients_lock = threading.Lock()
+SSE_QUEUE_SIZE = 32
+SSE_KEEPALIVE_SECONDS = 15
 
 def notify_sse_clients(event_type, data):
-    """通知所有SSE客户端"""
-    message = f"data: {json.dumps({'type': event_type, 'data': data})}\n\n"
-    for client in sse_clients[:]:  # 复制列表避免修改时出错
+    """通知所有SSE客户端（不阻塞调用方；客户端消费太慢时丢弃它最旧的消息）"""
+    message = f"data: {json.dumps({'type': event_type, 'data': data}, default=str)}\n\n"
+    with sse_clients_lock:
+        clients = list(sse_clients)
+    for client in clients:
         try:
-            client.write(message)
-            client.flush()
-        except:
-            sse_clients.remove(client)
+            client.put_nowait(message)
+        except queue.Full:
+            try:
+                client.get_nowait()
+                client.put_nowait(message)
+            except (queue.Empty, queue.Full):
+                pass
+
+DEFAULT_RECOMMENDATIONS = [
+    {
+        "type": "general",
+        "title": "冰箱状态良好",
+        "items": [],
+        "message": "冰箱中的物品状态良好，可以正常使用。",
+        "action": "继续保持良好的存储习惯"
+    }
+]
+
+def build_recommendations(force=False):
+    """获取最新推荐（每分钟最多更新一次，force=True时立即更新）"""
+    global latest_recommendations
+    
+    current_time = datetime.now()
+    
+    # 检查是否需要更新推荐（每分钟更新一次）
+    if (force or latest_recommendations["last_update"] is None or 
+        (current_time - latest_recommendations["last_update"]).total_seconds() > 60):
+        
+        # 获取新的推荐
+        recommendations = fridge.get_recommendations()
+        latest_recommendations = {
+            "success": recommendations.get("success", False),
+            "recommendations": recommendations.get("recommendations", []),
+            "last_update": current_time
+        }
+    else:
+        # 如果使用缓存，更新时间戳为当前时间（保持时间显示正确）
+        latest_recommendations["last_update"] = current_time
+    
+    # 确保返回的数据格式正确
+    if not latest_recommendations.get("success", False):
+        latest_recommendations["success"] = True
+        if not latest_recommendations.get("recommendations"):
+            latest_recommendations["recommendations"] = DEFAULT_RECOMMENDATIONS
+    
+    return latest_recommendations
 
 @app.route('/api/recommendations')
 def get_recommendations():
     """获取推荐API"""
-    global latest_recommendations
-    
     try:
-        current_time = datetime.now()
-        
-        # 检查是否需要更新推荐（每分钟更新一次）
-        if (latest_recommendations["last_update"] is None or 
-            (current_time - latest_recommendations["last_update"]).total_seconds() > 60):
-            
-            # 获取新的推荐
-            recommendations = fridge.get_recommendations()
-            latest_recommendations = {
-                "success": recommendations.get("success", False),
-                "recommendations": recommendations.get("recommendations", []),
-                "last_update": current_time
-            }
-        else:
-            # 如果使用缓存，更新时间戳为当前时间（保持时间显示正确）
-            latest_recommendations["last_update"] = current_time
-        
-        # 确保返回的数据格式正确
-        if not latest_recommendations.get("success", False):
-            latest_recommendations["success"] = True
-            if not latest_recommendations.get("recommendations"):
-                latest_recommendations["recommendations"] = [
-                    {
-                        "type": "general",
-                        "title": "冰箱状态良好",
-                        "items": [],
-                        "message": "冰箱中的物品状态良好，可以正常使用。",
-                        "action": "继续保持良好的存储习惯"
-                    }
-                ]
-        
-        return jsonify(latest_recommendations)
+        return jsonify(build_recommendations())
     except Exception as e:
         # 如果出现异常，返回默认推荐
         return jsonify({
             "success": True,
-            "recommendations": [
-                {
-                    "type": "general",
-                    "title": "冰箱状态良好",
-                    "items": [],
-                    "message": "冰箱中的物品状态良好，可以正常使用。",
-                    "action": "继续保持良好的存储习惯"
-                }
-            ],
-            "last_update": current_time
+            "recommendations": DEFAULT_RECOMMENDATIONS,
+            "last_update": datetime.now()
         })
 
 @app.route('/api/proximity-sensor', methods=['POST'])
 def proximity_sensor():
     """接近传感器API - 由人脸检测触发"""
+    # 多摄像头时带摄像头ID
+    data = request.get_json(silent=True) or {}
+    return jsonify(handle_proximity_event(data.get("camera_id"), source=data.get("source", "http"),
+                                          distance=data.get("distance_cm")))
+
+@app.route('/api/proximity-state')
+def proximity_state():
+    """接近状态机统计API"""
+    return jsonify({"success": True, **fridge.proximity.get_stats(), "prefetch": greeting_prefetcher.get_stats()})
+
+# 最近一次接近生成的推荐，同一次接近的重复事件直接返回
+last_proximity_result = None
+# 最近一次接近的后台生成线程（HTTP上报的新接近等待它完成后返回推荐）
+pending_approach = None
+
+def handle_proximity_event(camera_id=None, source="http", distance=None):
+    """
+    接近事件交给共享的接近状态机去重；新的接近由 on_approach 生成推荐，
+    同一次接近内其他来源的重复事件返回已生成的推荐
+    """
+    approached = fridge.proximity.report(source, camera_id=camera_id, distance=distance)
+    if approached and pending_approach is not None:
+        # 在HTTP请求线程中等待，不占用检测循环和事件总线
+        pending_approach.join(timeout=greeting_prefetcher.wait_seconds)
+    if last_proximity_result is None:
+        return build_proximity_recommendation(camera_id)
+    if approached:
+        return last_proximity_result
+    return {**last_proximity_result, "deduplicated": True}
+
+def on_approach(event):
+    """
+    接近状态机确认一次新的接近（任意来源）时推送推荐给前端，优先使用运动时预取的结果
+    回调运行在检测循环或事件总线分发线程上，等待预取和同步生成都放到后台线程
+    """
+    global pending_approach
+    camera_id = event.get("camera_id")
+    
+    def deliver(payload):
+        global last_proximity_result
+        last_proximity_result = {**payload, "camera_id": camera_id}
+        notify_sse_clients('proximity', last_proximity_result)
+    
+    pending_approach = greeting_prefetcher.take_async(deliver)
+
+def build_greeting_payload():
+    """预取内容：问候语和推荐列表（可能调用大模型，在后台线程中执行）"""
+    result = build_proximity_recommendation()
+    result["recommendations"] = latest_recommendations.get("recommendations", [])
+    return result
+
+# 看到运动就在后台生成问候，人走近时直接使用；库存变化或超过有效期后重新生成
+greeting_prefetcher = GreetingPrefetcher(
+    build_greeting_payload,
+    version=lambda: fridge.inventory_version,
+    on_ready=lambda payload: notify_sse_clients('greeting_prefetch', payload)
+)
+
+fridge.add_motion_listener(lambda source: greeting_prefetcher.trigger(f"motion:{source}"))
+fridge.proximity.add_listener(on_approach)
+
+def build_proximity_recommendation(camera_id=None):
+    """生成个性化推荐"""
     try:
         # 记录人脸检测事件
-        logger.info("👤 检测到人脸接近 - 触发接近传感器事件")
+        logger.info("👤 检测到人脸接近 - 生成个性化推荐" + (f" (摄像头 {camera_id})" if camera_id else ""))
         
         # 获取当前时间和用户偏好
         current_time = datetime.now()
@@ -487,15 +665,15 @@ def proximity_sensor():
             "urgency_level": urgency_level
         }
         
-        return jsonify({
+        return {
             "success": True,
             "recommendation": recommendation,
             "time_context": time_context,
             "workday_context": workday_context
-        })
+        }
             
     except Exception as e:
-        return jsonify({"error": str(e)})
+        return {"error": str(e)}
 
 @app.route('/api/place-item', methods=['POST'])
 def place_item():
@@ -515,21 +693,29 @@ def place_item():
                 "error": "没有选择文件"
             })
         
-        # 保存上传的文件
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # 生成唯一文件名
-        import uuid
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        image_path = os.path.join(upload_dir, unique_filename)
+        # 流式接收上传文件：一次读取完成哈希、文件头校验和写盘
+        try:
+            upload = upload_store.ingest(
+                file.stream,
+                max_bytes=app.config['MAX_CONTENT_LENGTH']
+            )
+        except UploadTooLarge as e:
+            return jsonify({"success": False, "error": str(e)}), 413
+        except UploadError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
         
-        # 保存文件
-        file.save(image_path)
+        image_path = upload["path"]
+        if upload["deduplicated"]:
+            logger.info(f"📥 上传图片已存在，复用: {image_path}")
+        else:
+            logger.info(f"📥 接收上传图片: {image_path} ({upload['size']} 字节, {upload['mime_type']})")
         
-        # 调用冰箱Agent添加物品
-        result = fridge.add_item_to_fridge(image_path)
+        # 调用冰箱Agent添加物品，直接使用内存中的图片数据
+        result = fridge.add_item_to_fridge(
+            image_path,
+            image_data=upload["data"],
+            mime_type=upload["mime_type"]
+        )
         
         # 更新物理按钮状态
         global physical_button_status
@@ -538,14 +724,84 @@ def place_item():
         # 通知SSE客户端操作完成
         notify_sse_clients('action_completed', result)
         
-        # 调试：不清理临时文件，保留图片用于检查
-        logger.info(f"🔍 保留临时图片文件用于调试: {image_path}")
-        
         return jsonify(result)
         
+    except HTTPException:
+        # 请求体超过 MAX_CONTENT_LENGTH 时 request.files 抛出 RequestEntityTooLarge，交给 413 处理
+        raise
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.errorhandler(413)
+def request_entity_too_large(e):
+    """上传文件超过 MAX_CONTENT_LENGTH"""
+    max_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({
+        "success": False,
+        "error": f"文件超过大小上限 {max_mb}MB"
+    }), 413
+
+@app.route('/api/camera-health', methods=['GET', 'POST'])
+def camera_health_api():
+    """摄像头健康状态API - POST由多摄像头进程上报，GET查询"""
+    try:
+        if request.method == 'POST':
+            reports = request.get_json(silent=True) or {}
+            with camera_health_lock:
+                camera_health.clear()
+                camera_health.update(reports)
+            for camera_id, report in reports.items():
+                labels = {"camera": camera_id}
+                CAMERA_UP_GAUGE.set(1 if report.get("status") == "ok" else 0, labels)
+                CAMERA_RESTARTS_GAUGE.set(report.get("restarts", 0), labels)
+                CAMERA_FPS_GAUGE.set(report.get("fps", 0), labels)
+                CAMERA_DETECT_GAUGE.set(report.get("detect_ms", 0), labels)
+            return jsonify({"success": True})
+        
+        with camera_health_lock:
+            cameras = dict(camera_health)
+        return jsonify({"success": True, "cameras": cameras})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/button-stats', methods=['GET', 'POST'])
+def button_stats_api():
+    """按键事件队列统计API - POST由按键进程上报，GET查询"""
+    if request.method == 'POST':
+        stats = request.get_json(silent=True) or {}
+        button_stats.clear()
+        button_stats.update(stats)
+        BUTTON_QUEUE_GAUGE.set(stats.get("queue_depth", 0))
+        BUTTON_DROPPED_GAUGE.set(stats.get("dropped", 0))
+        BUTTON_DEBOUNCED_GAUGE.set(stats.get("debounced", 0))
+        BUTTON_LATENCY_GAUGE.set(stats.get("avg_queue_latency_ms", 0))
+        return jsonify({"success": True})
+    return jsonify({"success": True, "stats": dict(button_stats)})
+
+@app.route('/api/upload-store', methods=['GET'])
+def get_upload_store_stats():
+    """获取上传图片存储统计API"""
+    try:
+        return jsonify({
+            "success": True,
+            "stats": upload_store.get_stats()
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus指标"""
+    return Response(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metrics-summary')
+def metrics_summary():
+    """各路由和各阶段耗时的分位数摘要（JSON）"""
+    return jsonify({
+        "success": True,
+        "metrics": registry.snapshot()
+    })
+
 @app.route('/api/take-out', methods=['POST'])
 def take_out():
     """取出物品API"""
@@ -566,52 +822,89 @@ def take_out():
     except Exception as e:
         return jsonify({"error": str(e)})
 
-@app.route('/api/physical-button-status', methods=['GET'])
-def get_physical_button_status():
-    """获取物理按钮状态API"""
-    global physical_button_status
-    return jsonify({
+@app.route('/api/take-out-batch', methods=['POST'])
+def take_out_batch():
+    """批量取出物品API - 按规划顺序取物，返回规划与原顺序的移动时间"""
+    try:
+        data = request.get_json(silent=True) or {}
+        item_ids = data.get('item_ids') or []
+        
+        if not isinstance(item_ids, list) or not item_ids:
+            return jsonify({
+                "success": False,
+                "error": "缺少物品ID列表"
+            })
+        
+        result = fridge.get_items_from_fridge(item_ids)
+        physical_button_status["last_action_result"] = result
+        notify_sse_clients('action_completed', result)
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+@app.route('/api/motion-status')
+def motion_status():
+    """运动控制器连接状态API（ready/degraded/connecting/disabled）"""
+    return jsonify({"success": True, **fridge.get_motion_status()})
+
+def build_physical_button_status():
+    """构建物理按钮状态数据"""
+    return {
         "success": True,
         "last_button_time": physical_button_status["last_button_time"],
         "last_button_type": physical_button_status["last_button_type"],
         "last_action_result": physical_button_status["last_action_result"],
         "button_type": physical_button_status["last_button_type"],
         "action_result": physical_button_status["last_action_result"]
-    })
+    }
+
+@app.route('/api/physical-button-status', methods=['GET'])
+def get_physical_button_status():
+    """获取物理按钮状态API"""
+    return jsonify(build_physical_button_status())
 
 @app.route('/api/events')
 def sse():
     """Server-Sent Events端点"""
     def generate():
-        # 发送连接确认
-        yield f"data: {json.dumps({'type': 'connected', 'data': {'message': 'SSE连接已建立'}})}\n\n"
-        
-        # 将客户端添加到列表
-        sse_clients.append(request.environ['wsgi.input'].stream)
-        
+        client = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        with sse_clients_lock:
+            sse_clients.append(client)
         try:
+            # 发送连接确认
+            yield f"data: {json.dumps({'type': 'connected', 'data': {'message': 'SSE连接已建立'}})}\n\n"
             while True:
-                # 保持连接活跃
-                yield f"data: {json.dumps({'type': 'ping', 'data': {'timestamp': time.time()}})}\n\n"
-                time.sleep(30)  # 每30秒发送一次ping
-        except:
-            # 客户端断开连接
-            if request.environ['wsgi.input'].stream in sse_clients:
-                sse_clients.remove(request.environ['wsgi.input'].stream)
+                try:
+                    yield client.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # 保持连接活跃
+                    yield f"data: {json.dumps({'type': 'ping', 'data': {'timestamp': time.time()}})}\n\n"
+        finally:
+            # 客户端断开连接（写入失败时生成器被关闭）
+            with sse_clients_lock:
+                if client in sse_clients:
+                    sse_clients.remove(client)
     
-    return Response(generate(), mimetype='text/event-stream')
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/physical-button', methods=['POST'])
 def physical_button():
     """物理按键API - 处理物理按键触发"""
+    data = request.get_json(silent=True) or {}
+    return jsonify(handle_physical_button(data.get('button_type')))
+
+def handle_physical_button(button_type):
+    """处理物理按键（HTTP接口和事件总线共用）
+
+    Args:
+        button_type: 'place' 或 'take_out'
+    """
     global physical_button_status
     
     try:
-        data = request.get_json()
-        button_type = data.get('button_type')  # 'place' 或 'take_out'
-        
         # 更新物理按钮状态
-        import time
         physical_button_status["last_button_time"] = int(time.time() * 1000)
         physical_button_status["last_button_type"] = button_type
         
@@ -628,23 +921,23 @@ def physical_button():
             # 获取冰箱状态
             inventory_result = fridge.get_fridge_inventory()
             if not inventory_result["success"]:
-                return jsonify({
+                return {
                     "success": False,
                     "error": "获取冰箱状态失败"
-                })
+                }
             
             # 检查冰箱是否已满
             total_items = inventory_result["total_items"]
             max_capacity = 20  # 假设最大容量为20个物品
             
             if total_items >= max_capacity:
-                return jsonify({
+                return {
                     "success": False,
                     "message": "冰箱已满，请先清理一些物品",
                     "action": "place_item",
                     "current_items": total_items,
                     "max_capacity": max_capacity
-                })
+                }
             
             # 更新物理按钮状态
             physical_button_status["last_action_result"] = {
@@ -657,14 +950,14 @@ def physical_button():
             }
             
             # 返回放入物品的指导信息
-            return jsonify({
+            return {
                 "success": True,
                 "message": "请将要放入的物品放在摄像头前，系统将自动识别并存储",
                 "action": "place_item",
                 "current_items": total_items,
                 "max_capacity": max_capacity,
                 "available_space": max_capacity - total_items
-            })
+            }
             
         elif button_type == 'take_out':
             # 处理取出物品
@@ -673,10 +966,10 @@ def physical_button():
             # 获取冰箱状态
             inventory_result = fridge.get_fridge_inventory()
             if not inventory_result["success"]:
-                return jsonify({
+                return {
                     "success": False,
                     "error": "获取冰箱状态失败"
-                })
+                }
             
             # 查找即将过期的物品
             expiring_items = []
@@ -710,7 +1003,7 @@ def physical_button():
                 # 通知SSE客户端操作完成
                 notify_sse_clients('action_completed', action_result)
                 
-                return jsonify(action_result)
+                return action_result
             
             # 其次取出即将过期的物品
             elif expiring_items:
@@ -727,14 +1020,14 @@ def physical_button():
                     "result": result
                 }
                 
-                return jsonify({
+                return {
                     "success": True,
                     "message": f"已取出即将过期的物品：{item_to_take['name']}（剩余{item_to_take['days_remaining']}天）",
                     "action": "take_out_item",
                     "item": item_to_take,
                     "priority": "expiring_soon",
                     "result": result
-                })
+                }
             
             # 如果没有过期或即将过期的物品，取出最老的物品
             elif fresh_items:
@@ -753,14 +1046,14 @@ def physical_button():
                     "result": result
                 }
                 
-                return jsonify({
+                return {
                     "success": True,
                     "message": f"已取出物品：{item_to_take['name']}（剩余{item_to_take['days_remaining']}天）",
                     "action": "take_out_item",
                     "item": item_to_take,
                     "priority": "oldest",
                     "result": result
-                })
+                }
             
             else:
                 # 更新物理按钮状态
@@ -772,25 +1065,25 @@ def physical_button():
                     "priority": "empty"
                 }
                 
-                return jsonify({
+                return {
                     "success": True,
                     "message": "冰箱中没有物品需要取出",
                     "action": "take_out_item",
                     "item": None,
                     "priority": "empty"
-                })
+                }
         else:
-            return jsonify({
+            return {
                 "success": False,
                 "error": "无效的按键类型"
-            })
+            }
             
     except Exception as e:
         logger.error(f"物理按键处理失败: {str(e)}")
-        return jsonify({
+        return {
             "success": False,
             "error": str(e)
-        })
+        }
 
 @app.route('/api/user-preferences', methods=['GET', 'POST'])
 def user_preferences_api():
@@ -815,31 +1108,28 @@ def user_preferences_api():
         except Exception as e:
             return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/time-advice', methods=['GET'])
-def get_time_advice():
-    """获取基于大模型的时间建议"""
-    try:
-        current_time = datetime.now()
-        hour = current_time.hour
-        weekday = current_time.weekday()
-        is_workday = weekday < 5
-        
-        # 获取冰箱状态
-        fridge_status = fridge.get_fridge_status()
-        
-        # 构建时间建议提示词
-        time_context = ""
-        if 6 <= hour < 12:
-            time_context = "早上"
-        elif 12 <= hour < 18:
-            time_context = "下午"
-        else:
-            time_context = "晚上"
-        
-        workday_context = "工作日" if is_workday else "周末"
-        
-        # 构建大模型提示词
-        system_prompt = f"""你是一个智慧冰箱的AI助手。用户想要获取基于当前时间和冰箱内容的个性化时间建议。
+def get_time_context(current_time=None):
+    """获取时间段和工作日描述"""
+    current_time = current_time or datetime.now()
+    hour = current_time.hour
+    if 6 <= hour < 12:
+        time_context = "早上"
+    elif 12 <= hour < 18:
+        time_context = "下午"
+    else:
+        time_context = "晚上"
+    workday_context = "工作日" if current_time.weekday() < 5 else "周末"
+    return time_context, workday_context
+
+def build_time_advice():
+    """构建基于大模型的时间建议（失败时返回默认建议）"""
+    time_context, workday_context = get_time_context()
+    
+    # 获取冰箱状态
+    fridge_status = fridge.get_fridge_status()
+    
+    # 构建大模型提示词
+    system_prompt = f"""你是一个智慧冰箱的AI助手。用户想要获取基于当前时间和冰箱内容的个性化时间建议。
 
 当前时间：{time_context} ({workday_context})
 用户偏好：{json.dumps(user_preferences, ensure_ascii=False, indent=2)}
@@ -863,41 +1153,50 @@ def get_time_advice():
 
 请只返回JSON格式的结果，不要其他文字。"""
 
-        # 调用大模型获取时间建议
-        result = fridge.call_qwen_vl("some_food.jpg", system_prompt)
-        
-        if result["success"]:
-            try:
-                response_text = result["response"]
-                # 提取JSON部分
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = response_text[start_idx:end_idx]
-                    time_advice = json.loads(json_str)
-                    
-                    return jsonify({
-                        "success": True,
-                        "time_advice": time_advice,
-                        "time_context": time_context,
-                        "workday_context": workday_context
-                    })
-                else:
-                    # 如果大模型调用失败，使用默认建议
-                    return get_default_time_advice(time_context, workday_context)
-                    
-            except json.JSONDecodeError:
-                # 如果JSON解析失败，使用默认建议
-                return get_default_time_advice(time_context, workday_context)
-        else:
-            # 如果API调用失败，使用默认建议
-            return get_default_time_advice(time_context, workday_context)
-            
+    # 调用大模型获取时间建议
+    result = fridge.call_qwen_vl("some_food.jpg", system_prompt)
+    
+    if result["success"]:
+        try:
+            response_text = result["response"]
+            # 提取JSON部分
+            start_idx = response_text.find('{')
+            end_idx = response_text.rfind('}') + 1
+            if start_idx != -1 and end_idx != 0:
+                json_str = response_text[start_idx:end_idx]
+                time_advice = json.loads(json_str)
+                
+                return {
+                    "success": True,
+                    "time_advice": time_advice,
+                    "time_context": time_context,
+                    "workday_context": workday_context
+                }
+            else:
+                # 如果大模型调用失败，使用默认建议
+                return build_default_time_advice(time_context, workday_context)
+                
+        except json.JSONDecodeError:
+            # 如果JSON解析失败，使用默认建议
+            return build_default_time_advice(time_context, workday_context)
+    else:
+        # 如果API调用失败，使用默认建议
+        return build_default_time_advice(time_context, workday_context)
+
+@app.route('/api/time-advice', methods=['GET'])
+def get_time_advice():
+    """获取基于大模型的时间建议"""
+    try:
+        return jsonify(build_time_advice())
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
 def get_default_time_advice(time_context, workday_context):
     """获取默认时间建议"""
+    return jsonify(build_default_time_advice(time_context, workday_context))
+
+def build_default_time_advice(time_context, workday_context):
+    """构建默认时间建议数据"""
     if time_context == "早上":
         advice = {
             "greeting": "早上好！",
@@ -947,14 +1246,193 @@ def get_default_time_advice(time_context, workday_context):
             "urgency_level": "high"
         }
     
-    return jsonify({
+    return {
         "success": True,
         "time_advice": advice,
         "time_context": time_context,
         "workday_context": workday_context
-    })
+    }
+
+# 仪表盘快照：按库存版本、时间段和用户偏好缓存计算量大的部分
+DASHBOARD_SNAPSHOT_FIELDS = {
+    "fridge_status": build_fridge_status,
+    "recommendations": lambda: dict(build_recommendations(force=True)),
+    "time_advice": build_time_advice
+}
+
+# 每次请求实时获取的轻量字段
+DASHBOARD_LIVE_FIELDS = {
+    "user_preferences": lambda: {"success": True, "preferences": dict(user_preferences)},
+    "physical_button_status": build_physical_button_status
+}
+
+dashboard_snapshot = {
+    "key": None,
+    "fields": {},
+    # 正在计算的字段: {"done": Event, "value", "error"}，同一字段的并发请求等待同一次计算
+    "pending": {},
+    "created_at": None
+}
+# 只保护快照字典本身，字段在锁外计算
+dashboard_lock = threading.Lock()
+
+def get_dashboard_snapshot_key():
+    """快照缓存键：库存变化、跨天、时间段变化或偏好变化时重新计算"""
+    time_context, workday_context = get_time_context()
+    return (
+        fridge.inventory_version,
+        datetime.now().date().isoformat(),
+        time_context,
+        workday_context,
+        json.dumps(user_preferences, sort_keys=True)
+    )
+
+def build_dashboard(fields):
+    """构建仪表盘数据，同一快照内每个字段只计算一次"""
+    result = {}
+    
+    snapshot_fields = [f for f in fields if f in DASHBOARD_SNAPSHOT_FIELDS]
+    if snapshot_fields:
+        owned, waiting = {}, {}
+        with dashboard_lock:
+            key = get_dashboard_snapshot_key()
+            if dashboard_snapshot["key"] != key:
+                dashboard_snapshot["key"] = key
+                dashboard_snapshot["fields"] = {}
+                dashboard_snapshot["pending"] = {}
+                dashboard_snapshot["created_at"] = datetime.now()
+            created_at = dashboard_snapshot["created_at"]
+            
+            for field in snapshot_fields:
+                if field in dashboard_snapshot["fields"]:
+                    result[field] = dashboard_snapshot["fields"][field]
+                elif field in dashboard_snapshot["pending"]:
+                    waiting[field] = dashboard_snapshot["pending"][field]
+                else:
+                    build = {"done": threading.Event(), "value": None, "error": None}
+                    dashboard_snapshot["pending"][field] = build
+                    owned[field] = build
+        
+        # 锁外计算：时间建议（调用大模型）和推荐较慢，只阻塞需要同一字段的请求
+        # 先完成自己负责的字段再等待其他请求的字段，互相等待时不会死锁
+        for field, build in owned.items():
+            try:
+                build["value"] = DASHBOARD_SNAPSHOT_FIELDS[field]()
+            except Exception as e:
+                build["error"] = str(e)
+            with dashboard_lock:
+                if dashboard_snapshot["pending"].get(field) is build:
+                    del dashboard_snapshot["pending"][field]
+                    # 失败的字段不缓存，下次请求重试；快照已失效时也不写入
+                    if build["error"] is None:
+                        dashboard_snapshot["fields"][field] = build["value"]
+            build["done"].set()
+        
+        for field, build in waiting.items():
+            build["done"].wait()
+        
+        for field, build in {**owned, **waiting}.items():
+            if build["error"] is None:
+                result[field] = build["value"]
+            else:
+                result[field] = {"success": False, "error": build["error"]}
+        
+        result["inventory_version"] = key[0]
+        result["snapshot_time"] = created_at
+    
+    for field in fields:
+        if field in DASHBOARD_LIVE_FIELDS:
+            result[field] = DASHBOARD_LIVE_FIELDS[field]()
+    
+    return result
+
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """仪表盘聚合API
+    
+    一次返回冰箱状态、推荐、时间建议、用户偏好和物理按钮状态。
+    可通过 ?fields=fridge_status,recommendations 只获取部分字段。
+    """
+    try:
+        all_fields = list(DASHBOARD_SNAPSHOT_FIELDS) + list(DASHBOARD_LIVE_FIELDS)
+        fields_param = request.args.get('fields')
+        if fields_param:
+            fields = [f.strip() for f in fields_param.split(',') if f.strip()]
+            unknown = [f for f in fields if f not in all_fields]
+            if unknown:
+                return jsonify({
+                    "success": False,
+                    "error": f"未知字段: {', '.join(unknown)}",
+                    "available_fields": all_fields
+                }), 400
+        else:
+            fields = all_fields
+        
+        dashboard = build_dashboard(fields)
+        dashboard["success"] = True
+        
+        response = jsonify(dashboard)
+        response.add_etag()
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+# 本机事件总线：传感器进程通过Unix域套接字投递事件，HTTP接口保留作为回退
+event_bus = EventBusServer()
+
+# 事件总线上的按键交给单独的工作线程按顺序处理：取出物品要等运动平台升降/旋转/取物完成（数秒），
+# 不能占用事件总线的分发线程，否则接近、拍照等事件排在后面甚至被当成慢订阅者丢弃
+bus_button_events = queue.Queue()
+
+def bus_button_worker():
+    while True:
+        event = bus_button_events.get()
+        try:
+            result = handle_physical_button(event["data"].get("button_type"))
+            logger.info(f"📡 按键事件 ({event.get('source')}): {result.get('message') or result.get('error')}")
+        except Exception as e:
+            logger.error(f"处理按键事件失败: {e}")
+
+def on_bus_button_pressed(event):
+    bus_button_events.put(event)
+
+def on_bus_capture_ready(event):
+    logger.info(f"📸 放入物品拍照完成 ({event.get('source')})，等待上传识别")
+    notify_sse_clients('capture_ready', event["data"])
+
+def start_event_bus():
+    """启动事件总线并订阅传感器事件"""
+    if not bus_enabled(event_bus.path):
+        logger.info("事件总线已禁用，传感器事件通过HTTP接收")
+        return
+    threading.Thread(target=bus_button_worker, name="bus-button-worker", daemon=True).start()
+    event_bus.subscribe("button_pressed", on_bus_button_pressed)
+    event_bus.subscribe("capture_ready", on_bus_capture_ready)
+    # 接近事件交给Agent的接近状态机，与本进程的检测一起去重
+    fridge.attach_event_bus(event_bus)
+    try:
+        event_bus.start()
+    except OSError as e:
+        logger.warning(f"事件总线启动失败，传感器事件通过HTTP接收: {e}")
+
+registry.gauge("fridge_event_bus_queue_depth", "Events waiting to be dispatched on the local event bus",
+               callback=lambda: event_bus.get_stats()["queue_depth"])
+registry.counter("fridge_event_bus_events_received_total", "Events received on the local event bus",
+                 callback=lambda: event_bus.get_stats()["received"])
+registry.counter("fridge_event_bus_events_dropped_total", "Events dropped for slow event bus subscribers",
+                 callback=lambda: event_bus.get_stats()["dropped"])
+registry.gauge("fridge_event_bus_latency_milliseconds", "Mean publish-to-dispatch latency on the local event bus",
+               callback=lambda: event_bus.get_stats()["avg_latency_ms"])
+
+@app.route('/api/event-bus')
+def event_bus_stats():
+    """事件总线统计API"""
+    return jsonify({"success": True, "running": event_bus.running, "stats": event_bus.get_stats()})
 
 if __name__ == '__main__':
     # 创建templates目录
     os.makedirs('templates', exist_ok=True)
+    # debug模式下重载器父进程不处理请求，只在实际服务的子进程中启动事件总线
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_event_bus()
     app.run(debug=True, host='0.0.0.0', port=8080) 
\ No newline at end of file
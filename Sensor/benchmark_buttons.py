@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按键流程吞吐量测试（无需树莓派）
+用模拟GPIO后端按脚本高速按键，走完整的按键 -> 队列 -> 拍照 -> 上传流程，
+统计从按下到放入/取出请求成功完成的吞吐量和延迟，失败的操作单独统计
+
+默认启动一个本地模拟Web服务器（--server-delay-ms 模拟识别耗时）；
+也可用 --web-server 指向真实的Web服务器（放入物品会调用视觉模型）
+
+用法:
+    python benchmark_buttons.py --presses 200 --rate 50 --workers 2 --server-delay-ms 100
+    python benchmark_buttons.py --script presses.txt --source clips/shelf/ --json buttons.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockWebServer:
+    """模拟Web服务器：对所有POST请求在固定延迟后返回成功"""
+
+    def __init__(self, delay_ms):
+        self.requests = {}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                time.sleep(delay_ms / 1000.0)
+                with server.lock:
+                    server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                body = json.dumps({"success": True, "message": "ok"}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+def make_test_source():
+    """没有指定拍照来源时生成一张测试图片（配合 loop_camera 循环重放）"""
+    import cv2
+    import numpy as np
+
+    directory = tempfile.mkdtemp(prefix="fridge_buttons_")
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    cv2.imwrite(os.path.join(directory, "frame_000.jpg"), frame)
+    return directory
+
+
+def loop_camera(camera, source):
+    """
+    拍照来源改为循环重放：采集线程只保留最近 max_frame_age 秒内的帧，
+    图片目录或短录像放完后拍照会失败，测到的是来源耗尽而不是按键流程
+    """
+    from frame_source import open_frame_source
+
+    camera.stop_capture()
+    camera.cap.release()
+    camera.cap = open_frame_source(source, realtime=True, loop=True)
+    camera.start_capture()
+
+
+def wait_for_completion(detector, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = detector.get_stats()
+        settled = (stats["dropped"] + stats["debounced"] + stats["processed"] + stats["dispatched"]
+                   + stats["failed"])
+        if settled >= stats["received"] and stats["queue_depth"] == 0:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按键流程吞吐量测试")
+    parser.add_argument("--presses", type=int, default=200, help="按键次数")
+    parser.add_argument("--rate", type=float, default=50, help="每秒按键次数")
+    parser.add_argument("--pins", default="16,17", help="轮流按下的引脚（16放入，17取出）")
+    parser.add_argument("--script", help="按键脚本文件，覆盖 --presses/--rate/--pins")
+    parser.add_argument("--speed", type=float, default=1.0, help="脚本重放倍速")
+    parser.add_argument("--source", help="拍照来源（视频文件/图片目录），默认生成测试图片")
+    parser.add_argument("--web-server", help="真实Web服务器地址，默认使用模拟服务器")
+    parser.add_argument("--server-delay-ms", type=float, default=50, help="模拟服务器的处理耗时（毫秒）")
+    parser.add_argument("--workers", type=int, default=2, help="按键处理线程数")
+    parser.add_argument("--queue-size", type=int, default=16, help="按键事件队列上限")
+    parser.add_argument("--cooldown", type=float, default=0.0, help="每个按键的防抖时间（秒）")
+    parser.add_argument("--bouncetime", type=int, default=0, help="GPIO硬件防抖时间（毫秒）")
+    parser.add_argument("--event-bus", action="store_true", help="取出物品经事件总线发送（默认只走HTTP）")
+    parser.add_argument("--json", help="结果写入JSON文件")
+    args = parser.parse_args()
+
+    # 事件总线路径在导入时读取，须在导入按键模块前设置
+    if not args.event_bus:
+        os.environ["FRIDGE_EVENT_BUS"] = "off"
+    os.environ["FRIDGE_BUTTON_QUEUE_SIZE"] = str(args.queue_size)
+    os.environ["FRIDGE_BUTTON_WORKERS"] = str(args.workers)
+    from button import ButtonDetector
+    from gpio_backend import SimulatedGPIOBackend, generate_press_script, load_press_script
+
+    mock = None
+    web_server = args.web_server
+    if not web_server:
+        mock = MockWebServer(args.server_delay_ms)
+        web_server = mock.url
+
+    if args.script:
+        script = load_press_script(args.script)
+    else:
+        pins = [int(pin) for pin in args.pins.split(",")]
+        script = generate_press_script(pins, args.presses, args.rate)
+
+    gpio = SimulatedGPIOBackend()
+    source = args.source or make_test_source()
+    detector = ButtonDetector(web_server, gpio=gpio, camera_source=source, bouncetime=args.bouncetime)
+    if detector.camera is None:
+        print("❌ 拍照来源无法打开")
+        sys.exit(1)
+    loop_camera(detector.camera, source)
+    detector.button_cooldown = args.cooldown
+    detector.start_workers()
+
+    start = time.perf_counter()
+    gpio.play(script, speed=args.speed)
+    completed = wait_for_completion(detector, timeout=300)
+    elapsed = time.perf_counter() - start
+    detector.stop_workers()
+
+    stats = detector.get_stats()
+    result = {
+        "presses": len(script),
+        "gpio_suppressed": gpio.suppressed,
+        "completed": completed,
+        "seconds": elapsed,
+        "succeeded": stats["processed"],
+        # 经事件总线交出的取出物品，结果未知，不计入吞吐量
+        "dispatched": stats["dispatched"],
+        "failed": stats["failed"],
+        # 只按成功完成的操作计算吞吐量，失败（服务器不可达、识别失败等）单独报告
+        "operations_per_minute": 60 * stats["processed"] / elapsed if elapsed else 0.0,
+        "failures_per_minute": 60 * stats["failed"] / elapsed if elapsed else 0.0,
+        "stats": stats
+    }
+    if mock is not None:
+        result["server_requests"] = dict(mock.requests)
+
+    print(f"🔘 按键 {result['presses']} 次, GPIO防抖忽略 {gpio.suppressed}, 队列丢弃 {stats['dropped']}, "
+          f"软件防抖忽略 {stats['debounced']}, 成功 {stats['processed']}, "
+          f"事件总线已发送 {stats['dispatched']}, 失败 {stats['failed']}")
+    print(f"⏱️  耗时 {elapsed:.2f}s, 吞吐量（仅成功） {result['operations_per_minute']:.0f} 次/分钟, "
+          f"按下到完成 平均 {stats.get('avg_latency_ms', 0):.1f}ms p95 {stats.get('p95_latency_ms', 0):.1f}ms, "
+          f"排队 平均 {stats['avg_queue_latency_ms']:.1f}ms 最大 {stats['max_queue_latency_ms']:.1f}ms")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} 次操作失败（{result['failures_per_minute']:.0f} 次/分钟），未计入吞吐量")
+    if not completed:
+        print("⚠️  超时：仍有按键事件未处理完")
+
+    detector.cleanup()
+    if mock is not None:
+        mock.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    # 模拟服务器总是成功，此时的失败说明测试环境本身有问题（如拍照来源），吞吐量不可信
+    if mock is not None and stats["failed"]:
+        print("❌ 模拟服务器下仍有操作失败，测试结果无效")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
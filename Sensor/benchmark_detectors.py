@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人脸检测后端对比
+在录制的视频片段（或图片目录）上逐帧运行各检测后端，比较延迟和准确率
+
+用法:
+    python benchmark_detectors.py clips/kitchen.mp4 clips/night/ \\
+        --backends haar-full,haar,yunet,ssd --labels clips/labels.json --threads 2
+
+标注文件格式（可选，用于计算准确率）:
+    {"kitchen.mp4": {"0": [[x, y, w, h], ...], "15": []}, ...}
+只有标注过的帧参与准确率计算，[] 表示该帧没有人脸
+"""
+
+import argparse
+import json
+import os
+import time
+
+from face_detectors import create_face_detector
+from frame_source import open_frame_source
+
+# IoU超过该值视为检测正确
+IOU_THRESHOLD = 0.5
+
+
+def iter_clip_frames(path, max_frames=None):
+    """以最快速度逐帧读取视频文件或图片目录"""
+    source = open_frame_source(path, realtime=False)
+    count = 0
+    try:
+        while max_frames is None or count < max_frames:
+            ret, frame = source.read()
+            if not ret:
+                return
+            yield frame
+            count += 1
+    finally:
+        source.release()
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / float(union) if union else 0.0
+
+
+def match_boxes(predicted, expected):
+    """贪心匹配，返回 (TP, FP, FN)"""
+    unmatched = list(expected)
+    tp = 0
+    for box in sorted(predicted, key=lambda b: b[2] * b[3], reverse=True):
+        best = max(unmatched, key=lambda e: iou(box, e), default=None)
+        if best is not None and iou(box, best) >= IOU_THRESHOLD:
+            unmatched.remove(best)
+            tp += 1
+    return tp, len(predicted) - tp, len(unmatched)
+
+
+def build_detector(spec, args):
+    """spec: haar / haar-full / yunet / ssd"""
+    backend, _, mode = spec.partition("-")
+    return create_face_detector(
+        backend=backend,
+        mode=mode or "fast",
+        detection_distance=args.distance,
+        input_width=args.input_width,
+        threads=args.threads
+    )
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def benchmark(spec, detector, clips, labels, max_frames):
+    latencies = []
+    frames_with_faces = 0
+    tp = fp = fn = 0
+
+    for clip in clips:
+        clip_labels = labels.get(os.path.basename(os.path.normpath(clip)), {})
+        for index, frame in enumerate(iter_clip_frames(clip, max_frames)):
+            start = time.perf_counter()
+            boxes = detector.detect(frame)
+            latencies.append(time.perf_counter() - start)
+            if boxes:
+                frames_with_faces += 1
+
+            expected = clip_labels.get(str(index))
+            if expected is not None:
+                t, p, n = match_boxes(boxes, [tuple(box) for box in expected])
+                tp, fp, fn = tp + t, fp + p, fn + n
+
+    result = {
+        "backend": spec,
+        "actual_backend": detector.name,
+        "frames": len(latencies),
+        "frames_with_faces": frames_with_faces,
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": 1000 * percentile(latencies, 0.5),
+            "p95": 1000 * percentile(latencies, 0.95)
+        }
+    }
+    if tp + fp + fn:
+        result["precision"] = tp / float(tp + fp) if tp + fp else 0.0
+        result["recall"] = tp / float(tp + fn) if tp + fn else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="人脸检测后端对比")
+    parser.add_argument("clips", nargs="+", help="视频文件或图片目录")
+    parser.add_argument("--backends", default="haar-full,haar,yunet,ssd",
+                        help="逗号分隔的后端列表: haar-full, haar, yunet, ssd")
+    parser.add_argument("--labels", help="人脸框标注JSON")
+    parser.add_argument("--input-width", type=int, default=320, help="检测输入宽度")
+    parser.add_argument("--threads", type=int, default=None, help="DNN推理线程数")
+    parser.add_argument("--distance", type=float, default=50, help="触发距离（厘米），决定最小人脸尺寸")
+    parser.add_argument("--max-frames", type=int, default=None, help="每个片段最多处理的帧数")
+    parser.add_argument("--json", help="结果写入JSON文件")
+    args = parser.parse_args()
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    results = []
+    for spec in args.backends.split(","):
+        spec = spec.strip()
+        detector = build_detector(spec, args)
+        if detector.name != spec:
+            print(f"⚠️  {spec} 不可用，实际使用 {detector.name}")
+        result = benchmark(spec, detector, args.clips, labels, args.max_frames)
+        results.append(result)
+
+        latency = result["latency_ms"]
+        line = (f"{spec:10s} 帧数 {result['frames']:5d}  有人脸 {result['frames_with_faces']:5d}  "
+                f"平均 {latency['mean']:7.2f}ms  p50 {latency['p50']:7.2f}ms  p95 {latency['p95']:7.2f}ms")
+        if "precision" in result:
+            line += f"  精确率 {result['precision']:.3f}  召回率 {result['recall']:.3f}"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件总线投递延迟测试
+发布方运行在独立进程中，测量从 publish() 到服务端分发线程回调（以及订阅进程收到）的延迟，
+并用慢速处理函数验证背压：队列满时发布方超时返回 False，已接受的事件不丢失
+
+用法:
+    python benchmark_event_bus.py --events 5000 --interval 0.001 --json bus.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from event_bus import EventBusClient, EventBusServer, EventBusSubscriber
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "mean": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50": 1000 * percentile(latencies, 0.5),
+        "p99": 1000 * percentile(latencies, 0.99),
+        "max": 1000 * max(latencies) if latencies else 0.0
+    }
+
+
+def publish_worker(path, count, interval, send_timeout, results):
+    """发布进程：按固定间隔发布按键事件"""
+    client = EventBusClient(path, source="benchmark", send_timeout=send_timeout, reconnect_interval=0.05)
+    start = time.perf_counter()
+    for index in range(count):
+        client.publish("button_pressed", button_type="take_out", index=index)
+        if interval:
+            time.sleep(interval)
+    results.put({"seconds": time.perf_counter() - start, **client.get_stats()})
+    client.close()
+
+
+def run_publisher(path, count, interval, send_timeout=0.5):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=publish_worker, args=(path, count, interval, send_timeout, results))
+    process.start()
+    stats = results.get()
+    process.join()
+    return stats
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def benchmark_delivery(path, count, interval):
+    """进程内回调和订阅进程两条路径的投递延迟"""
+    server = EventBusServer(path)
+    local, remote = [], []
+    server.subscribe("button_pressed", lambda event: local.append(time.time() - event["ts"]))
+    server.start()
+    subscriber = EventBusSubscriber(lambda event: remote.append(time.time() - event["ts"]),
+                                    types=["button_pressed"], path=path)
+    subscriber.start()
+    wait_until(lambda: server.get_stats()["subscribers"] == 1, 5)
+
+    publisher = run_publisher(path, count, interval)
+    wait_until(lambda: len(remote) >= publisher["published"], 5)
+    subscriber.stop()
+    server.stop()
+    return {
+        "published": publisher["published"],
+        "failed": publisher["failed"],
+        "events_per_second": publisher["published"] / publisher["seconds"] if publisher["seconds"] else 0.0,
+        "dispatch_latency_ms": summarize(local),
+        "subscriber_latency_ms": summarize(remote)
+    }
+
+
+def benchmark_backpressure(path, count, handler_ms, queue_size, send_timeout):
+    """处理函数慢于发布速度时：发布方被阻塞（降到处理速度）或超时被拒绝，已接受的事件全部处理"""
+    server = EventBusServer(path, queue_size=queue_size)
+    handled = []
+
+    def slow_handler(event):
+        time.sleep(handler_ms / 1000.0)
+        handled.append(event["data"]["index"])
+
+    server.subscribe("button_pressed", slow_handler)
+    server.start()
+    publisher = run_publisher(path, count, 0, send_timeout)
+    wait_until(lambda: len(handled) >= server.get_stats()["received"], 30)
+    stats = server.get_stats()
+    server.stop()
+    return {
+        "published": publisher["published"],
+        "rejected": publisher["failed"],
+        "publisher_events_per_second": count / publisher["seconds"] if publisher["seconds"] else 0.0,
+        "received": stats["received"],
+        "handled": len(handled),
+        "lost": stats["received"] - len(handled)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件总线投递延迟测试")
+    parser.add_argument("--events", type=int, default=2000, help="发布的事件数")
+    parser.add_argument("--interval", type=float, default=0.001, help="发布间隔（秒），0为尽快发布")
+    parser.add_argument("--pressure-events", type=int, default=300, help="背压测试发布的事件数")
+    parser.add_argument("--handler-ms", type=float, default=20.0, help="背压测试中处理函数耗时（毫秒）")
+    parser.add_argument("--queue-size", type=int, default=16, help="背压测试的事件队列上限")
+    parser.add_argument("--send-timeout", type=float, default=0.01, help="背压测试的发送超时（秒）")
+    parser.add_argument("--json", help="结果写入JSON文件")
+    args = parser.parse_args()
+
+    path = f"/tmp/fridge_events_bench_{os.getpid()}.sock"
+    results = {
+        "delivery": benchmark_delivery(path, args.events, args.interval),
+        "backpressure": benchmark_backpressure(path, args.pressure_events, args.handler_ms,
+                                               args.queue_size, args.send_timeout)
+    }
+
+    delivery = results["delivery"]
+    print(f"📡 投递: 发布 {delivery['published']} 条, 失败 {delivery['failed']} 条, "
+          f"{delivery['events_per_second']:.0f} 条/秒")
+    for key, name in (("dispatch_latency_ms", "进程内回调"), ("subscriber_latency_ms", "订阅进程")):
+        latency = delivery[key]
+        print(f"   {name:6s} 平均 {latency['mean']:.3f}ms  p50 {latency['p50']:.3f}ms  "
+              f"p99 {latency['p99']:.3f}ms  最大 {latency['max']:.3f}ms")
+    pressure = results["backpressure"]
+    print(f"🧱 背压: 发布 {pressure['published']} 条, 被拒绝 {pressure['rejected']} 条（回退HTTP）, "
+          f"发布速度 {pressure['publisher_events_per_second']:.0f} 条/秒, 已接受 {pressure['received']} 条, 处理 {pressure['handled']} 条, 丢失 {pressure['lost']} 条")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,22 @@
 # -*- coding: utf-8 -*-
 
 import time
-import RPi.GPIO as GPIO
+import queue
+import threading
 import logging
 import requests
 import json
 import os
 import sys
-import cv2
+from collections import deque
 
 # 添加当前目录到Python路径，以便导入internal_camera
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from internal_camera import FaceDetector
+from multi_camera import camera_for_role
+from http_client import get_client
+from event_bus import get_publisher
+from gpio_backend import create_gpio_backend
 
 # 配置日志
 logging.basicConfig(
@@ -21,121 +26,221 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 按键处理结果（同时是统计字段名）
+RESULT_PROCESSED = "processed"    # 已确认完成
+RESULT_DISPATCHED = "dispatched"  # 已交给事件总线，结果未知
+RESULT_FAILED = "failed"
+
 class ButtonDetector:
-    def __init__(self, web_server_url="http://localhost:8080"):
-        # 设置GPIO模式为BCM
-        GPIO.setmode(GPIO.BCM)
+    def __init__(self, web_server_url="http://localhost:8080", gpio=None, camera_source=None, bouncetime=200):
+        """
+        Args:
+            web_server_url: Web服务器地址
+            gpio: GPIO后端，默认按 FRIDGE_GPIO_BACKEND 创建（树莓派以外使用模拟后端）
+            camera_source: 拍照摄像头来源，默认使用承担placement角色的摄像头
+            bouncetime: GPIO硬件防抖时间（毫秒）
+        """
+        # GPIO后端（BCM编号）
+        self.gpio = gpio or create_gpio_backend()
         
         # 定义GPIO引脚
         self.GPIO_16 = 16 # 绿色按键 - 放入物品
         self.GPIO_17 = 17 # 红色按键 - 取出物品
         
-        # Web服务器URL
+        # Web服务器URL（复用持久连接，按键响应不包含建立连接的时间）
         self.web_server_url = web_server_url
+        self.http = get_client(web_server_url)
+        # 本机事件总线：按键事件直接投递给Web服务器进程，不可用时回退到HTTP
+        self.bus = get_publisher("button")
+        
+        # 按键 -> (名称, 处理函数)
+        self.actions = {
+            self.GPIO_16: ("place", self._trigger_place_item),
+            self.GPIO_17: ("take_out", self._trigger_take_out_item)
+        }
         
-        # 防抖变量
-        self.last_button_time = 0
+        # 防抖：每个按键独立计时，按一个键不影响另一个键
         self.button_cooldown = 0.5  # 0.5秒冷却时间
+        self.last_button_time = {pin: 0.0 for pin in self.actions}
+        # 同一个按键的操作依次执行，不同按键可以并行
+        self.button_locks = {pin: threading.Lock() for pin in self.actions}
+        self._state_lock = threading.Lock()
+        
+        # GPIO回调只把带时间戳的事件放入队列，拍照和上传由工作线程完成，不阻塞后续边沿
+        self.events = queue.Queue(maxsize=int(os.getenv("FRIDGE_BUTTON_QUEUE_SIZE", "16")))
+        self.worker_count = int(os.getenv("FRIDGE_BUTTON_WORKERS", "2"))
+        self.workers = []
+        self.running = False
+        self.stats_interval = 10  # 每10秒上报一次统计
+        
+        # 统计信息
+        self.stats = {"received": 0, "dropped": 0, "debounced": 0, RESULT_PROCESSED: 0, RESULT_DISPATCHED: 0,
+                      RESULT_FAILED: 0, "max_queue_latency": 0.0, "queue_latency_total": 0.0}
+        # 最近的按下到处理完成耗时（秒，只统计已确认完成的操作）
+        self.latencies = deque(maxlen=1000)
         
-        # 初始化摄像头
+        # 初始化拍照摄像头（多摄像头时使用承担placement角色的摄像头，如内部货架摄像头）
+        if camera_source is None:
+            placement_camera = camera_for_role("placement")
+            camera_source = placement_camera["source"] if placement_camera else 0
         try:
-            self.camera = FaceDetector(camera_index=0)
+            self.camera = FaceDetector(camera_index=camera_source)
             logger.info("摄像头初始化成功")
         except Exception as e:
             logger.error(f"摄像头初始化失败: {e}")
             self.camera = None
         
         # 设置GPIO为输入，启用内部下拉电阻
-        GPIO.setup(self.GPIO_16, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
-        GPIO.setup(self.GPIO_17, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+        self.gpio.setup_input(self.GPIO_16)
+        self.gpio.setup_input(self.GPIO_17)
         
         # 设置事件检测，减少防抖时间
-        GPIO.add_event_detect(self.GPIO_16, GPIO.RISING, callback=self._button16_callback, bouncetime=200)
-        GPIO.add_event_detect(self.GPIO_17, GPIO.RISING, callback=self._button17_callback, bouncetime=200)
+        self.gpio.add_edge_callback(self.GPIO_16, self._button16_callback, bouncetime=bouncetime)
+        self.gpio.add_edge_callback(self.GPIO_17, self._button17_callback, bouncetime=bouncetime)
         
-        logger.info("GPIO初始化完成")
+        logger.info(f"GPIO初始化完成（{self.gpio.name}）")
         logger.info(f"按键16 (GPIO{self.GPIO_16}): 放入物品（拍照识别）")
         logger.info(f"按键17 (GPIO{self.GPIO_17}): 取出物品")
         logger.info(f"Web服务器地址: {self.web_server_url}")
 
     def _button16_callback(self, channel):
         """GPIO16按键回调函数 - 放入物品"""
-        current_time = time.time()
-        
-        # 防抖检查
-        if current_time - self.last_button_time < self.button_cooldown:
-            logger.warning(f"按键16被忽略 - 冷却时间未到 (剩余{self.button_cooldown - (current_time - self.last_button_time):.1f}秒)")
-            return
-        
-        self.last_button_time = current_time
-        logger.info("按键16被按下 - 触发放入物品功能")
-        self._trigger_place_item()
+        self._enqueue(self.GPIO_16)
 
     def _button17_callback(self, channel):
         """GPIO17按键回调函数 - 取出物品"""
-        current_time = time.time()
-        
-        # 防抖检查
-        if current_time - self.last_button_time < self.button_cooldown:
-            logger.warning(f"按键17被忽略 - 冷却时间未到 (剩余{self.button_cooldown - (current_time - self.last_button_time):.1f}秒)")
+        self._enqueue(self.GPIO_17)
+
+    def _enqueue(self, pin):
+        """在GPIO回调线程中调用：只记录时间戳并入队，不做任何I/O"""
+        with self._state_lock:
+            self.stats["received"] += 1
+        try:
+            self.events.put_nowait((pin, time.time()))
+        except queue.Full:
+            with self._state_lock:
+                self.stats["dropped"] += 1
+            logger.warning(f"⚠️ 按键事件队列已满，丢弃按键{pin}")
+
+    def start_workers(self):
+        """启动按键事件处理线程"""
+        self.running = True
+        for index in range(self.worker_count):
+            worker = threading.Thread(target=self._worker_loop, name=f"button-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop_workers(self, timeout=5.0):
+        self.running = False
+        for worker in self.workers:
+            worker.join(timeout=timeout)
+        self.workers = []
+
+    def _worker_loop(self):
+        while self.running:
+            try:
+                pin, pressed_at = self.events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._handle_event(pin, pressed_at)
+            finally:
+                self.events.task_done()
+
+    def _debounce(self, pin, pressed_at) -> bool:
+        """按按下时刻（而不是处理时刻）判断冷却时间，返回是否接受该事件"""
+        with self._state_lock:
+            elapsed = pressed_at - self.last_button_time[pin]
+            if elapsed < self.button_cooldown:
+                self.stats["debounced"] += 1
+                logger.warning(f"按键{pin}被忽略 - 冷却时间未到 (剩余{self.button_cooldown - elapsed:.1f}秒)")
+                return False
+            self.last_button_time[pin] = pressed_at
+            return True
+
+    def _handle_event(self, pin, pressed_at):
+        name, action = self.actions[pin]
+        if not self._debounce(pin, pressed_at):
             return
         
-        self.last_button_time = current_time
-        logger.info("按键17被按下 - 触发取出物品功能")
-        self._trigger_take_out_item()
+        queue_latency = time.time() - pressed_at
+        with self._state_lock:
+            self.stats["queue_latency_total"] += queue_latency
+            self.stats["max_queue_latency"] = max(self.stats["max_queue_latency"], queue_latency)
+        logger.info(f"按键{pin}被按下 - 触发{name}功能 (排队 {queue_latency * 1000:.1f}ms)")
+        
+        with self.button_locks[pin]:
+            try:
+                result = action()
+            except Exception as e:
+                logger.error(f"按键{pin}处理失败: {e}")
+                result = RESULT_FAILED
+            with self._state_lock:
+                self.stats[result] += 1
+                if result == RESULT_PROCESSED:
+                    self.latencies.append(time.time() - pressed_at)
+
+    def get_stats(self) -> dict:
+        """按键事件队列统计"""
+        with self._state_lock:
+            stats = dict(self.stats)
+            latencies = sorted(self.latencies)
+        handled = stats[RESULT_PROCESSED] + stats[RESULT_DISPATCHED] + stats[RESULT_FAILED]
+        stats["queue_depth"] = self.events.qsize()
+        stats["queue_size"] = self.events.maxsize
+        stats["workers"] = self.worker_count
+        stats["avg_queue_latency_ms"] = 1000 * stats.pop("queue_latency_total") / handled if handled else 0.0
+        stats["max_queue_latency_ms"] = 1000 * stats.pop("max_queue_latency")
+        if latencies:
+            stats["avg_latency_ms"] = 1000 * sum(latencies) / len(latencies)
+            stats["p95_latency_ms"] = 1000 * latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        return stats
+
+    def report_stats(self):
+        """把队列统计上报给Web服务器（/metrics 中的按键指标）"""
+        try:
+            self.http.post("/api/button-stats", json=self.get_stats(), timeout=2)
+        except requests.exceptions.RequestException:
+            pass
 
     def _trigger_place_item(self):
-        """触发放入物品功能 - 拍照并识别"""
+        """触发放入物品功能 - 拍照并识别，返回处理结果（RESULT_*）"""
         try:
             # 检查摄像头是否可用
             if self.camera is None:
                 logger.error("摄像头不可用，无法拍照")
-                return
+                return RESULT_FAILED
+            
+            # 界面立即显示按键反馈，不等待拍照和上传
+            self.bus.publish("button_pressed", button_type="place")
             
             # 拍照
             logger.info("📸 正在拍照...")
             
-            # 重新初始化摄像头以确保获取最新图像
-            try:
-                self.camera.cap.release()
-                time.sleep(0.1)  # 短暂等待
-                self.camera.cap = cv2.VideoCapture(0)
-                self.camera.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                time.sleep(0.5)  # 等待摄像头稳定
-                logger.info("📸 摄像头重新初始化完成")
-            except Exception as e:
-                logger.warning(f"📸 摄像头重新初始化失败: {e}")
+            # 后台线程持续采集，直接取最近帧中最清晰的一帧，在内存中编码后上传
+            image_data, frame = self.camera.capture_jpeg()
             
-            image_path = self.camera.capture_image()
-            
-            if image_path is None:
+            if image_data is None:
                 logger.error("拍照失败")
-                return
+                return RESULT_FAILED
             
-            logger.info(f"📸 拍照成功: {image_path}")
+            logger.info(f"📸 拍照成功: {frame.shape[1]}x{frame.shape[0]}, {len(image_data)} 字节")
+            if len(image_data) < 1000:
+                logger.warning("⚠️ 图片太小，可能拍摄失败")
             
-            # 检查图片文件是否存在和大小
-            if os.path.exists(image_path):
-                file_size = os.path.getsize(image_path)
-                logger.info(f"📸 图片文件大小: {file_size} 字节")
-                if file_size < 1000:
-                    logger.warning("⚠️ 图片文件太小，可能拍摄失败")
-            else:
-                logger.error("❌ 图片文件不存在")
-                return
+            # 先通知界面拍照完成，图片本身仍通过HTTP上传
+            filename = f"captured_food_{time.strftime('%Y%m%d_%H%M%S')}.jpg"
+            self.bus.publish("capture_ready", filename=filename, size=len(image_data),
+                             width=frame.shape[1], height=frame.shape[0])
             
             # 调用放入物品API，上传拍照的图片
-            with open(image_path, 'rb') as image_file:
-                files = {'file': (os.path.basename(image_path), image_file, 'image/jpeg')}
-                
-                response = requests.post(
-                    f"{self.web_server_url}/api/place-item",
-                    files=files,
-                    timeout=30
-                )
+            files = {'file': (filename, image_data, 'image/jpeg')}
             
-            # 调试：不清理临时图片文件，保留用于检查
-            logger.info(f"🔍 保留临时图片文件用于调试: {image_path}")
+            response = self.http.post(
+                "/api/place-item",
+                files=files,
+                timeout=30
+            )
             
             if response.status_code == 200:
                 data = response.json()
@@ -143,8 +248,8 @@ class ButtonDetector:
                     logger.info(f"放入物品功能触发成功: {data.get('message')}")
                     if data.get("food_name"):
                         logger.info(f"识别到的物品: {data.get('food_name')}")
-                else:
-                    logger.error(f"放入物品功能触发失败: {data.get('error')}")
+                    return RESULT_PROCESSED
+                logger.error(f"放入物品功能触发失败: {data.get('error')}")
             else:
                 logger.error(f"Web服务器响应异常: {response.status_code}")
         except requests.exceptions.RequestException as e:
@@ -152,13 +257,19 @@ class ButtonDetector:
             logger.info("请确保Web服务器正在运行: python web_interface.py")
         except Exception as e:
             logger.error(f"放入物品功能出错: {e}")
+        return RESULT_FAILED
 
     def _trigger_take_out_item(self):
-        """触发取出物品功能"""
+        """触发取出物品功能，返回处理结果（RESULT_*）"""
+        if self.bus.publish("button_pressed", button_type="take_out"):
+            # 取出结果由Web服务器处理，这里只知道事件已送达
+            logger.info("取出物品事件已通过事件总线发送")
+            return RESULT_DISPATCHED
+        
         try:
-            # 调用物理按键API
-            response = requests.post(
-                f"{self.web_server_url}/api/physical-button",
+            # 事件总线不可用，调用物理按键API
+            response = self.http.post(
+                "/api/physical-button",
                 json={"button_type": "take_out"},
                 timeout=5
             )
@@ -169,13 +280,14 @@ class ButtonDetector:
                     logger.info(f"取出物品功能触发成功: {data.get('message')}")
                     if data.get("item"):
                         logger.info(f"取出的物品: {data.get('item', {}).get('name', '未知')}")
-                else:
-                    logger.error(f"取出物品功能触发失败: {data.get('error')}")
+                    return RESULT_PROCESSED
+                logger.error(f"取出物品功能触发失败: {data.get('error')}")
             else:
                 logger.error(f"Web服务器响应异常: {response.status_code}")
         except requests.exceptions.RequestException as e:
             logger.error(f"无法连接到Web服务器: {e}")
             logger.info("请确保Web服务器正在运行: python web_interface.py")
+        return RESULT_FAILED
 
 
 
@@ -185,9 +297,15 @@ class ButtonDetector:
             logger.info("程序开始运行，等待按键按下...")
             logger.info("按 Ctrl+C 退出程序")
             
-            # 保持程序运行
+            self.start_workers()
+            
+            # 保持程序运行，定期上报队列统计
+            last_report = 0.0
             while True:
                 time.sleep(1)
+                if time.time() - last_report >= self.stats_interval:
+                    last_report = time.time()
+                    self.report_stats()
                 
         except KeyboardInterrupt:
             logger.info("程序被用户中断")
@@ -198,7 +316,12 @@ class ButtonDetector:
 
     def cleanup(self):
         """清理GPIO资源"""
-        GPIO.cleanup()
+        self.stop_workers()
+        logger.info(f"📊 按键事件统计: {self.get_stats()}")
+        if self.camera is not None:
+            self.camera.release()
+        self.bus.close()
+        self.gpio.cleanup()
         logger.info("GPIO资源已清理")
 
 if __name__ == "__main__":
@@ -206,7 +329,7 @@ if __name__ == "__main__":
     web_server_url = "http://localhost:8080"
     
     try:
-        response = requests.get(f"{web_server_url}/api/fridge-status", timeout=3)
+        response = get_client(web_server_url).get("/api/fridge-status", timeout=3)
         if response.status_code == 200:
             logger.info("Web服务器连接正常")
         else:
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人脸距离标定
+距离模型 distance = a / face_width + b（face_width为原图中人脸框宽度，像素），
+由几组已知距离的参考帧拟合 a、b，按摄像头保存到标定文件，所有检测器共用
+标定时记录画面宽度，以其他分辨率采集时按宽度比例换算（人脸框宽度与画面宽度成正比）
+
+用法:
+    # 在线标定：依次站在各距离处按回车采集
+    python distance_calibration.py --camera front --source 0 --distances 30,50,80
+
+    # 离线标定：使用已拍好的参考帧（距离:图片）
+    python distance_calibration.py --camera front --images 30:ref_30.jpg 50:ref_50.jpg 80:ref_80.jpg
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 未标定时使用的默认模型：150像素宽的人脸约在50厘米处
+DEFAULT_REFERENCE_FACE_WIDTH = 150  # 像素
+DEFAULT_REFERENCE_DISTANCE = 50  # 厘米
+
+PROFILES_FILE = os.getenv(
+    "FRIDGE_CAMERA_PROFILES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "camera_profiles.json")
+)
+
+
+class DistanceModel:
+    """distance = a / face_width + b"""
+
+    def __init__(self, a, b=0.0, frame_width=None):
+        self.a = float(a)
+        self.b = float(b)
+        self.frame_width = frame_width
+
+    @classmethod
+    def default(cls):
+        return cls(DEFAULT_REFERENCE_FACE_WIDTH * DEFAULT_REFERENCE_DISTANCE, 0.0)
+
+    def estimate(self, face_width) -> float:
+        """根据人脸框宽度估算距离（厘米）"""
+        if face_width <= 0:
+            return float('inf')
+        return self.a / face_width + self.b
+
+    def scaled_to(self, frame_width) -> "DistanceModel":
+        """换算到实际采集宽度，标定或采集宽度未知时原样返回"""
+        if not frame_width or not self.frame_width or frame_width == self.frame_width:
+            return self
+        return DistanceModel(self.a * frame_width / float(self.frame_width), self.b, frame_width)
+
+    def width_for_distance(self, distance) -> float:
+        """指定距离处的人脸框宽度（像素），用于推算检测的最小人脸尺寸"""
+        if distance <= self.b:
+            return float('inf')
+        return self.a / (distance - self.b)
+
+    def to_dict(self) -> dict:
+        return {"a": self.a, "b": self.b, "frame_width": self.frame_width}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["a"], data.get("b", 0.0), data.get("frame_width"))
+
+
+def fit_distance_model(samples, frame_width=None):
+    """
+    最小二乘拟合距离模型
+
+    Args:
+        samples: [(人脸宽度像素, 实际距离厘米), ...]；只有一组样本时 b 固定为0
+    """
+    samples = [(float(w), float(d)) for w, d in samples if w > 0]
+    if not samples:
+        raise ValueError("没有有效的标定样本")
+    if len(samples) == 1:
+        width, distance = samples[0]
+        return DistanceModel(width * distance, 0.0, frame_width)
+
+    xs = [1.0 / w for w, _ in samples]
+    ys = [d for _, d in samples]
+    n = len(samples)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        raise ValueError("标定样本的人脸宽度相同，请在不同距离采集")
+    a = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    if a <= 0:
+        # 人脸越远应越窄；a<=0 说明样本有误检或距离填错
+        raise ValueError("标定结果无效（距离没有随人脸变小而增大），请检查标定样本")
+    b = mean_y - a * mean_x
+    return DistanceModel(a, b, frame_width)
+
+
+def load_profiles(path=None) -> dict:
+    path = path or PROFILES_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("profiles", {})
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取标定文件失败: {e}")
+        return {}
+
+
+def save_profile(camera_id, model, samples, path=None):
+    path = path or PROFILES_FILE
+    profiles = load_profiles(path)
+    profile = model.to_dict()
+    profile["samples"] = [{"face_width": w, "distance": d} for w, d in samples]
+    profile["calibrated_at"] = datetime.now().isoformat()
+    profiles[str(camera_id)] = profile
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"profiles": profiles}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_distance_model(camera_id=None, source=None, path=None, frame_width=None) -> DistanceModel:
+    """
+    读取摄像头的距离模型：依次按摄像头ID、来源、"default" 查找，都没有时使用默认模型
+    给出 frame_width（实际采集宽度）时换算到该宽度
+    """
+    profiles = load_profiles(path)
+    for key in (camera_id, source, "default"):
+        if key is not None and str(key) in profiles:
+            try:
+                return DistanceModel.from_dict(profiles[str(key)]).scaled_to(frame_width)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"标定数据无效 ({key}): {e}")
+    return DistanceModel.default()
+
+
+def _largest_face_width(detector, frame):
+    faces = detector.detect(frame)
+    if not faces:
+        return None
+    return max(w for (x, y, w, h) in faces)
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def collect_from_images(detector, image_specs):
+    """离线标定：'距离:图片路径' 列表"""
+    import cv2
+
+    samples = []
+    frame_width = None
+    for spec in image_specs:
+        distance, _, image_path = spec.partition(":")
+        frame = cv2.imread(image_path)
+        if frame is None:
+            print(f"❌ 无法读取图片: {image_path}")
+            continue
+        frame_width = frame.shape[1]
+        width = _largest_face_width(detector, frame)
+        if width is None:
+            print(f"⚠️  {image_path} 中没有检测到人脸，跳过")
+            continue
+        samples.append((width, float(distance)))
+        print(f"📏 {distance}cm: 人脸宽度 {width}px")
+    return samples, frame_width
+
+
+def collect_from_camera(detector, source, distances, frames_per_distance=15):
+    """在线标定：依次站在各距离处，采集若干帧取人脸宽度中值"""
+    from frame_source import open_frame_source
+
+    cap = open_frame_source(source)
+    samples = []
+    frame_width = None
+    try:
+        for distance in distances:
+            input(f"请站在距离摄像头 {distance}cm 处，正对摄像头，然后按回车...")
+            widths = []
+            attempts = 0
+            while len(widths) < frames_per_distance and attempts < frames_per_distance * 4:
+                attempts += 1
+                ret, frame = cap.read()
+                if not ret:
+                    time.sleep(0.05)
+                    continue
+                frame_width = frame.shape[1]
+                width = _largest_face_width(detector, frame)
+                if width is not None:
+                    widths.append(width)
+            if not widths:
+                print(f"⚠️  {distance}cm 处没有检测到人脸，跳过")
+                continue
+            width = _median(widths)
+            samples.append((width, float(distance)))
+            print(f"📏 {distance}cm: 人脸宽度 {width}px（{len(widths)}帧中值）")
+    finally:
+        cap.release()
+    return samples, frame_width
+
+
+def main():
+    parser = argparse.ArgumentParser(description="人脸距离标定")
+    parser.add_argument("--camera", default="front", help="摄像头ID（标定文件中的键）")
+    parser.add_argument("--source", default="0", help="在线标定的帧来源（摄像头索引/视频/图片目录）")
+    parser.add_argument("--distances", default="30,50,80", help="在线标定的距离列表（厘米）")
+    parser.add_argument("--images", nargs="+", help="离线标定：距离:图片路径")
+    parser.add_argument("--frames", type=int, default=15, help="每个距离采集的帧数")
+    parser.add_argument("--profiles", default=None, help=f"标定文件，默认 {PROFILES_FILE}")
+    args = parser.parse_args()
+
+    from face_detectors import create_face_detector
+
+    # 标定时需要检测所有尺寸的人脸，不按触发距离限制最小尺寸（detection_distance=0）
+    detector = create_face_detector(backend=os.getenv("FRIDGE_FACE_BACKEND", "haar"),
+                                    mode="full", detection_distance=0, input_width=640)
+
+    if args.images:
+        samples, frame_width = collect_from_images(detector, args.images)
+    else:
+        distances = [float(d) for d in args.distances.split(",") if d.strip()]
+        samples, frame_width = collect_from_camera(detector, args.source, distances, args.frames)
+
+    if not samples:
+        print("❌ 没有采集到标定样本")
+        return
+
+    model = fit_distance_model(samples, frame_width)
+    print(f"✅ 距离模型: distance = {model.a:.1f} / width + {model.b:.1f}")
+    for width, distance in samples:
+        print(f"   {width:6.1f}px: 实际 {distance:5.1f}cm, 估算 {model.estimate(width):5.1f}cm")
+
+    save_profile(args.camera, model, samples, args.profiles)
+    print(f"💾 已保存到 {args.profiles or PROFILES_FILE} ({args.camera})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本机事件总线（Unix域套接字）
+传感器进程把按键/接近/拍照/运动事件直接投递给Web服务器进程，不再经过回环HTTP和Flask路由；
+总线不可用时调用方回退到HTTP接口（运动事件只用于投机预取，不回退）
+
+消息格式：4字节大端长度 + JSON
+    {"type": "button_pressed", "ts": 1700000000.123, "source": "button", "data": {...}}
+
+背压：服务端事件队列有上限，队列满时读线程停止从套接字读取，发布方的发送随之阻塞，
+超过发送超时后 publish() 返回 False，由调用方走HTTP回退。
+订阅进程各有一个有界发送队列，消费太慢时丢弃最旧的事件并计数，不拖慢其他订阅者。
+
+用法:
+    # 服务端（Web服务器进程内）
+    bus = EventBusServer()
+    bus.subscribe("button_pressed", on_button)
+    bus.start()
+
+    # 发布方（传感器进程）
+    if not get_publisher("button").publish("button_pressed", button_type="take_out"):
+        ...  # 回退到HTTP
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 套接字路径；设置为 off 时禁用事件总线，全部走HTTP
+DEFAULT_SOCKET_PATH = os.getenv("FRIDGE_EVENT_BUS", "/tmp/fridge_events.sock")
+
+EVENT_TYPES = ("button_pressed", "proximity", "capture_ready", "motion")
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 1024 * 1024
+
+
+def bus_enabled(path=DEFAULT_SOCKET_PATH) -> bool:
+    return bool(path) and path.lower() not in ("off", "none", "0")
+
+
+def encode_frame(message) -> bytes:
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(payload) > MAX_FRAME_BYTES:
+        raise ValueError(f"消息过大: {len(payload)} 字节")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def read_frame(sock):
+    """读取一条消息；连接关闭时返回 None"""
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"消息长度异常: {size} 字节")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def make_event(event_type, source=None, **data) -> dict:
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"未知的事件类型: {event_type}")
+    return {"type": event_type, "ts": time.time(), "source": source, "data": data}
+
+
+class _RemoteSubscriber:
+    """通过套接字订阅事件的进程，独立的有界发送队列"""
+
+    def __init__(self, conn, types, queue_size):
+        self.conn = conn
+        self.types = set(types or EVENT_TYPES)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, event):
+        """放入发送队列；队列满时丢弃最旧的事件"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class EventBusServer:
+    def __init__(self, path=DEFAULT_SOCKET_PATH, queue_size=256, subscriber_queue_size=64):
+        """
+        Args:
+            path: Unix域套接字路径
+            queue_size: 待分发事件队列上限，满时对发布方产生背压
+            subscriber_queue_size: 每个订阅进程的发送队列上限，满时丢弃最旧的事件
+        """
+        self.path = path
+        self.subscriber_queue_size = subscriber_queue_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._handlers = {}
+        self._remote = []
+        self._lock = threading.Lock()
+        self._sock = None
+        self.running = False
+
+        # 统计信息
+        self.received = 0
+        self.delivered = 0
+        self.invalid = 0
+        self.handler_errors = 0
+        self.publishers = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def subscribe(self, event_type, callback):
+        """
+        订阅进程内的事件，callback(event) 在分发线程中调用
+
+        Args:
+            event_type: EVENT_TYPES 之一，"*" 表示全部
+        """
+        if event_type != "*" and event_type not in EVENT_TYPES:
+            raise ValueError(f"未知的事件类型: {event_type}")
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(callback)
+
+    def start(self):
+        if os.path.exists(self.path):
+            # 上次运行遗留的套接字文件
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(16)
+        self.running = True
+        threading.Thread(target=self._accept_loop, name="event-bus-accept", daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, name="event-bus-dispatch", daemon=True).start()
+        logger.info(f"📡 事件总线已启动: {self.path}")
+
+    def stop(self):
+        self.running = False
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        with self._lock:
+            remote, self._remote = self._remote, []
+        for subscriber in remote:
+            try:
+                subscriber.conn.close()
+            except OSError:
+                pass
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle_connection, args=(conn,),
+                             name="event-bus-conn", daemon=True).start()
+
+    def _handle_connection(self, conn):
+        try:
+            message = read_frame(conn)
+            if message is not None and message.get("type") == "hello" and message.get("role") == "subscriber":
+                self._serve_subscriber(conn, message.get("types"))
+                return
+            with self._lock:
+                self.publishers += 1
+            try:
+                while message is not None and self.running:
+                    self._accept_event(message)
+                    message = read_frame(conn)
+            finally:
+                with self._lock:
+                    self.publishers -= 1
+        except (OSError, ValueError) as e:
+            logger.debug(f"事件总线连接断开: {e}")
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _accept_event(self, message):
+        if not isinstance(message, dict) or message.get("type") not in EVENT_TYPES:
+            with self._lock:
+                self.invalid += 1
+            logger.warning(f"⚠️ 事件总线收到无效消息: {str(message)[:100]}")
+            return
+        with self._lock:
+            self.received += 1
+        # 队列满时阻塞：不再读取该连接，发布方的发送缓冲区随之写满
+        self._queue.put(message)
+
+    def _serve_subscriber(self, conn, types):
+        subscriber = _RemoteSubscriber(conn, types, self.subscriber_queue_size)
+        with self._lock:
+            self._remote.append(subscriber)
+        logger.info(f"📡 事件总线订阅者已连接: {sorted(subscriber.types)}")
+        try:
+            while self.running:
+                try:
+                    event = subscriber.queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                conn.sendall(encode_frame(event))
+        finally:
+            with self._lock:
+                if subscriber in self._remote:
+                    self._remote.remove(subscriber)
+
+    def _dispatch_loop(self):
+        while self.running:
+            try:
+                event = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            latency = max(0.0, time.time() - event.get("ts", time.time()))
+            with self._lock:
+                handlers = self._handlers.get(event["type"], []) + self._handlers.get("*", [])
+                remote = [s for s in self._remote if event["type"] in s.types]
+                self.delivered += 1
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+            for callback in handlers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    with self._lock:
+                        self.handler_errors += 1
+                    logger.error(f"事件处理失败 ({event['type']}): {e}")
+            for subscriber in remote:
+                subscriber.offer(event)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "received": self.received,
+                "delivered": self.delivered,
+                "invalid": self.invalid,
+                "handler_errors": self.handler_errors,
+                "queue_depth": self._queue.qsize(),
+                "publishers": self.publishers,
+                "subscribers": len(self._remote),
+                "dropped": sum(s.dropped for s in self._remote),
+                "avg_latency_ms": 1000 * self.latency_total / self.delivered if self.delivered else 0.0,
+                "max_latency_ms": 1000 * self.latency_max
+            }
+
+
+class EventBusClient:
+    def __init__(self, path=DEFAULT_SOCKET_PATH, source=None, send_timeout=0.5, reconnect_interval=1.0,
+                 send_buffer=16384):
+        """
+        Args:
+            path: Unix域套接字路径
+            source: 事件来源（进程名），写入每条事件
+            send_timeout: 发送超时（秒），服务端背压超过该时间时 publish() 返回 False
+            reconnect_interval: 连接失败后再次尝试连接的间隔（秒），期间直接返回 False
+            send_buffer: 套接字发送缓冲区（字节），限制积压在内核中的事件数，使背压尽快传到发布方
+        """
+        self.path = path
+        self.source = source
+        self.send_timeout = send_timeout
+        self.reconnect_interval = reconnect_interval
+        self.send_buffer = send_buffer
+        self._sock = None
+        self._next_connect = 0.0
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.failed = 0
+
+    def _connect(self):
+        if time.monotonic() < self._next_connect:
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.send_timeout)
+        if self.send_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            self._next_connect = time.monotonic() + self.reconnect_interval
+            return None
+        self._sock = sock
+        return sock
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def publish(self, event_type, **data) -> bool:
+        """
+        发布事件
+
+        Returns:
+            是否已交给事件总线；False 时调用方应回退到HTTP
+        """
+        if not bus_enabled(self.path):
+            return False
+        frame = encode_frame(make_event(event_type, self.source, **data))
+        with self._lock:
+            sock = self._sock or self._connect()
+            if sock is None:
+                self.failed += 1
+                return False
+            try:
+                sock.sendall(frame)
+                self.published += 1
+                return True
+            except OSError as e:
+                # 超时可能只发送了半条消息，连接已不可用，下次重新连接
+                logger.warning(f"⚠️ 事件总线发送失败: {e}")
+                self._close()
+                self._next_connect = time.monotonic() + self.reconnect_interval
+                self.failed += 1
+                return False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"published": self.published, "failed": self.failed, "connected": self._sock is not None}
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class EventBusSubscriber:
+    """在其他进程中订阅事件，断开后自动重连"""
+
+    def __init__(self, callback, types=None, path=DEFAULT_SOCKET_PATH, reconnect_interval=1.0):
+        self.callback = callback
+        self.types = list(types or EVENT_TYPES)
+        self.path = path
+        self.reconnect_interval = reconnect_interval
+        self.running = False
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="event-bus-subscriber", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while self.running:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+                sock.sendall(encode_frame({"type": "hello", "role": "subscriber", "types": self.types}))
+                self._sock = sock
+                while self.running:
+                    event = read_frame(sock)
+                    if event is None:
+                        break
+                    try:
+                        self.callback(event)
+                    except Exception as e:
+                        logger.error(f"事件处理失败 ({event.get('type')}): {e}")
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._sock = None
+                sock.close()
+            if self.running:
+                time.sleep(self.reconnect_interval)
+
+
+_publishers = {}
+_publishers_lock = threading.Lock()
+
+
+def get_publisher(source=None, path=DEFAULT_SOCKET_PATH) -> EventBusClient:
+    """进程内共享的发布客户端"""
+    with _publishers_lock:
+        client = _publishers.get(path)
+        if client is None:
+            client = _publishers[path] = EventBusClient(path, source=source)
+        return client
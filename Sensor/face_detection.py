@@ -3,30 +3,77 @@ import numpy as np
 import serial
 import requests
 import logging
+import os
 import time
+from motion_gate import MotionGate
+from face_detectors import create_face_detector
+from frame_source import open_frame_source
+from face_tracking import FaceTracker, DistanceFilter
+from frame_scheduler import AdaptiveScheduler
+from distance_calibration import load_distance_model
+from http_client import get_client
+from event_bus import get_publisher
+from proximity_state import ProximityStateMachine
 
 class FaceDetector:
-    def __init__(self, camera_index=0, serial_port='/dev/tty', baud_rate=9600, web_server_url="http://localhost:8080"):
-        # 初始化摄像头
-        self.cap = cv2.VideoCapture(camera_index)
+    def __init__(self, camera_index=0, serial_port=None, baud_rate=9600, web_server_url="http://localhost:8080",
+                 detection_mode="fast", detection_width=320, roi=None, tracker="auto", redetect_interval=10,
+                 backend="haar", threads=None, camera_id="front"):
+        # 初始化摄像头（帧共享服务运行时从共享内存读取；也可传入视频文件/图片目录重放）
+        self.cap = open_frame_source(camera_index)
         if not self.cap.isOpened():
             print(f"❌ 无法打开摄像头 {camera_index}")
             self.cap = None
         else:
             print(f"✅ 摄像头 {camera_index} 初始化成功")
         
-        # 加载人脸检测器
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        # 假设的参考距离和对应的人脸框大小（需要根据实际情况校准）
-        self.REFERENCE_FACE_WIDTH = 150  # 像素
-        self.REFERENCE_DISTANCE = 50  # 厘米
+        self.DETECTION_DISTANCE = 50  # 检测距离阈值（厘米）
+        # 接近状态机：进入/离开迟滞和停留时间，每次接近只发送一次串口和Web事件
+        self.event_cooldown = 3.0  # 3秒冷却时间
+        self.proximity = ProximityStateMachine.from_env(enter_distance=self.DETECTION_DISTANCE,
+                                                        dedup_seconds=self.event_cooldown)
+        # 设置了 FRIDGE_PROXIMITY_ENTER_CM 时以环境变量为准
+        self.DETECTION_DISTANCE = self.proximity.enter_distance
+        # 距离模型：从标定文件读取（distance_calibration.py 生成），未标定时使用默认模型
+        # 按实际采集宽度换算（重放来源不报告宽度时按标定宽度）
+        frame_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH) if self.cap is not None else None
+        self.distance_model = load_distance_model(camera_id, camera_index, frame_width=frame_width)
+        
+        # 加载人脸检测器（haar/yunet/ssd；fast: 缩放+ROI+按距离推算最小人脸尺寸；full: 整帧检测）
+        self.face_detector = create_face_detector(
+            backend=backend,
+            mode=detection_mode,
+            # 最小人脸尺寸按离开距离计算，进入/离开之间的人脸仍能检测到（迟滞）
+            detection_distance=self.proximity.leave_distance,
+            distance_model=self.distance_model,
+            input_width=detection_width,
+            threads=threads,
+            roi=roi
+        )
         
-        # Web服务器URL
+        # 先检测后跟踪：跟踪期间不运行级联检测
+        self.face_tracker = FaceTracker(self.face_detector, tracker=tracker,
+                                        redetect_interval=redetect_interval)
+        # 距离中值滤波，单帧误检不触发事件
+        self.distance_filter = DistanceFilter()
+        
+        # Web服务器URL（复用持久连接）
         self.web_server_url = web_server_url
+        self.http = get_client(web_server_url)
+        # 本机事件总线，不可用时回退到HTTP
+        self.bus = get_publisher("face_detection")
+        self.camera_id = camera_id
         
-        # 防抖变量
-        self.last_event_time = 0
-        self.event_cooldown = 3.0  # 3秒冷却时间
+        # 画面开始有运动时通过事件总线通知Web服务器预取问候（不等人脸确认）
+        self.motion_active = False
+        
+        # 自适应帧率（无头模式）：无人时低频，运动/人脸时提高，事件后冷却期降频
+        self.scheduler = AdaptiveScheduler.from_env(cooldown_seconds=self.event_cooldown)
+        
+        # 运动门控：无运动时跳过人脸检测
+        self.motion_gate = MotionGate()
+        self.last_stats_time = time.time()
+        self.stats_log_interval = 60
         
         # 配置日志 - 只记录错误
         logging.basicConfig(
@@ -35,20 +82,18 @@ class FaceDetector:
         )
         self.logger = logging.getLogger(__name__)
         
-        # 初始化串口
-        try:
-            self.serial_port = serial.Serial(serial_port, baud_rate)
-            # 减少输出，避免日志混乱
-            # print(f"串口 {serial_port} 已成功打开")
-        except Exception as e:
-            print(f"串口打开失败：{str(e)}")
-            self.serial_port = None
+        # 初始化串口（可选）：未指定时只通过事件总线/HTTP上报，
+        # 不要使用 /dev/tty（当前终端），否则事件字符串会写到控制台
+        self.serial_port = None
+        if serial_port:
+            try:
+                self.serial_port = serial.Serial(serial_port, baud_rate)
+            except Exception as e:
+                print(f"串口 {serial_port} 打开失败：{str(e)}")
 
     def estimate_distance(self, face_width):
-        """根据人脸框宽度估算距离"""
-        # 使用简单的反比例关系估算距离
-        distance = (self.REFERENCE_FACE_WIDTH * self.REFERENCE_DISTANCE) / face_width
-        return distance
+        """根据人脸框宽度估算距离（使用标定的距离模型）"""
+        return self.distance_model.estimate(face_width)
 
     def send_serial_event(self):
         """通过串口发送事件字符串"""
@@ -60,23 +105,20 @@ class FaceDetector:
             except Exception as e:
                 print(f"发送串口数据失败：{str(e)}")
     
-    def send_web_event(self):
-        """通过Web API发送接近传感器事件"""
-        current_time = time.time()
+    def send_web_event(self, distance=None):
+        """通过Web API发送接近传感器事件（由接近状态机确认后调用，Web端再与其他来源去重）"""
+        self.scheduler.report(event=True)
         
-        # 防抖检查
-        if current_time - self.last_event_time < self.event_cooldown:
-            # 减少输出，避免日志混乱
-            # print(f"⏰ 接近事件被忽略 - 冷却时间未到 (剩余{self.event_cooldown - (current_time - self.last_event_time):.1f}秒)")
+        if self.bus.publish("proximity", detected=True, distance="near", camera_id=self.camera_id,
+                            distance_cm=distance):
             return
         
-        self.last_event_time = current_time
-        
         try:
-            # 调用接近传感器API
-            response = requests.post(
-                f"{self.web_server_url}/api/proximity-sensor",
-                json={"detected": True, "distance": "near"},
+            # 事件总线不可用，调用接近传感器API
+            response = self.http.post(
+                "/api/proximity-sensor",
+                json={"detected": True, "distance": "near", "camera_id": self.camera_id,
+                      "distance_cm": distance, "source": "face_detection"},
                 timeout=5
             )
             
@@ -100,25 +142,43 @@ class FaceDetector:
         if not ret:
             return None
 
-        # 转换为灰度图
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # 检测人脸
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        if time.time() - self.last_stats_time >= self.stats_log_interval:
+            self.last_stats_time = time.time()
+            print(f"📊 {self.motion_gate.format_stats()}")
+            tracking = self.face_tracker.get_stats()
+            print(f"📊 {self.scheduler.format_stats()}")
+            print(f"📊 人脸跟踪({tracking['tracker']}): 检测 {tracking['detections']} 帧, "
+                  f"跟踪 {tracking['tracked_frames']} 帧")
 
-        # 检查是否需要发送事件
+        # 运动门控：画面无变化时不运行级联检测
+        if not self.motion_gate.update(frame):
+            self.face_tracker.reset()
+            self.distance_filter.reset()
+            self.scheduler.report()
+            self.proximity.update(None)
+            self.motion_active = False
+            cv2.putText(frame, 'idle (no motion)', (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (128, 128, 128), 2)
+            return frame
+
+        if not self.motion_active:
+            self.motion_active = True
+            self.bus.publish("motion", camera_id=self.camera_id)
+
+        # 检测或跟踪人脸（检测框为原图坐标）
+        faces = self.face_tracker.update(frame)
+        
+        nearest = None
         if len(faces) >= 1:
-            for (x, y, w, h) in faces:
-                distance = self.estimate_distance(w)
-                if distance <= 50:  # 当有任何一个人脸距离小于等于50厘米时
-                    self.send_serial_event()  # 保留串口事件
-                    self.send_web_event()     # 发送Web事件
-                    break
+            self.motion_gate.keep_alive()
+            nearest = min(self.estimate_distance(w) for (x, y, w, h) in faces)
+        self.scheduler.report(motion=True, face=nearest is not None)
+
+        # 检查是否需要发送事件（使用滤波后的距离，单帧误检不触发；接近确认后到离开前不重复发送）
+        distance = self.distance_filter.update(nearest)
+        if self.proximity.update(distance, source="face_detection", camera_id=self.camera_id):
+            self.send_serial_event()  # 保留串口事件
+            self.send_web_event(round(distance, 1))     # 发送Web事件
 
         # 在图像上标记人脸并显示距离
         for (x, y, w, h) in faces:
@@ -163,8 +223,8 @@ class FaceDetector:
                         if cv2.waitKey(1) & 0xFF == ord('q'):
                             break
                     else:
-                        # 无头模式，只进行检测，不显示窗口
-                        time.sleep(0.1)  # 短暂休眠以减少CPU使用
+                        # 无头模式，只进行检测，不显示窗口；按当前状态的帧率等待
+                        self.scheduler.wait()
 
         finally:
             if self.cap is not None:
@@ -178,7 +238,7 @@ def main():
     # 创建检测器实例（可以通过参数指定摄像头索引和串口设置）
     detector = FaceDetector(
         camera_index=0, 
-        serial_port='/dev/tty', 
+        serial_port=os.getenv('FRIDGE_EVENT_SERIAL_PORT'),
         baud_rate=9600,
         web_server_url="http://localhost:8080"
     )
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人脸检测器
+在缩小的灰度帧上、限定的感兴趣区域内运行Haar级联检测，
+最小人脸尺寸由触发距离推算，检测框映射回原图坐标
+
+所有检测器提供相同的接口：
+    detect(frame) -> [(x, y, w, h), ...]   原图坐标
+    empty() -> bool                         模型是否加载失败
+    name                                    后端名称
+可选后端：haar（默认）、yunet（cv2.FaceDetectorYN）、ssd（res10 SSD，cv2.dnn）
+"""
+
+import logging
+import os
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# DNN模型默认目录，可通过环境变量 FRIDGE_FACE_MODEL_DIR 修改
+MODEL_DIR = os.getenv(
+    "FRIDGE_FACE_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+)
+YUNET_MODEL = "face_detection_yunet_2023mar.onnx"
+SSD_PROTOTXT = "deploy.prototxt"
+SSD_MODEL = "res10_300x300_ssd_iter_140000.caffemodel"
+
+BACKENDS = ("haar", "yunet", "ssd")
+
+
+def min_face_width_for_distance(reference_face_width, reference_distance, detection_distance,
+                                distance_model=None):
+    """
+    触发距离处的人脸宽度（原图像素）
+
+    比触发距离更远的人脸更窄，无需检测。提供标定的 distance_model 时按标定模型计算，
+    否则采用反比例模型 distance = REFERENCE_FACE_WIDTH * REFERENCE_DISTANCE / width。
+    """
+    if detection_distance <= 0:
+        return 0
+    if distance_model is not None:
+        width = distance_model.width_for_distance(detection_distance)
+        return width if width != float('inf') else 0
+    return reference_face_width * reference_distance / float(detection_distance)
+
+
+class HaarFaceDetector:
+    name = "haar"
+
+    def __init__(self, detection_width=320, roi=None, min_face_width=0, min_size_margin=0.8,
+                 scale_factor=1.1, min_neighbors=5, cascade_path=None):
+        """
+        Args:
+            detection_width: 检测使用的帧宽度（像素），None或0表示不缩放
+            roi: 感兴趣区域 (x, y, w, h)，以原图宽高的比例表示（0~1），None表示整帧
+            min_face_width: 原图中需要检测的最小人脸宽度（像素）
+            min_size_margin: 最小尺寸的余量系数，避免临界距离的人脸被漏检
+            scale_factor: 图像金字塔每层的缩放比例，越大越快、越粗
+            min_neighbors: 候选框最少邻居数
+            cascade_path: 级联模型路径，默认使用OpenCV自带的正脸模型
+        """
+        self.detection_width = detection_width
+        self.roi = roi
+        self.min_face_width = min_face_width
+        self.min_size_margin = min_size_margin
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+        cascade_path = cascade_path or (cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+
+    def empty(self) -> bool:
+        return self.cascade.empty()
+
+    def detect(self, frame):
+        """
+        检测人脸
+
+        Args:
+            frame: BGR或灰度图
+
+        Returns:
+            原图坐标系下的人脸框列表 [(x, y, w, h), ...]
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+
+        rx, ry, rw, rh = _roi_pixels(self.roi, width, height)
+        region = gray[ry:ry + rh, rx:rx + rw]
+
+        scale = 1.0
+        if self.detection_width and rw > self.detection_width:
+            scale = self.detection_width / float(rw)
+            region = cv2.resize(region, (self.detection_width, max(1, int(rh * scale))),
+                                interpolation=cv2.INTER_AREA)
+
+        # 缩放后的最小人脸尺寸，不小于级联模型的窗口大小
+        min_side = max(24, int(self.min_face_width * self.min_size_margin * scale))
+        if min_side > min(region.shape[:2]):
+            return []
+
+        faces = self.cascade.detectMultiScale(
+            region,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_side, min_side)
+        )
+
+        # 映射回原图坐标
+        boxes = []
+        for (x, y, w, h) in faces:
+            boxes.append((
+                int(x / scale) + rx,
+                int(y / scale) + ry,
+                int(w / scale),
+                int(h / scale)
+            ))
+        return boxes
+
+
+class FullFrameHaarDetector:
+    """原始检测方式：整帧、minSize=(30, 30)"""
+
+    name = "haar-full"
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5, cascade_path=None):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        cascade_path = cascade_path or (cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+
+    def empty(self) -> bool:
+        return self.cascade.empty()
+
+    def detect(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(30, 30)
+        )
+        return [tuple(int(v) for v in face) for face in faces]
+
+
+def create_haar_detector(mode="fast", reference_face_width=150, reference_distance=50,
+                         detection_distance=50, distance_model=None, **kwargs):
+    """
+    创建Haar检测器
+
+    Args:
+        mode: "fast" 缩放+ROI+按距离推算最小尺寸；"full" 原始整帧检测
+        distance_model: 标定的距离模型（distance_calibration.DistanceModel）
+    """
+    if mode == "full":
+        return FullFrameHaarDetector(
+            scale_factor=kwargs.get("scale_factor", 1.1),
+            min_neighbors=kwargs.get("min_neighbors", 5)
+        )
+    min_face_width = min_face_width_for_distance(reference_face_width, reference_distance, detection_distance,
+                                                 distance_model)
+    return HaarFaceDetector(min_face_width=min_face_width, **kwargs)
+
+
+def _set_threads(threads):
+    """设置OpenCV推理线程数（None表示使用默认值）"""
+    if threads:
+        cv2.setNumThreads(int(threads))
+
+
+def _roi_pixels(roi, width, height):
+    """把比例ROI转换为原图像素区域"""
+    if not roi:
+        return 0, 0, width, height
+    rx, ry, rw, rh = roi
+    x = max(0, min(width - 1, int(rx * width)))
+    y = max(0, min(height - 1, int(ry * height)))
+    w = max(1, min(width - x, int(rw * width)))
+    h = max(1, min(height - y, int(rh * height)))
+    return x, y, w, h
+
+
+class YuNetFaceDetector:
+    """OpenCV YuNet人脸检测（cv2.FaceDetectorYN，对侧脸和遮挡更鲁棒）"""
+
+    name = "yunet"
+
+    def __init__(self, model_path=None, input_width=320, score_threshold=0.8, nms_threshold=0.3,
+                 top_k=50, threads=None, roi=None, min_face_width=0):
+        """
+        Args:
+            model_path: ONNX模型路径，默认 MODEL_DIR/face_detection_yunet_2023mar.onnx
+            input_width: 推理输入宽度（像素），高度按画面比例计算；越小越快
+            score_threshold: 置信度阈值
+            nms_threshold: 非极大值抑制阈值
+            threads: OpenCV线程数
+            roi: 感兴趣区域 (x, y, w, h)，按画面比例
+            min_face_width: 原图中需要的最小人脸宽度（像素），更小的结果被丢弃
+        """
+        self.model_path = model_path or os.path.join(MODEL_DIR, YUNET_MODEL)
+        self.input_width = input_width
+        self.roi = roi
+        self.min_face_width = min_face_width
+        self._input_size = None
+        self.model = None
+
+        if not hasattr(cv2, "FaceDetectorYN"):
+            logger.warning("当前OpenCV版本不支持FaceDetectorYN（需要4.5.4以上）")
+            return
+        if not os.path.exists(self.model_path):
+            logger.warning(f"YuNet模型不存在: {self.model_path}")
+            return
+
+        _set_threads(threads)
+        self.model = cv2.FaceDetectorYN.create(
+            self.model_path, "", (input_width, input_width),
+            score_threshold, nms_threshold, top_k
+        )
+
+    def empty(self) -> bool:
+        return self.model is None
+
+    def detect(self, frame):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        height, width = frame.shape[:2]
+        rx, ry, rw, rh = _roi_pixels(self.roi, width, height)
+        region = frame[ry:ry + rh, rx:rx + rw]
+
+        scale = min(1.0, self.input_width / float(rw))
+        if scale < 1.0:
+            region = cv2.resize(region, (self.input_width, max(1, int(rh * scale))),
+                                interpolation=cv2.INTER_AREA)
+        input_size = (region.shape[1], region.shape[0])
+        if input_size != self._input_size:
+            self.model.setInputSize(input_size)
+            self._input_size = input_size
+
+        _, faces = self.model.detect(region)
+        boxes = []
+        if faces is None:
+            return boxes
+        for face in faces:
+            x, y, w, h = face[:4]
+            box = (int(x / scale) + rx, int(y / scale) + ry, int(w / scale), int(h / scale))
+            if box[2] >= self.min_face_width:
+                boxes.append(box)
+        return boxes
+
+
+class SSDFaceDetector:
+    """res10 SSD人脸检测（cv2.dnn + Caffe模型）"""
+
+    name = "ssd"
+
+    def __init__(self, prototxt_path=None, model_path=None, input_size=300, confidence=0.5,
+                 threads=None, roi=None, min_face_width=0):
+        """
+        Args:
+            prototxt_path: 网络结构文件，默认 MODEL_DIR/deploy.prototxt
+            model_path: 权重文件，默认 MODEL_DIR/res10_300x300_ssd_iter_140000.caffemodel
+            input_size: 推理输入尺寸（正方形边长，模型按300训练）
+            confidence: 置信度阈值
+            threads: OpenCV线程数
+            roi: 感兴趣区域 (x, y, w, h)，按画面比例
+            min_face_width: 原图中需要的最小人脸宽度（像素）
+        """
+        self.prototxt_path = prototxt_path or os.path.join(MODEL_DIR, SSD_PROTOTXT)
+        self.model_path = model_path or os.path.join(MODEL_DIR, SSD_MODEL)
+        self.input_size = input_size
+        self.confidence = confidence
+        self.roi = roi
+        self.min_face_width = min_face_width
+        self.net = None
+
+        if not (os.path.exists(self.prototxt_path) and os.path.exists(self.model_path)):
+            logger.warning(f"SSD模型不存在: {self.prototxt_path}, {self.model_path}")
+            return
+
+        _set_threads(threads)
+        self.net = cv2.dnn.readNetFromCaffe(self.prototxt_path, self.model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def empty(self) -> bool:
+        return self.net is None
+
+    def detect(self, frame):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        height, width = frame.shape[:2]
+        rx, ry, rw, rh = _roi_pixels(self.roi, width, height)
+        region = frame[ry:ry + rh, rx:rx + rw]
+
+        blob = cv2.dnn.blobFromImage(region, 1.0, (self.input_size, self.input_size),
+                                     (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()
+
+        boxes = []
+        for i in range(detections.shape[2]):
+            if detections[0, 0, i, 2] < self.confidence:
+                continue
+            x1, y1, x2, y2 = detections[0, 0, i, 3:7]
+            x1, x2 = max(0.0, x1) * rw, min(1.0, x2) * rw
+            y1, y2 = max(0.0, y1) * rh, min(1.0, y2) * rh
+            box = (int(x1) + rx, int(y1) + ry, int(x2 - x1), int(y2 - y1))
+            if box[2] > 0 and box[3] > 0 and box[2] >= self.min_face_width:
+                boxes.append(box)
+        return boxes
+
+
+def create_face_detector(backend="haar", mode="fast", reference_face_width=150, reference_distance=50,
+                         detection_distance=50, input_width=320, threads=None, roi=None,
+                         model_path=None, distance_model=None, **kwargs):
+    """
+    按后端名称创建人脸检测器，DNN模型不可用时回退到Haar
+
+    Args:
+        backend: "haar" / "yunet" / "ssd"
+        mode: Haar检测模式（"fast" / "full"）
+        input_width: 检测输入宽度（Haar为缩放宽度，YuNet为推理宽度，SSD为输入边长）
+        threads: DNN推理线程数
+        roi: 感兴趣区域 (x, y, w, h)，按画面比例
+        model_path: DNN模型路径（默认从MODEL_DIR加载）
+        distance_model: 标定的距离模型，用于推算最小人脸尺寸
+    """
+    min_face_width = min_face_width_for_distance(reference_face_width, reference_distance, detection_distance,
+                                                 distance_model)
+    # DNN检测器在这里乘上余量系数，Haar检测器由 HaarFaceDetector 自己按同一系数放宽
+    min_size_margin = kwargs.pop("min_size_margin", 0.8)
+    dnn_min_width = min_face_width * min_size_margin
+
+    detector = None
+    if backend == "yunet":
+        detector = YuNetFaceDetector(model_path=model_path, input_width=input_width, threads=threads,
+                                     roi=roi, min_face_width=dnn_min_width, **kwargs)
+    elif backend == "ssd":
+        detector = SSDFaceDetector(model_path=model_path, input_size=input_width, threads=threads,
+                                   roi=roi, min_face_width=dnn_min_width, **kwargs)
+    elif backend != "haar":
+        logger.warning(f"未知的人脸检测后端: {backend}，使用Haar")
+
+    if detector is not None and not detector.empty():
+        return detector
+    if detector is not None:
+        logger.warning(f"{backend}检测器不可用，回退到Haar级联检测")
+
+    if mode == "full":
+        return create_haar_detector(mode="full")
+    return create_haar_detector(
+        mode="fast",
+        reference_face_width=reference_face_width,
+        reference_distance=reference_distance,
+        detection_distance=detection_distance,
+        distance_model=distance_model,
+        detection_width=input_width,
+        roi=roi,
+        min_size_margin=min_size_margin
+    )
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人脸跟踪
+检测到人脸后用轻量跟踪器跟随人脸框，每隔若干帧或跟踪置信度下降时重新检测，
+避免每帧都运行级联检测；距离估算经过中值滤波，单帧误检不会触发接近事件
+"""
+
+import math
+from collections import deque
+
+import cv2
+
+# OpenCV跟踪器工厂（不同版本/是否安装contrib位置不同）
+_TRACKER_FACTORIES = {
+    "kcf": ("TrackerKCF_create", "legacy.TrackerKCF_create"),
+    "mosse": ("legacy.TrackerMOSSE_create", "TrackerMOSSE_create"),
+    "csrt": ("TrackerCSRT_create", "legacy.TrackerCSRT_create"),
+}
+
+
+def _resolve_factory(kind):
+    for path in _TRACKER_FACTORIES.get(kind, ()):
+        obj = cv2
+        for part in path.split("."):
+            obj = getattr(obj, part, None)
+            if obj is None:
+                break
+        if obj is not None:
+            return obj
+    return None
+
+
+def available_trackers():
+    """当前OpenCV中可用的跟踪器"""
+    return [kind for kind in _TRACKER_FACTORIES if _resolve_factory(kind) is not None] + ["template"]
+
+
+def _patch(frame, box, size):
+    """裁出人脸框并缩放为固定大小的灰度图，框在画面外时返回None"""
+    height, width = frame.shape[:2]
+    x, y, w, h = box
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    patch = frame[y0:y1, x0:x1]
+    if patch.ndim == 3:
+        patch = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(patch, (size, size), interpolation=cv2.INTER_AREA)
+
+
+class OpenCVTracker:
+    """
+    封装OpenCV自带的KCF/MOSSE/CSRT跟踪器
+
+    OpenCV跟踪器只返回成功与否，置信度取跟踪框内容与初始化时人脸的归一化相关系数
+    （缩放到 patch_size 后比较），跟丢到背景上时分数下降，触发重新检测
+    """
+
+    def __init__(self, kind, patch_size=48):
+        factory = _resolve_factory(kind)
+        if factory is None:
+            raise ValueError(f"OpenCV中没有可用的{kind}跟踪器")
+        self.kind = kind
+        self.factory = factory
+        self.patch_size = patch_size
+        self.tracker = None
+        self.reference = None
+
+    def init(self, frame, box):
+        self.tracker = self.factory()
+        self.tracker.init(frame, tuple(int(v) for v in box))
+        self.reference = _patch(frame, box, self.patch_size)
+
+    def update(self, frame):
+        """返回 (是否成功, 人脸框, 置信度)"""
+        ok, box = self.tracker.update(frame)
+        if not ok:
+            return False, None, 0.0
+        box = tuple(int(v) for v in box)
+        patch = _patch(frame, box, self.patch_size)
+        if patch is None or self.reference is None:
+            return True, box, 0.0
+        score = float(cv2.matchTemplate(patch, self.reference, cv2.TM_CCOEFF_NORMED)[0, 0])
+        # 纯色区域相关系数无定义
+        return True, box, score if math.isfinite(score) else 0.0
+
+
+class TemplateTracker:
+    """
+    模板匹配跟踪器（无需opencv-contrib）
+
+    在上一位置周围的搜索窗口内做归一化相关匹配，并尝试几个相邻尺度，
+    使人脸靠近/远离时框的大小也能跟随变化
+    """
+
+    kind = "template"
+
+    def __init__(self, work_width=320, search_margin=0.5, scales=(0.95, 1.0, 1.05)):
+        """
+        Args:
+            work_width: 匹配使用的帧宽度（像素）
+            search_margin: 搜索窗口相对人脸框大小向外扩展的比例
+            scales: 每帧尝试的模板缩放比例
+        """
+        self.work_width = work_width
+        self.search_margin = search_margin
+        self.scales = scales
+        self.template = None
+        self.box = None  # 缩放后坐标
+        self.scale = 1.0
+
+    def _prepare(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        self.scale = min(1.0, self.work_width / float(width))
+        if self.scale < 1.0:
+            gray = cv2.resize(gray, (self.work_width, max(1, int(height * self.scale))),
+                              interpolation=cv2.INTER_AREA)
+        return gray
+
+    def init(self, frame, box):
+        gray = self._prepare(frame)
+        x, y, w, h = (int(round(v * self.scale)) for v in box)
+        w, h = max(8, w), max(8, h)
+        self.template = gray[y:y + h, x:x + w].copy()
+        self.box = (x, y, self.template.shape[1], self.template.shape[0])
+
+    def update(self, frame):
+        if self.template is None or self.template.size == 0:
+            return False, None, 0.0
+        gray = self._prepare(frame)
+        height, width = gray.shape[:2]
+        x, y, w, h = self.box
+
+        margin_x = int(w * self.search_margin) + 1
+        margin_y = int(h * self.search_margin) + 1
+        sx, sy = max(0, x - margin_x), max(0, y - margin_y)
+        ex, ey = min(width, x + w + margin_x), min(height, y + h + margin_y)
+        search = gray[sy:ey, sx:ex]
+
+        best = (-1.0, None)
+        for scale in self.scales:
+            tw, th = int(self.template.shape[1] * scale), int(self.template.shape[0] * scale)
+            if tw < 8 or th < 8 or tw > search.shape[1] or th > search.shape[0]:
+                continue
+            template = self.template if scale == 1.0 else cv2.resize(self.template, (tw, th))
+            result = cv2.matchTemplate(search, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, location = cv2.minMaxLoc(result)
+            if score > best[0]:
+                best = (score, (sx + location[0], sy + location[1], tw, th))
+
+        score, box = best
+        if box is None:
+            return False, None, 0.0
+        self.box = box
+        bx, by, bw, bh = box
+        return True, (int(bx / self.scale), int(by / self.scale),
+                      int(bw / self.scale), int(bh / self.scale)), float(score)
+
+
+def create_tracker(kind="auto"):
+    """
+    创建跟踪器
+
+    Args:
+        kind: "auto" 优先KCF/MOSSE，不可用时使用模板匹配；也可指定 kcf/mosse/csrt/template
+    """
+    if kind == "template":
+        return TemplateTracker()
+    if kind == "auto":
+        for candidate in ("kcf", "mosse"):
+            if _resolve_factory(candidate) is not None:
+                return OpenCVTracker(candidate)
+        return TemplateTracker()
+    return OpenCVTracker(kind)
+
+
+class FaceTracker:
+    """先检测后跟踪：只跟踪最大（最近）的人脸"""
+
+    def __init__(self, detector, tracker="auto", redetect_interval=10, min_confidence=0.5):
+        """
+        Args:
+            detector: 人脸检测器（提供 detect(frame) 方法）
+            tracker: 跟踪器类型，"none" 表示每帧都检测
+            redetect_interval: 连续跟踪多少帧后强制重新检测
+            min_confidence: 跟踪置信度低于该值时立即重新检测
+        """
+        self.detector = detector
+        self.tracker = None if tracker == "none" else create_tracker(tracker)
+        self.redetect_interval = redetect_interval
+        self.min_confidence = min_confidence
+
+        self.tracking = False
+        self.frames_since_detection = 0
+
+        # 统计信息
+        self.detections = 0
+        self.tracked_frames = 0
+        self.tracking_failures = 0
+
+    @property
+    def tracker_kind(self):
+        return self.tracker.kind if self.tracker is not None else "none"
+
+    def reset(self):
+        """丢弃当前跟踪目标"""
+        self.tracking = False
+        self.frames_since_detection = 0
+
+    def _detect(self, frame):
+        self.detections += 1
+        faces = list(self.detector.detect(frame))
+        self.frames_since_detection = 0
+        if faces and self.tracker is not None:
+            largest = max(faces, key=lambda box: box[2] * box[3])
+            self.tracker.init(frame, largest)
+            self.tracking = True
+        else:
+            self.tracking = False
+        return faces
+
+    def update(self, frame):
+        """
+        处理一帧
+
+        Returns:
+            原图坐标系下的人脸框列表 [(x, y, w, h), ...]
+        """
+        if not self.tracking or self.frames_since_detection >= self.redetect_interval:
+            return self._detect(frame)
+
+        ok, box, confidence = self.tracker.update(frame)
+        if not ok or confidence < self.min_confidence:
+            self.tracking_failures += 1
+            return self._detect(frame)
+
+        self.frames_since_detection += 1
+        self.tracked_frames += 1
+        return [box]
+
+    def get_stats(self) -> dict:
+        frames = self.detections + self.tracked_frames
+        return {
+            "tracker": self.tracker_kind,
+            "detections": self.detections,
+            "tracked_frames": self.tracked_frames,
+            "tracking_failures": self.tracking_failures,
+            "detection_ratio": self.detections / frames if frames else 0.0
+        }
+
+
+class DistanceFilter:
+    """距离中值滤波：最近若干帧的中值，样本不足时不给出结果"""
+
+    def __init__(self, window=5, min_samples=3, max_missing=3):
+        """
+        Args:
+            window: 参与滤波的最近帧数
+            min_samples: 至少有多少帧测量才输出距离
+            max_missing: 连续多少帧没有人脸后清空历史
+        """
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.max_missing = max_missing
+        self.missing = 0
+
+    def update(self, distance):
+        """
+        输入本帧距离（没有人脸时传None），返回滤波后的距离或None
+        """
+        if distance is None:
+            self.missing += 1
+            if self.missing >= self.max_missing:
+                self.samples.clear()
+            return None
+
+        self.missing = 0
+        self.samples.append(distance)
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[len(ordered) // 2]
+
+    def reset(self):
+        self.samples.clear()
+        self.missing = 0
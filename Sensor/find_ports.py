@@ -7,10 +7,10 @@ import serial
 import glob
 import time
 
-def get_available_serial_ports():
+def get_available_serial_ports(patterns=None):
     """Get list of available serial ports"""
     ports = []
-    patterns = ['/dev/ttyUSB*', '/dev/ttyACM*', '/dev/ttyAMA*', '/dev/ttyS*']
+    patterns = patterns or ['/dev/ttyUSB*', '/dev/ttyACM*', '/dev/ttyAMA*', '/dev/ttyS*']
     
     for pattern in patterns:
         ports.extend(glob.glob(pattern))
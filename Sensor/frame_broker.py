@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+摄像头帧共享服务
+由一个进程独占摄像头，把帧写入共享内存环形缓冲区；
+按键、人脸检测和Agent进程从共享内存读取最新帧，无需各自打开摄像头
+
+用法:
+    python frame_broker.py [--camera 0] [--width 640] [--height 480] [--slots 4]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import time
+
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:
+    resource_tracker = None
+
+logger = logging.getLogger(__name__)
+
+# 共享内存头部布局（int64）
+MAGIC = 0x46524447  # "FRDG"
+HEADER_FIELDS = 8
+H_MAGIC, H_WIDTH, H_HEIGHT, H_CHANNELS, H_SLOTS, H_LATEST_SEQ, H_HEARTBEAT_NS, H_WRITER_PID = range(HEADER_FIELDS)
+
+# 超过该时间没有新帧，视为服务已停止
+STALE_SECONDS = 2.0
+
+
+def shm_name_for_camera(camera_index) -> str:
+    return f"fridge_camera_{camera_index}"
+
+
+def _header_size(slots):
+    # 头部 + 每个槽位的序号和时间戳
+    return (HEADER_FIELDS + 2 * slots) * 8
+
+
+class _RingLayout:
+    """共享内存中环形缓冲区的视图"""
+
+    def __init__(self, buf, width, height, channels, slots):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.slots = slots
+        self.frame_bytes = width * height * channels
+
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buf, offset=0)
+        self.slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=HEADER_FIELDS * 8)
+        self.slot_ts = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=(HEADER_FIELDS + slots) * 8)
+        self.frames = np.ndarray((slots, height, width, channels), dtype=np.uint8,
+                                 buffer=buf, offset=_header_size(slots))
+
+
+class FrameBroker:
+    """独占摄像头并把帧发布到共享内存"""
+
+    def __init__(self, camera_index=0, width=640, height=480, slots=4, fps=30):
+        self.camera_index = camera_index
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.fps = fps
+        self.name = shm_name_for_camera(camera_index)
+
+        self.cap = None
+        self.shm = None
+        self.ring = None
+        self.seq = 0
+        self.running = False
+
+    def _create_shm(self):
+        size = _header_size(self.slots) + self.slots * self.width * self.height * 3
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # 上次异常退出残留的共享内存
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+
+        self.ring = _RingLayout(self.shm.buf, self.width, self.height, 3, self.slots)
+        self.ring.slot_seq[:] = -1
+        self.ring.slot_ts[:] = 0
+        header = self.ring.header
+        header[H_WIDTH] = self.width
+        header[H_HEIGHT] = self.height
+        header[H_CHANNELS] = 3
+        header[H_SLOTS] = self.slots
+        header[H_LATEST_SEQ] = -1
+        header[H_HEARTBEAT_NS] = time.time_ns()
+        header[H_WRITER_PID] = os.getpid()
+        # 最后写入魔数，读者看到魔数即布局有效
+        header[H_MAGIC] = MAGIC
+
+    def open(self) -> bool:
+        self.cap = cv2.VideoCapture(self.camera_index)
+        if not self.cap.isOpened():
+            logger.error(f"无法打开摄像头 {self.camera_index}")
+            return False
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        self._create_shm()
+        logger.info(f"帧共享服务已启动: 摄像头{self.camera_index} -> {self.name} "
+                    f"({self.width}x{self.height}, {self.slots}槽)")
+        return True
+
+    def publish(self, frame):
+        """写入一帧（序号锁：写入期间槽位序号为-1，读者据此丢弃半写的帧）"""
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+        slot = self.seq % self.slots
+        ring = self.ring
+        ring.slot_seq[slot] = -1
+        ring.frames[slot] = frame
+        now_ns = time.time_ns()
+        ring.slot_ts[slot] = now_ns
+        ring.slot_seq[slot] = self.seq
+        ring.header[H_LATEST_SEQ] = self.seq
+        ring.header[H_HEARTBEAT_NS] = now_ns
+        self.seq += 1
+
+    def run(self):
+        if self.shm is None and not self.open():
+            return
+        self.running = True
+        failures = 0
+        try:
+            while self.running:
+                ret, frame = self.cap.read()
+                if not ret:
+                    failures += 1
+                    if failures >= 50:
+                        logger.error("连续读取摄像头失败，尝试重新打开")
+                        self.cap.release()
+                        time.sleep(1)
+                        self.cap = cv2.VideoCapture(self.camera_index)
+                        failures = 0
+                    time.sleep(0.02)
+                    continue
+                failures = 0
+                self.publish(frame)
+        finally:
+            self.close()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.shm is not None:
+            self.ring = None
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = None
+
+
+class SharedCamera:
+    """
+    共享内存摄像头客户端，接口与cv2.VideoCapture兼容（read/grab/isOpened/release/set）
+
+    read() 总是立即返回最新一帧的拷贝，不阻塞、不独占摄像头
+    """
+
+    shared = True
+
+    def __init__(self, camera_index=0):
+        self.camera_index = camera_index
+        self.name = shm_name_for_camera(camera_index)
+        self.shm = shared_memory.SharedMemory(name=self.name)
+        # 读者不负责删除共享内存（Python<3.13的resource_tracker会在进程退出时误删）
+        if resource_tracker is not None:
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        if header[H_MAGIC] != MAGIC:
+            self.shm.close()
+            raise RuntimeError(f"共享内存 {self.name} 未初始化")
+        self.ring = _RingLayout(self.shm.buf, int(header[H_WIDTH]), int(header[H_HEIGHT]),
+                                int(header[H_CHANNELS]), int(header[H_SLOTS]))
+        self.last_seq = -1
+
+    def is_alive(self) -> bool:
+        """帧共享服务是否仍在发布新帧"""
+        if self.ring is None:
+            return False
+        heartbeat = self.ring.header[H_HEARTBEAT_NS]
+        return (time.time_ns() - heartbeat) / 1e9 < STALE_SECONDS
+
+    def read_latest(self):
+        """
+        读取最新帧
+
+        Returns:
+            (seq, timestamp, frame)，没有可用帧时返回 (None, None, None)
+        """
+        if self.ring is None:
+            return None, None, None
+        ring = self.ring
+        for _ in range(3):
+            seq = int(ring.header[H_LATEST_SEQ])
+            if seq < 0:
+                return None, None, None
+            slot = seq % ring.slots
+            if ring.slot_seq[slot] != seq:
+                continue
+            frame = ring.frames[slot].copy()
+            ts = int(ring.slot_ts[slot])
+            # 拷贝期间槽位被覆盖则重试
+            if ring.slot_seq[slot] == seq:
+                self.last_seq = seq
+                return seq, ts / 1e9, frame
+        return None, None, None
+
+    def read(self):
+        if not self.is_alive():
+            return False, None
+        seq, _, frame = self.read_latest()
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def grab(self):
+        return self.is_alive()
+
+    def isOpened(self):
+        return self.is_alive()
+
+    def set(self, prop_id, value):
+        # 摄像头参数由帧共享服务统一设置
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ring.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.ring.height)
+        return 0.0
+
+    def release(self):
+        if self.shm is not None:
+            self.ring = None
+            self.shm.close()
+            self.shm = None
+
+
+def open_camera(camera_index=0, prefer_shared=True):
+    """
+    打开摄像头：帧共享服务在运行时使用共享内存，否则直接打开设备
+
+    Returns:
+        SharedCamera 或 cv2.VideoCapture
+    """
+    if prefer_shared:
+        try:
+            camera = SharedCamera(camera_index)
+            if camera.is_alive():
+                logger.info(f"使用共享摄像头帧: {camera.name}")
+                return camera
+            camera.release()
+        except (FileNotFoundError, RuntimeError, ValueError):
+            pass
+    return cv2.VideoCapture(camera_index)
+
+
+def is_shared_camera(cap) -> bool:
+    return getattr(cap, "shared", False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="摄像头帧共享服务")
+    parser.add_argument("--camera", type=int, default=0, help="摄像头索引")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--slots", type=int, default=4, help="环形缓冲区槽位数")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    broker = FrameBroker(args.camera, args.width, args.height, args.slots, args.fps)
+
+    def handle_signal(signum, frame):
+        broker.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    if not broker.open():
+        sys.exit(1)
+    broker.run()
+
+
+if __name__ == "__main__":
+    main()
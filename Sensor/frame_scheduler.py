@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应帧率调度
+无人时低频检测，出现运动或人脸时提高帧率，触发接近事件后在冷却期内降频，
+替代检测循环中固定的 time.sleep(0.1)
+"""
+
+import os
+import threading
+import time
+
+# 各状态下的检测帧率（帧/秒）
+DEFAULT_RATES = {
+    "idle": 2.0,      # 画面无变化
+    "motion": 8.0,    # 有运动但未检测到人脸
+    "active": 15.0,   # 检测到人脸，正在接近
+    "cooldown": 1.0,  # 接近事件已触发，冷却中
+}
+
+
+class AdaptiveScheduler:
+    def __init__(self, rates=None, hold_seconds=2.0, cooldown_seconds=3.0, smoothing=0.2):
+        """
+        Args:
+            rates: 各状态的帧率，覆盖 DEFAULT_RATES 中的对应项
+            hold_seconds: 运动/人脸消失后保持较高帧率的时间
+            cooldown_seconds: 事件触发后的冷却时间（与 face_detection_cooldown 一致）
+            smoothing: 实际帧率指数平滑系数
+        """
+        self.rates = dict(DEFAULT_RATES)
+        if rates:
+            self.rates.update(rates)
+        self.hold_seconds = hold_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.smoothing = smoothing
+
+        self.state = "idle"
+        self.last_motion_time = 0.0
+        self.last_face_time = 0.0
+        self.cooldown_until = 0.0
+
+        self._next_tick = None
+        self._last_tick = None
+        self._effective_fps = 0.0
+        self._lock = threading.Lock()
+
+        # 各状态停留时间（秒）
+        self.state_seconds = {state: 0.0 for state in self.rates}
+        self._state_since = time.monotonic()
+
+    @classmethod
+    def from_env(cls, prefix="FRIDGE_SCHED_", **kwargs):
+        """
+        从环境变量读取配置，例如:
+            FRIDGE_SCHED_IDLE_FPS=1 FRIDGE_SCHED_ACTIVE_FPS=20 FRIDGE_SCHED_HOLD_SECONDS=3
+        """
+        rates = {}
+        for state in DEFAULT_RATES:
+            value = os.getenv(f"{prefix}{state.upper()}_FPS")
+            if value:
+                rates[state] = float(value)
+        hold = os.getenv(f"{prefix}HOLD_SECONDS")
+        if hold:
+            kwargs["hold_seconds"] = float(hold)
+        return cls(rates=rates, **kwargs)
+
+    def _set_state(self, state, now):
+        if state != self.state:
+            self.state_seconds[self.state] += now - self._state_since
+            self._state_since = now
+            self.state = state
+            # 帧率提高时立即生效，不等待上一个较长的间隔
+            if self._next_tick is not None:
+                self._next_tick = min(self._next_tick, now + 1.0 / self.rates[state])
+
+    def _update_state(self, now):
+        if now < self.cooldown_until:
+            state = "cooldown"
+        elif now - self.last_face_time < self.hold_seconds:
+            state = "active"
+        elif now - self.last_motion_time < self.hold_seconds:
+            state = "motion"
+        else:
+            state = "idle"
+        self._set_state(state, now)
+
+    def report(self, motion=False, face=False, event=False):
+        """报告本帧的检测结果"""
+        now = time.monotonic()
+        with self._lock:
+            if motion:
+                self.last_motion_time = now
+            if face:
+                self.last_face_time = now
+                self.last_motion_time = now
+            if event:
+                self.cooldown_until = now + self.cooldown_seconds
+            self._update_state(now)
+
+    def wait(self, stop_event=None):
+        """
+        等待到下一次检测时间（扣除本帧处理耗时）
+
+        Args:
+            stop_event: threading.Event，置位时提前返回
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._update_state(now)
+            interval = 1.0 / self.rates[self.state]
+            if self._next_tick is None or now - self._next_tick > interval:
+                # 首次调用或处理耗时超过一个周期：从现在重新计时
+                self._next_tick = now
+            self._next_tick += interval
+            delay = self._next_tick - now
+
+        if delay > 0:
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+        now = time.monotonic()
+        with self._lock:
+            if self._last_tick is not None:
+                fps = 1.0 / max(now - self._last_tick, 1e-6)
+                if self._effective_fps:
+                    self._effective_fps += self.smoothing * (fps - self._effective_fps)
+                else:
+                    self._effective_fps = fps
+            self._last_tick = now
+
+    @property
+    def target_fps(self) -> float:
+        return self.rates[self.state]
+
+    @property
+    def effective_fps(self) -> float:
+        return self._effective_fps
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            seconds = dict(self.state_seconds)
+            seconds[self.state] += now - self._state_since
+            return {
+                "state": self.state,
+                "target_fps": self.rates[self.state],
+                "effective_fps": self._effective_fps,
+                "rates": dict(self.rates),
+                "state_seconds": seconds
+            }
+
+    def format_stats(self) -> str:
+        stats = self.get_stats()
+        return (f"调度: {stats['state']} 目标 {stats['target_fps']:.1f}fps, "
+                f"实际 {stats['effective_fps']:.1f}fps")
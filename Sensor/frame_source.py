@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧来源
+统一摄像头、录制的视频文件和图片目录，接口与cv2.VideoCapture兼容，
+用于在录像上重放并复现检测流程
+
+来源描述（open_frame_source 的参数）:
+    0, "0"              摄像头索引（帧共享服务运行时从共享内存读取）
+    "clips/a.mp4"       视频文件
+    "clips/night/"      图片目录（按文件名排序）
+"""
+
+import os
+import time
+
+import cv2
+
+from frame_broker import open_camera
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+class _ReplaySource:
+    """
+    录像重放基类
+
+    realtime=True 时按录像帧率节流，模拟实时摄像头；False 时以最快速度读取。
+    timestamp 为当前帧在录像中的时间（秒），用于按录像时间计算冷却等逻辑。
+    """
+
+    shared = False
+
+    def __init__(self, fps, realtime=True, loop=False):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.frame_index = -1
+        self.timestamp = 0.0
+        self._start_wall = None
+        self._opened = True
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def _rewind(self):
+        raise NotImplementedError
+
+    def _throttle(self):
+        if not self.realtime:
+            return
+        if self._start_wall is None:
+            self._start_wall = time.monotonic() - self.timestamp
+        delay = self._start_wall + self.timestamp - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        frame = self._next_frame()
+        if frame is None and self.loop:
+            self._rewind()
+            self._start_wall = None
+            frame = self._next_frame()
+        if frame is None:
+            return False, None
+
+        self.frame_index += 1
+        self.timestamp = self.frame_index / self.fps
+        self._throttle()
+        return True, frame
+
+    def grab(self):
+        return self.read()[0]
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, prop_id, value):
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index + 1)
+        if prop_id == cv2.CAP_PROP_POS_MSEC:
+            return self.timestamp * 1000.0
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+
+class VideoFileSource(_ReplaySource):
+    """重放视频文件"""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime, loop)
+        self._opened = self.cap.isOpened()
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class ImageDirSource(_ReplaySource):
+    """按文件名顺序重放图片目录"""
+
+    def __init__(self, path, fps=10.0, realtime=True, loop=False):
+        self.path = path
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._position = 0
+        super().__init__(fps, realtime, loop)
+        self._opened = bool(self.files)
+
+    def _next_frame(self):
+        while self._position < len(self.files):
+            frame = cv2.imread(self.files[self._position])
+            self._position += 1
+            if frame is not None:
+                return frame
+        return None
+
+    def _rewind(self):
+        self._position = 0
+
+
+def open_frame_source(source=0, realtime=True, loop=False, fps=10.0):
+    """
+    打开帧来源
+
+    Args:
+        source: 摄像头索引、视频文件路径或图片目录
+        realtime: 录像是否按原始帧率节流
+        loop: 录像播放结束后是否从头循环
+        fps: 图片目录的帧率
+
+    Returns:
+        与cv2.VideoCapture接口兼容的对象
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return open_camera(int(source))
+    if os.path.isdir(source):
+        return ImageDirSource(source, fps=fps, realtime=realtime, loop=loop)
+    return VideoFileSource(source, realtime=realtime, loop=loop)
+
+
+def is_replay_source(cap) -> bool:
+    return isinstance(cap, _ReplaySource)
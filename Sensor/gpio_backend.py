@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPIO后端
+- rpi: 树莓派 RPi.GPIO
+- simulated: 模拟按键，可按脚本高速重放按键序列，用于在普通Linux机器上运行和压测按键流程
+
+选择方式：FRIDGE_GPIO_BACKEND=auto/rpi/simulated（auto 在无法导入RPi.GPIO时使用模拟后端）
+
+按键脚本格式（JSON）:
+    [{"at": 0.0, "pin": 16}, {"at": 0.25, "pin": 17}, ...]
+或文本，每行 "时间(秒) 引脚":
+    0.00 16
+    0.25 17
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RPiGPIOBackend:
+    name = "rpi"
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setmode(GPIO.BCM)
+
+    def setup_input(self, pin, pull_down=True):
+        pull = self.GPIO.PUD_DOWN if pull_down else self.GPIO.PUD_UP
+        self.GPIO.setup(pin, self.GPIO.IN, pull_up_down=pull)
+
+    def add_edge_callback(self, pin, callback, bouncetime=200, rising=True):
+        edge = self.GPIO.RISING if rising else self.GPIO.FALLING
+        self.GPIO.add_event_detect(pin, edge, callback=callback, bouncetime=bouncetime)
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+
+class SimulatedGPIOBackend:
+    """
+    模拟GPIO：与RPi.GPIO一样在单独的回调线程中依次调用回调，并按bouncetime忽略过近的边沿
+    """
+    name = "simulated"
+
+    def __init__(self, bounce_edges=0):
+        """
+        Args:
+            bounce_edges: 每次按下额外产生的抖动边沿数（间隔1毫秒），用于检验防抖
+        """
+        self.bounce_edges = bounce_edges
+        self.callbacks = {}
+        self.last_edge = {}
+        self._edges = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._callback_loop, name="gpio-sim-callbacks", daemon=True)
+        self._thread.start()
+
+        self.pressed = 0
+        self.suppressed = 0
+
+    def setup_input(self, pin, pull_down=True):
+        pass
+
+    def add_edge_callback(self, pin, callback, bouncetime=200, rising=True):
+        with self._lock:
+            self.callbacks[pin] = (callback, bouncetime / 1000.0)
+            self.last_edge[pin] = float("-inf")
+
+    def press(self, pin):
+        """模拟一次按下（上升沿）"""
+        now = time.monotonic()
+        self._edges.put((pin, now))
+        for index in range(self.bounce_edges):
+            self._edges.put((pin, now + 0.001 * (index + 1)))
+
+    def _callback_loop(self):
+        while True:
+            pin, edge_time = self._edges.get()
+            if pin is None:
+                break
+            with self._lock:
+                entry = self.callbacks.get(pin)
+                if entry is None:
+                    continue
+                callback, bouncetime = entry
+                # 与RPi.GPIO的bouncetime一致：距上一次边沿太近的忽略
+                if edge_time - self.last_edge[pin] < bouncetime:
+                    self.suppressed += 1
+                    continue
+                self.last_edge[pin] = edge_time
+                self.pressed += 1
+            try:
+                callback(pin)
+            except Exception as e:
+                logger.error(f"GPIO回调出错 (引脚{pin}): {e}")
+
+    def play(self, script, speed=1.0, stop_event=None):
+        """
+        按脚本重放按键序列
+
+        Args:
+            script: [(时间秒, 引脚), ...]，时间相对脚本开始
+            speed: 重放倍速，>1 更快
+            stop_event: threading.Event，置位时停止重放
+        """
+        start = time.monotonic()
+        for at, pin in sorted(script):
+            delay = start + at / speed - time.monotonic()
+            if delay > 0:
+                if stop_event is not None:
+                    if stop_event.wait(delay):
+                        return
+                else:
+                    time.sleep(delay)
+            self.press(pin)
+
+    def cleanup(self):
+        self._edges.put((None, None))
+        self._thread.join(timeout=2)
+
+
+def load_press_script(path):
+    """读取按键脚本（JSON或文本），返回 [(时间秒, 引脚), ...]"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return [(float(item["at"]), int(item["pin"])) for item in json.loads(content)]
+    script = []
+    for line in content.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            at, pin = line.split()
+            script.append((float(at), int(pin)))
+    return script
+
+
+def generate_press_script(pins, count, rate):
+    """生成按键序列：各引脚轮流按下，共count次，每秒rate次"""
+    return [(index / float(rate), pins[index % len(pins)]) for index in range(count)]
+
+
+def create_gpio_backend(backend=None):
+    """
+    Args:
+        backend: auto/rpi/simulated，默认读取 FRIDGE_GPIO_BACKEND
+    """
+    backend = (backend or os.getenv("FRIDGE_GPIO_BACKEND", "auto")).lower()
+    if backend == "simulated":
+        return SimulatedGPIOBackend()
+    try:
+        return RPiGPIOBackend()
+    except (ImportError, RuntimeError) as e:
+        if backend == "rpi":
+            raise
+        logger.warning(f"⚠️ 无法使用RPi.GPIO ({e})，使用模拟GPIO后端")
+        return SimulatedGPIOBackend()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传感器进程访问Web服务器的HTTP客户端
+- 持久Session + 连接池（keep-alive），按键/接近事件不再每次建立TCP连接
+- 分别设置连接超时和读取超时
+- 失败重试，退避时间带随机抖动
+- 记录每次调用的耗时
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib3.exceptions import NewConnectionError
+except ImportError:
+    NewConnectionError = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://localhost:8080"
+
+# 这些状态码表示服务器暂时不可用，可以重试
+RETRY_STATUS = (502, 503, 504)
+
+
+def _is_connect_failure(error) -> bool:
+    """请求是否在建立连接阶段就失败（服务器没有收到请求，非幂等请求也可以安全重试）"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and NewConnectionError is not None:
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+class WebClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, pool_size=4, connect_timeout=1.0, read_timeout=10.0,
+                 retries=2, backoff=0.2, max_backoff=2.0):
+        """
+        Args:
+            base_url: Web服务器地址
+            pool_size: 连接池大小（并发请求数）
+            connect_timeout: 连接超时（秒），本机服务应很快建立连接
+            read_timeout: 默认读取超时（秒），可在每次调用时通过timeout覆盖
+            retries: 失败后的最大重试次数
+            backoff: 退避基准时间（秒），第n次重试在 [0, backoff * 2^n] 内随机等待
+            max_backoff: 单次退避的最长时间（秒）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 统计信息
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retried = 0
+        self.total_seconds = 0.0
+
+    def _sleep_backoff(self, attempt):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        time.sleep(delay)
+
+    def request(self, method, path, timeout=None, idempotent=None, **kwargs):
+        """
+        发送请求
+
+        Args:
+            method: HTTP方法
+            path: 路径（如 /api/place-item）或完整URL
+            timeout: 读取超时（秒），默认 read_timeout
+            idempotent: 是否可以在任何失败后重试；默认GET可以，POST只在连接失败时重试
+
+        Returns:
+            requests.Response；重试耗尽后抛出最后一次的requests异常
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        timeout = (self.connect_timeout, timeout if timeout is not None else self.read_timeout)
+
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code in RETRY_STATUS and idempotent and attempt < self.retries:
+                    self._sleep_backoff(attempt)
+                    attempt += 1
+                    continue
+                self._record(method, path, start, attempt, response.status_code)
+                return response
+            except requests.exceptions.RequestException as e:
+                retryable = idempotent or _is_connect_failure(e)
+                if not retryable or attempt >= self.retries:
+                    self._record(method, path, start, attempt, None, e)
+                    raise
+                self._sleep_backoff(attempt)
+                attempt += 1
+
+    def _record(self, method, path, start, attempt, status, error=None):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += elapsed
+            self.retried += attempt
+            if error is not None:
+                self.failures += 1
+        retry_text = f" (重试{attempt}次)" if attempt else ""
+        if error is not None:
+            logger.warning(f"HTTP {method} {path} 失败 {elapsed * 1000:.1f}ms{retry_text}: {error}")
+        else:
+            logger.info(f"HTTP {method} {path} -> {status} {elapsed * 1000:.1f}ms{retry_text}")
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retried,
+                "avg_ms": 1000 * self.total_seconds / self.calls if self.calls else 0.0
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=DEFAULT_BASE_URL) -> WebClient:
+    """进程内共享的客户端（每个服务器地址一个）"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = WebClient(base_url)
+        return client
@@ -1,11 +1,18 @@
 import cv2
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from frame_broker import is_shared_camera
+from frame_source import open_frame_source
 
 class FaceDetector:
-    def __init__(self, camera_index=0):
-        # 初始化摄像头
-        self.cap = cv2.VideoCapture(camera_index)
+    def __init__(self, camera_index=0, max_saved_images=20, ring_size=8, max_frame_age=0.5):
+        # 初始化摄像头（帧共享服务运行时从共享内存读取；也可传入视频文件/图片目录重放）
+        self.camera_index = camera_index
+        self.cap = open_frame_source(camera_index)
+        self.shared = is_shared_camera(self.cap)
         
         # 设置摄像头参数，确保获取最新帧
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 设置缓冲区大小为1
@@ -15,29 +22,114 @@ class FaceDetector:
         self.upload_dir = "uploads"
         os.makedirs(self.upload_dir, exist_ok=True)
         
+        # 本地最多保留的拍照数量（图片上传后由Web服务器统一管理）
+        self.max_saved_images = max_saved_images
+        
         # 测试摄像头是否可用
         ret, frame = self.cap.read()
         if not ret:
             raise Exception("无法读取摄像头")
-        print("📸 摄像头初始化成功，测试读取正常")
+        print("📸 摄像头初始化成功，测试读取正常" + ("（共享内存）" if self.shared else ""))
+
+        # 最近帧环形缓冲区：(时间戳, 帧)，拍照时从中挑选最清晰的一帧
+        self.max_frame_age = max_frame_age
+        self.frames = deque(maxlen=ring_size)
+        self.frames_lock = threading.Lock()
+        self.frames.append((time.time(), frame))
+        self.capture_running = False
+        self.capture_thread = None
+        self.start_capture()
+
+    def start_capture(self):
+        """启动后台采集线程，持续读取摄像头，保持驱动缓冲区中没有旧帧"""
+        if self.capture_running:
+            return
+        self.capture_running = True
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+
+    def stop_capture(self):
+        """停止后台采集线程"""
+        self.capture_running = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=2)
+            self.capture_thread = None
+
+    def _capture_loop(self):
+        last_seq = None
+        while self.capture_running:
+            if self.shared:
+                # 共享内存：只在有新帧时入队
+                seq, timestamp, frame = self.cap.read_latest()
+                if frame is None or seq == last_seq or not self.cap.is_alive():
+                    time.sleep(0.005)
+                    continue
+                last_seq = seq
+            else:
+                ret, frame = self.cap.read()
+                if not ret:
+                    time.sleep(0.05)
+                    continue
+                timestamp = time.time()
+
+            with self.frames_lock:
+                self.frames.append((timestamp, frame))
+
+    @staticmethod
+    def sharpness(frame) -> float:
+        """清晰度评分：拉普拉斯算子方差（越大越清晰，运动模糊的帧分数低）"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        if width > 320:
+            gray = cv2.resize(gray, (320, max(1, int(height * 320 / width))), interpolation=cv2.INTER_AREA)
+        return cv2.Laplacian(gray, cv2.CV_64F).var()
+
+    def latest_frame(self):
+        """最新一帧，没有时返回None"""
+        with self.frames_lock:
+            return self.frames[-1][1] if self.frames else None
+
+    def best_frame(self):
+        """最近max_frame_age秒内最清晰的一帧，没有这么新的帧（采集停滞）时返回None"""
+        with self.frames_lock:
+            recent = list(self.frames)
+        now = time.time()
+        candidates = [frame for timestamp, frame in recent if now - timestamp <= self.max_frame_age]
+        if not candidates:
+            return None
+        return max(candidates, key=self.sharpness)
 
     def detect_and_count_faces(self):
         """这里只读取视频帧并返回"""
+        if self.capture_running:
+            return self.latest_frame()
         ret, frame = self.cap.read()
         if not ret:
             return None
         return frame
 
+    def capture_jpeg(self, quality=90):
+        """
+        拍照并在内存中编码为JPEG
+
+        Returns:
+            (JPEG字节, 帧) 或 (None, None)
+        """
+        frame = self.best_frame()
+        if frame is None:
+            print("❌ 无法读取摄像头帧")
+            return None, None
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            print("❌ JPEG编码失败")
+            return None, None
+        return buffer.tobytes(), frame
+
     def capture_image(self):
         """拍照并保存图片"""
         try:
-            # 清空摄像头缓冲区，确保获取最新帧
-            for _ in range(5):  # 跳过前几帧，确保获取最新图像
-                self.cap.grab()
-            
-            ret, frame = self.cap.read()
-            if not ret:
-                print("❌ 无法读取摄像头帧")
+            data, frame = self.capture_jpeg()
+            if data is None:
                 return None
             
             # 生成唯一文件名
@@ -46,16 +138,36 @@ class FaceDetector:
             filepath = os.path.join(self.upload_dir, filename)
             
             # 保存图片
-            cv2.imwrite(filepath, frame)
+            with open(filepath, "wb") as f:
+                f.write(data)
             
             print(f"📸 拍照成功: {filepath}")
             print(f"📸 图片尺寸: {frame.shape}")
+            
+            self._prune_captures()
             return filepath
             
         except Exception as e:
             print(f"❌ 拍照失败: {e}")
             return None
 
+    def _prune_captures(self):
+        """只保留最近的若干张拍照，避免SD卡被占满"""
+        try:
+            captures = sorted(
+                name for name in os.listdir(self.upload_dir)
+                if name.startswith("captured_food_") and name.endswith(".jpg")
+            )
+            for name in captures[:-self.max_saved_images]:
+                os.remove(os.path.join(self.upload_dir, name))
+        except Exception as e:
+            print(f"⚠️ 清理旧照片失败: {e}")
+
+    def release(self):
+        """停止采集并释放摄像头"""
+        self.stop_capture()
+        self.cap.release()
+
     def run(self):
         """运行视频显示程序"""
         try:
@@ -67,11 +179,11 @@ class FaceDetector:
                 cv2.imshow('Video Stream', frame)
 
                 # 按'q'键退出
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if cv2.waitKey(30) & 0xFF == ord('q'):
                     break
 
         finally:
-            self.cap.release()
+            self.release()
             cv2.destroyAllWindows()
 
 def main():
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运动控制器（ESP32）串口驱动
+写线程发送命令、读线程接收应答，命令队列跟踪每条命令的应答和超时，
+可以不等上一条应答就连续发送多条命令（流水线），例如升降和旋转同时下发
+
+协议（5字节帧，在 step.py 的4字节帧中加入序号）:
+    升降: 0xFE, 距离高字节, 距离低字节, 序号, 0x0E   （距离单位毫米，最大 0xEFFF）
+    旋转: 0xFE, 0xF1, 扇区编号, 序号, 0x0E
+    取物: 0xFE, 0xF2, 0x00, 序号, 0x0E
+    握手: 0xFE, 0xF0, 0x00, 序号, 0x0E   （连接时识别控制器，不动作）
+高字节 0xF0 以上保留给非升降命令。序号不取 0xFE 和 0x0E，只认4字节帧的旧固件在帧尾校验处即会拒绝新帧，
+不会把它当成升降命令。控制器按接收顺序执行，每完成一条命令回复一行文本，带回该命令的序号:
+    "OK <序号> ..." 表示成功，"ERR <序号> ..." 表示失败，其他行作为日志忽略
+应答按序号与在途命令匹配：超时命令的迟到应答被丢弃，不会记到下一条命令上
+（固件需要支持序号和握手命令，握手应答为 "OK <序号> ping"）
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from step import HEADER, TAIL
+
+logger = logging.getLogger(__name__)
+
+CMD_PING = 0xF0
+CMD_TURN = 0xF1
+CMD_FETCH = 0xF2
+MAX_LIFT_MM = 0xEFFF
+
+# 各命令默认应答超时（秒）
+DEFAULT_TIMEOUTS = {"lift": 15.0, "turn": 10.0, "fetch": 20.0}
+
+
+# 序号不使用帧头和帧尾的值
+RESERVED_SEQUENCES = (HEADER, TAIL)
+
+
+def next_sequence(seq) -> int:
+    seq = (seq + 1) & 0xFF
+    while seq in RESERVED_SEQUENCES:
+        seq = (seq + 1) & 0xFF
+    return seq
+
+
+def encode_frame(payload, seq) -> bytes:
+    """payload 为两个字节（命令/距离高字节, 参数/距离低字节）"""
+    return bytes([HEADER, payload[0], payload[1], seq, TAIL])
+
+
+def lift_payload(distance_mm) -> bytes:
+    distance = max(0, min(MAX_LIFT_MM, int(distance_mm)))
+    return bytes([(distance >> 8) & 0xFF, distance & 0xFF])
+
+
+def turn_payload(section) -> bytes:
+    return bytes([CMD_TURN, int(section) & 0xFF])
+
+
+FETCH_PAYLOAD = bytes([CMD_FETCH, 0x00])
+PING_PAYLOAD = bytes([CMD_PING, 0x00])
+
+
+def encode_ping_packet(seq) -> bytes:
+    return encode_frame(PING_PAYLOAD, seq)
+
+
+def parse_reply(line, ack_prefix="OK", error_prefix="ERR"):
+    """解析应答行，返回 (是否成功, 序号)；不是带序号的应答返回 None"""
+    parts = line.split()
+    if len(parts) < 2 or parts[0] not in (ack_prefix, error_prefix) or not parts[1].isdigit():
+        return None
+    return parts[0] == ack_prefix, int(parts[1])
+
+
+class MotionCommand:
+    """一条已提交的命令，wait() 等待控制器应答"""
+
+    def __init__(self, name, payload, timeout):
+        self.name = name
+        self.payload = payload
+        self.timeout = timeout
+        self.seq = None
+        self.submitted_at = time.monotonic()
+        self.sent_at = None
+        self.done_at = None
+        self.ok = None
+        self.response = None
+        self._done = threading.Event()
+
+    def complete(self, ok, response):
+        self.ok = ok
+        self.response = response
+        self.done_at = time.monotonic()
+        self._done.set()
+
+    def wait(self, timeout=None) -> bool:
+        """等待应答，返回是否成功；超时未完成返回 False"""
+        if not self._done.wait(timeout):
+            return False
+        return bool(self.ok)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def latency(self):
+        """从发送到应答的耗时（秒）"""
+        if self.sent_at is None or self.done_at is None:
+            return None
+        return self.done_at - self.sent_at
+
+
+class MotionController:
+    def __init__(self, port, baudrate=9600, level_height_mm=None, max_in_flight=2, timeouts=None,
+                 ack_prefix="OK", error_prefix="ERR"):
+        """
+        Args:
+            port: 串口设备名，或已打开的串口对象（需支持 write/readline）
+            baudrate: 波特率
+            level_height_mm: 每层高度（毫米），第n层的升降距离为 n * level_height_mm
+            max_in_flight: 最多同时在途（已发送未应答）的命令数，1 为不使用流水线
+            timeouts: 各命令的应答超时，覆盖 DEFAULT_TIMEOUTS 中的对应项
+            ack_prefix / error_prefix: 成功/失败应答行的前缀
+        """
+        if isinstance(port, str):
+            import serial
+            self.serial = serial.Serial(port, baudrate, timeout=0.1, write_timeout=1.0)
+            self.port_name = port
+        else:
+            self.serial = port
+            self.port_name = getattr(port, "port", None) or getattr(port, "name", "custom")
+
+        self.level_height_mm = level_height_mm or int(os.getenv("FRIDGE_LEVEL_HEIGHT_MM", "200"))
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.ack_prefix = ack_prefix
+        self.error_prefix = error_prefix
+
+        self._commands = queue.Queue()
+        self._in_flight = deque()
+        self._seq = 0
+        self._window = threading.Condition()
+        self.running = True
+        # 串口读写出错时记录原因（如设备被拔出），由端口管理器据此重连
+        self.error = None
+
+        # 统计信息
+        self.sent = 0
+        self.acked = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.late_acks = 0
+        self.ack_latency_total = 0.0
+
+        self._writer = threading.Thread(target=self._writer_loop, name="motion-writer", daemon=True)
+        self._reader = threading.Thread(target=self._reader_loop, name="motion-reader", daemon=True)
+        self._writer.start()
+        self._reader.start()
+        logger.info(f"🔌 运动控制器已连接: {self.port_name}（流水线深度 {self.max_in_flight}）")
+
+    # ---- 命令接口 ----
+
+    def submit(self, name, payload, timeout=None) -> MotionCommand:
+        """提交命令，立即返回，不等待应答；序号在发送时分配"""
+        command = MotionCommand(name, payload, timeout or self.timeouts.get(name, 10.0))
+        if not self.running:
+            command.complete(False, "controller closed")
+            return command
+        self._commands.put(command)
+        return command
+
+    def lift(self, level_index, wait=True):
+        command = self.submit("lift", lift_payload(level_index * self.level_height_mm))
+        return command.wait() if wait else command
+
+    def turn(self, section_index, wait=True):
+        command = self.submit("turn", turn_payload(section_index))
+        return command.wait() if wait else command
+
+    def fetch(self, wait=True):
+        command = self.submit("fetch", FETCH_PAYLOAD)
+        return command.wait() if wait else command
+
+    def move_and_fetch(self, level_index, section_index) -> bool:
+        """升降和旋转一起下发，两者都完成后再取物"""
+        lift = self.lift(level_index, wait=False)
+        turn = self.turn(section_index, wait=False)
+        if not (lift.wait() and turn.wait()):
+            return False
+        return self.fetch()
+
+    # ---- 读写线程 ----
+
+    def _writer_loop(self):
+        while self.running:
+            try:
+                command = self._commands.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._window:
+                # 在途命令达到上限时等待应答腾出位置
+                while self.running and len(self._in_flight) >= self.max_in_flight:
+                    self._window.wait(0.5)
+                if not self.running:
+                    command.complete(False, "controller closed")
+                    continue
+                self._seq = next_sequence(self._seq)
+                command.seq = self._seq
+                command.sent_at = time.monotonic()
+                self._in_flight.append(command)
+            try:
+                self.serial.write(encode_frame(command.payload, command.seq))
+                self.sent += 1
+            except Exception as e:
+                logger.error(f"串口写入失败 ({command.name}): {e}")
+                self.error = f"write failed: {e}"
+                self._finish(command, False, f"write failed: {e}")
+
+    def _reader_loop(self):
+        while self.running:
+            try:
+                raw = self.serial.readline()
+            except Exception as e:
+                if self.running:
+                    logger.error(f"串口读取失败: {e}")
+                    self.error = f"read failed: {e}"
+                    self._fail_all(f"read failed: {e}")
+                    time.sleep(0.5)
+                continue
+            self._expire()
+            if not raw:
+                continue
+            line = raw.decode(errors="ignore").strip()
+            if not line:
+                continue
+            reply = parse_reply(line, self.ack_prefix, self.error_prefix)
+            if reply is None:
+                logger.debug(f"控制器: {line}")
+                continue
+            self._complete_seq(reply[0], reply[1], line)
+
+    def _complete_seq(self, ok, seq, line):
+        with self._window:
+            command = next((c for c in self._in_flight if c.seq == seq), None)
+            if command is None:
+                self.late_acks += 1
+        if command is None:
+            # 已超时命令的迟到应答，或不属于本连接的应答
+            logger.warning(f"⚠️ 丢弃无对应命令的应答: {line}")
+            return
+        self._finish(command, ok, line)
+
+    def _finish(self, command, ok, response):
+        with self._window:
+            if command in self._in_flight:
+                self._in_flight.remove(command)
+            if ok:
+                self.acked += 1
+                self.ack_latency_total += time.monotonic() - command.sent_at
+            else:
+                self.failed += 1
+            self._window.notify_all()
+        if not ok:
+            logger.warning(f"⚠️ 命令 {command.name} 失败: {response}")
+        command.complete(ok, response)
+
+    def _expire(self):
+        """在途命令超过应答超时的按失败处理"""
+        now = time.monotonic()
+        with self._window:
+            expired = [c for c in self._in_flight if now - c.sent_at > c.timeout]
+            self.timed_out += len(expired)
+        for command in expired:
+            self._finish(command, False, "ack timeout")
+
+    def _fail_all(self, reason):
+        with self._window:
+            pending = list(self._in_flight)
+        for command in pending:
+            self._finish(command, False, reason)
+
+    # ---- 状态 ----
+
+    @property
+    def healthy(self) -> bool:
+        return self.running and self.error is None
+
+    def get_stats(self) -> dict:
+        with self._window:
+            return {
+                "port": self.port_name,
+                "sent": self.sent,
+                "acked": self.acked,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "late_acks": self.late_acks,
+                "in_flight": len(self._in_flight),
+                "error": self.error,
+                "queued": self._commands.qsize(),
+                "avg_ack_ms": 1000 * self.ack_latency_total / self.acked if self.acked else 0.0
+            }
+
+    def close(self):
+        self.running = False
+        with self._window:
+            self._window.notify_all()
+        self._fail_all("controller closed")
+        while True:
+            try:
+                self._commands.get_nowait().complete(False, "controller closed")
+            except queue.Empty:
+                break
+        self._writer.join(timeout=2)
+        self._reader.join(timeout=2)
+        try:
+            self.serial.close()
+        except Exception:
+            pass
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运动门控
+在缩小的灰度帧上做背景差分，只有画面中有足够的运动时才运行人脸检测，
+降低无人时的CPU占用
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, downsample_width=160, pixel_threshold=25, motion_threshold=0.01,
+                 learning_rate=0.05, hold_seconds=2.0):
+        """
+        Args:
+            downsample_width: 差分计算使用的帧宽度（像素）
+            pixel_threshold: 像素灰度变化超过该值视为变化
+            motion_threshold: 变化像素比例超过该值视为有运动
+            learning_rate: 背景模型更新速度
+            hold_seconds: 运动停止后继续运行检测的时间（人站定后仍能被检测到）
+        """
+        self.downsample_width = downsample_width
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.learning_rate = learning_rate
+        self.hold_seconds = hold_seconds
+
+        self.background = None
+        self.last_motion_time = 0
+        self.last_motion_ratio = 0.0
+        self.active = True
+
+        # 统计信息
+        self.frames = 0
+        self.motion_frames = 0
+        self.gated_frames = 0
+
+        # CPU占用统计（按上一帧的门控状态归入空闲/活跃）
+        self._last_wall = None
+        self._last_cpu = None
+        self.idle_wall_seconds = 0.0
+        self.idle_cpu_seconds = 0.0
+        self.active_wall_seconds = 0.0
+        self.active_cpu_seconds = 0.0
+
+    def _preprocess(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downsample_width / float(width)
+        small = cv2.resize(frame, (self.downsample_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _account_cpu(self):
+        """把上一帧到现在的耗时计入空闲或活跃状态"""
+        now_wall = time.monotonic()
+        now_cpu = time.thread_time()
+        if self._last_wall is not None:
+            wall = now_wall - self._last_wall
+            cpu = now_cpu - self._last_cpu
+            if self.active:
+                self.active_wall_seconds += wall
+                self.active_cpu_seconds += cpu
+            else:
+                self.idle_wall_seconds += wall
+                self.idle_cpu_seconds += cpu
+        self._last_wall = now_wall
+        self._last_cpu = now_cpu
+
+    def update(self, frame) -> bool:
+        """输入一帧，返回是否需要运行人脸检测"""
+        self._account_cpu()
+        self.frames += 1
+
+        gray = self._preprocess(frame)
+
+        if self.background is None or self.background.shape != gray.shape:
+            # 第一帧没有背景可比较，直接运行检测
+            self.background = gray.astype(np.float32)
+            self.last_motion_time = time.monotonic()
+            self.active = True
+            self.motion_frames += 1
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        self.last_motion_ratio = cv2.countNonZero(mask) / float(mask.size)
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        now = time.monotonic()
+        if self.last_motion_ratio >= self.motion_threshold:
+            self.last_motion_time = now
+            self.motion_frames += 1
+
+        self.active = (now - self.last_motion_time) < self.hold_seconds
+        if not self.active:
+            self.gated_frames += 1
+        return self.active
+
+    def keep_alive(self):
+        """检测到人脸时调用，保持检测运行（静止的人会被背景吸收）"""
+        self.last_motion_time = time.monotonic()
+
+    def reset(self):
+        """重置背景模型"""
+        self.background = None
+
+    def get_stats(self) -> dict:
+        """获取门控与CPU占用统计"""
+        return {
+            "frames": self.frames,
+            "motion_frames": self.motion_frames,
+            "gated_frames": self.gated_frames,
+            "cascade_ratio": (self.frames - self.gated_frames) / self.frames if self.frames else 0.0,
+            "last_motion_ratio": self.last_motion_ratio,
+            "active": self.active,
+            "idle_seconds": self.idle_wall_seconds,
+            "idle_cpu_percent": (100.0 * self.idle_cpu_seconds / self.idle_wall_seconds
+                                 if self.idle_wall_seconds else 0.0),
+            "active_seconds": self.active_wall_seconds,
+            "active_cpu_percent": (100.0 * self.active_cpu_seconds / self.active_wall_seconds
+                                   if self.active_wall_seconds else 0.0)
+        }
+
+    def format_stats(self) -> str:
+        stats = self.get_stats()
+        return (f"运动门控: 检测比例 {stats['cascade_ratio'] * 100:.1f}% "
+                f"({stats['frames'] - stats['gated_frames']}/{stats['frames']}帧), "
+                f"空闲CPU {stats['idle_cpu_percent']:.1f}%, 活跃CPU {stats['active_cpu_percent']:.1f}%")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量取物的运动规划
+一次取出多个物品时，按升降距离和旋转角度（扇区首尾相接）估算平台移动时间，
+重新排列取物顺序使总移动时间最短，并与原始顺序比较
+
+目标数量较少时用状态压缩动态规划求精确解，较多时用最近邻 + 2-opt 近似
+"""
+
+import os
+
+# 精确求解的最大目标数（2^n * n^2）
+EXACT_LIMIT = 10
+
+
+class MotionCostModel:
+    def __init__(self, level_height_mm=200, lift_speed_mm_s=100.0, sections=4, turn_speed_deg_s=90.0,
+                 fetch_seconds=3.0, concurrent=True):
+        """
+        Args:
+            level_height_mm: 每层高度（毫米）
+            lift_speed_mm_s: 升降速度（毫米/秒）
+            sections: 每层扇区数，最后一个扇区与第一个相邻
+            turn_speed_deg_s: 旋转角速度（度/秒）
+            fetch_seconds: 每次取物耗时（秒），与顺序无关，只计入总时间
+            concurrent: 升降和旋转是否同时进行（运动控制器流水线下发），否则依次执行
+        """
+        self.level_height_mm = level_height_mm
+        self.lift_speed_mm_s = lift_speed_mm_s
+        self.sections = sections
+        self.turn_speed_deg_s = turn_speed_deg_s
+        self.fetch_seconds = fetch_seconds
+        self.concurrent = concurrent
+
+    @classmethod
+    def from_env(cls, prefix="FRIDGE_MOTION_", **kwargs):
+        """
+        从环境变量读取，例如:
+            FRIDGE_MOTION_LIFT_SPEED=150 FRIDGE_MOTION_TURN_SPEED=120 FRIDGE_MOTION_FETCH_SECONDS=2.5
+        层高与运动控制器共用 FRIDGE_LEVEL_HEIGHT_MM
+        """
+        level_height = os.getenv("FRIDGE_LEVEL_HEIGHT_MM")
+        if level_height:
+            kwargs.setdefault("level_height_mm", float(level_height))
+        names = {
+            "LIFT_SPEED": "lift_speed_mm_s",
+            "TURN_SPEED": "turn_speed_deg_s",
+            "FETCH_SECONDS": "fetch_seconds",
+        }
+        for env_name, arg in names.items():
+            value = os.getenv(prefix + env_name)
+            if value:
+                kwargs.setdefault(arg, float(value))
+        return cls(**kwargs)
+
+    def lift_seconds(self, from_level, to_level) -> float:
+        return abs(to_level - from_level) * self.level_height_mm / self.lift_speed_mm_s
+
+    def turn_seconds(self, from_section, to_section) -> float:
+        steps = abs(to_section - from_section) % self.sections
+        steps = min(steps, self.sections - steps)
+        return steps * (360.0 / self.sections) / self.turn_speed_deg_s
+
+    def travel_seconds(self, start, end) -> float:
+        """从 (层, 扇区) 移动到另一个 (层, 扇区) 的时间"""
+        lift = self.lift_seconds(start[0], end[0])
+        turn = self.turn_seconds(start[1], end[1])
+        return max(lift, turn) if self.concurrent else lift + turn
+
+    def route_seconds(self, start, targets) -> float:
+        """按给定顺序依次移动的总时间（不含取物）"""
+        total = 0.0
+        position = start
+        for target in targets:
+            total += self.travel_seconds(position, target)
+            position = target
+        return total
+
+
+def _exact_order(start, targets, model):
+    """状态压缩DP（开放路径，起点固定）"""
+    n = len(targets)
+    cost = [[model.travel_seconds(a, b) for b in targets] for a in targets]
+    full = 1 << n
+    best = [[float("inf")] * n for _ in range(full)]
+    parent = [[-1] * n for _ in range(full)]
+    for i in range(n):
+        best[1 << i][i] = model.travel_seconds(start, targets[i])
+    for mask in range(full):
+        row = best[mask]
+        for last in range(n):
+            current = row[last]
+            if current == float("inf"):
+                continue
+            for nxt in range(n):
+                if mask & (1 << nxt):
+                    continue
+                candidate = current + cost[last][nxt]
+                new_mask = mask | (1 << nxt)
+                if candidate < best[new_mask][nxt]:
+                    best[new_mask][nxt] = candidate
+                    parent[new_mask][nxt] = last
+    mask = full - 1
+    last = min(range(n), key=lambda i: best[mask][i])
+    order = []
+    while last != -1:
+        order.append(last)
+        last, mask = parent[mask][last], mask & ~(1 << last)
+    return order[::-1]
+
+
+def _heuristic_order(start, targets, model):
+    """最近邻构造 + 2-opt 改进"""
+    remaining = list(range(len(targets)))
+    order = []
+    position = start
+    while remaining:
+        nxt = min(remaining, key=lambda i: model.travel_seconds(position, targets[i]))
+        remaining.remove(nxt)
+        order.append(nxt)
+        position = targets[nxt]
+
+    def route_cost(candidate):
+        return model.route_seconds(start, [targets[i] for i in candidate])
+
+    improved = True
+    best_cost = route_cost(order)
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                candidate_cost = route_cost(candidate)
+                if candidate_cost < best_cost - 1e-9:
+                    order, best_cost, improved = candidate, candidate_cost, True
+    return order
+
+
+def plan_retrievals(targets, start=(0, 0), model=None) -> dict:
+    """
+    规划取物顺序
+
+    Args:
+        targets: [(层, 扇区), ...]，按请求顺序（即原始顺序）
+        start: 平台当前位置 (层, 扇区)
+        model: MotionCostModel，默认从环境变量读取
+
+    Returns:
+        {"order": 原始下标的新顺序, "planned_seconds", "naive_seconds", "saved_seconds",
+         "fetch_seconds"}，时间为移动时间，不含取物
+    """
+    model = model or MotionCostModel.from_env()
+    targets = [tuple(t) for t in targets]
+    if not targets:
+        return {"order": [], "planned_seconds": 0.0, "naive_seconds": 0.0, "saved_seconds": 0.0,
+                "fetch_seconds": 0.0}
+
+    if len(targets) <= EXACT_LIMIT:
+        order = _exact_order(start, targets, model)
+    else:
+        order = _heuristic_order(start, targets, model)
+
+    planned = model.route_seconds(start, [targets[i] for i in order])
+    naive = model.route_seconds(start, targets)
+    if naive < planned:
+        # 近似解不如原始顺序时保持原顺序
+        order, planned = list(range(len(targets))), naive
+    return {
+        "order": order,
+        "planned_seconds": planned,
+        "naive_seconds": naive,
+        "saved_seconds": naive - planned,
+        "fetch_seconds": model.fetch_seconds * len(targets)
+    }
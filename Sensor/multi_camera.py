@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多摄像头支持
+每个摄像头一个独立的采集+检测工作进程（绕开GIL），
+各进程的事件带上摄像头ID后合并为一个事件流，并定期上报各摄像头的运行指标和健康状态
+
+摄像头配置（环境变量 FRIDGE_CAMERAS 或 --cameras 参数）:
+    "front:0:proximity,shelf:1:placement"
+    每项为 摄像头ID:来源:角色，来源可以是摄像头索引、视频文件或图片目录，
+    角色 proximity（接近检测）/ placement（放入物品拍照），多个角色用 + 连接
+
+用法:
+    python multi_camera.py [--cameras front:0:proximity,shelf:1:placement]
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+
+import requests
+
+from http_client import get_client
+from event_bus import get_publisher
+from proximity_state import ProximityStateMachine, STATE_PRESENT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAMERAS = "front:0:proximity+placement"
+ROLES = ("proximity", "placement")
+
+# 工作进程上报健康状态的间隔（秒）
+HEALTH_INTERVAL = 5.0
+# 超过该时间没有收到健康报告，视为工作进程失联
+HEALTH_TIMEOUT = 15.0
+# 摄像头判定用户在场期间上报 presence 的间隔（秒），须小于接近状态机的 leave_seconds
+PRESENCE_INTERVAL = 1.0
+
+
+def parse_camera_config(spec=None):
+    """
+    解析摄像头配置
+
+    Returns:
+        [{"camera_id": "front", "source": "0", "roles": ["proximity"]}, ...]
+    """
+    spec = spec or os.getenv("FRIDGE_CAMERAS", DEFAULT_CAMERAS)
+    cameras = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(":")
+        if len(parts) < 2:
+            raise ValueError(f"摄像头配置格式错误: {item}（应为 ID:来源[:角色]）")
+        camera_id = parts[0]
+        roles = parts[-1].split("+") if len(parts) >= 3 else ["proximity"]
+        # 来源中可能包含冒号（如Windows路径），取中间部分
+        source = ":".join(parts[1:-1]) if len(parts) >= 3 else parts[1]
+        unknown = [role for role in roles if role not in ROLES]
+        if unknown:
+            raise ValueError(f"未知的摄像头角色: {', '.join(unknown)}")
+        cameras.append({"camera_id": camera_id, "source": source, "roles": roles})
+    return cameras
+
+
+def camera_for_role(role, cameras=None):
+    """返回承担指定角色的第一个摄像头配置，没有时返回None"""
+    for camera in cameras if cameras is not None else parse_camera_config():
+        if role in camera["roles"]:
+            return camera
+    return None
+
+
+def _put_event(events, event):
+    try:
+        events.put_nowait(event)
+    except queue.Full:
+        pass
+
+
+def camera_worker(camera, events, stop_event, detection_distance=50):
+    """
+    摄像头工作进程
+
+    摄像头索引来源：在本进程中运行帧共享服务（独占设备，并发布到共享内存供按键拍照等读取）；
+    录像来源：直接重放。承担proximity角色时运行运动门控+人脸检测/跟踪。
+    """
+    # 子进程中导入OpenCV相关模块
+    import cv2
+    from frame_broker import FrameBroker, SharedCamera
+    from frame_source import open_frame_source
+
+    camera_id = camera["camera_id"]
+    source_spec = camera["source"]
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    broker = None
+    if source_spec.isdigit():
+        broker = FrameBroker(int(source_spec))
+        if not broker.open():
+            _put_event(events, {"type": "health", "camera_id": camera_id, "status": "error",
+                                "error": f"无法打开摄像头 {source_spec}", "timestamp": time.time()})
+            return
+        threading.Thread(target=broker.run, daemon=True).start()
+        source = SharedCamera(int(source_spec))
+    else:
+        source = open_frame_source(source_spec, realtime=True, loop=True)
+
+    pipeline = None
+    if "proximity" in camera["roles"]:
+        pipeline = _ProximityPipeline(camera_id, source_spec, detection_distance,
+                                      frame_width=source.get(cv2.CAP_PROP_FRAME_WIDTH))
+
+    frames = 0
+    detect_seconds = 0.0
+    last_health = 0.0
+    last_seq = None
+    try:
+        while not stop_event.is_set():
+            now = time.time()
+            if now - last_health >= HEALTH_INTERVAL:
+                last_health = now
+                health = {
+                    "type": "health",
+                    "camera_id": camera_id,
+                    "status": "ok" if source.isOpened() else "degraded",
+                    "pid": os.getpid(),
+                    "roles": camera["roles"],
+                    "captured_frames": broker.seq if broker is not None else source.frame_index + 1,
+                    "processed_frames": frames,
+                    "detect_ms": 1000 * detect_seconds / frames if frames else 0.0,
+                    "timestamp": now
+                }
+                if pipeline is not None:
+                    health.update(pipeline.get_stats())
+                _put_event(events, health)
+
+            if pipeline is None:
+                # 仅拍照用途：只需保持采集并上报健康状态
+                stop_event.wait(1.0)
+                continue
+
+            if broker is not None:
+                seq, _, frame = source.read_latest()
+                if frame is None or seq == last_seq:
+                    time.sleep(0.01)
+                    continue
+                last_seq = seq
+            else:
+                ret, frame = source.read()
+                if not ret:
+                    time.sleep(0.05)
+                    continue
+
+            start = time.perf_counter()
+            event = pipeline.process(frame)
+            detect_seconds += time.perf_counter() - start
+            frames += 1
+            if event is not None:
+                _put_event(events, event)
+            pipeline.scheduler.wait(stop_event)
+    finally:
+        source.release()
+        if broker is not None:
+            broker.stop()
+            time.sleep(0.1)
+            broker.close()
+
+
+class _ProximityPipeline:
+    """单个摄像头的接近检测流程（运动门控 + 检测/跟踪 + 距离滤波 + 自适应帧率）"""
+
+    def __init__(self, camera_id, source, detection_distance, frame_width=None):
+        from distance_calibration import load_distance_model
+        from face_detectors import create_face_detector
+        from face_tracking import FaceTracker, DistanceFilter
+        from frame_scheduler import AdaptiveScheduler
+        from motion_gate import MotionGate
+
+        self.camera_id = camera_id
+        self.distance_model = load_distance_model(camera_id, source, frame_width=frame_width)
+        self.event_cooldown = 3.0
+        self.proximity = ProximityStateMachine.from_env(enter_distance=detection_distance,
+                                                        dedup_seconds=self.event_cooldown)
+        # 设置了 FRIDGE_PROXIMITY_ENTER_CM 时以环境变量为准
+        self.detection_distance = self.proximity.enter_distance
+        self.motion_active = False
+        self.last_presence = 0.0
+
+        self.motion_gate = MotionGate()
+        self.detector = create_face_detector(
+            backend=os.getenv("FRIDGE_FACE_BACKEND", "haar"),
+            # 最小人脸尺寸按离开距离计算，进入/离开之间的人脸仍能检测到（迟滞）
+            detection_distance=self.proximity.leave_distance,
+            distance_model=self.distance_model
+        )
+        self.tracker = FaceTracker(self.detector, tracker=os.getenv("FRIDGE_FACE_TRACKER", "auto"))
+        self.distance_filter = DistanceFilter()
+        self.scheduler = AdaptiveScheduler.from_env(cooldown_seconds=self.event_cooldown)
+
+    def estimate_distance(self, face_width):
+        return self.distance_model.estimate(face_width)
+
+    def process(self, frame):
+        """处理一帧，触发接近事件、画面开始有运动或用户仍在场（定期）时返回事件字典"""
+        if not self.motion_gate.update(frame):
+            self.tracker.reset()
+            self.distance_filter.reset()
+            self.scheduler.report()
+            self.proximity.update(None)
+            self.motion_active = False
+            return None
+
+        motion_started = not self.motion_active
+        self.motion_active = True
+
+        faces = self.tracker.update(frame)
+        nearest = None
+        if faces:
+            self.motion_gate.keep_alive()
+            nearest = min(self.estimate_distance(w) for (x, y, w, h) in faces)
+        self.scheduler.report(motion=True, face=nearest is not None)
+
+        # 接近确认后到离开前不重复触发（迟滞 + 停留时间，见 proximity_state.py）
+        distance = self.distance_filter.update(nearest)
+        now = time.time()
+        if not self.proximity.update(distance, source=self.camera_id, camera_id=self.camera_id, now=now):
+            if motion_started:
+                return {"type": "motion", "camera_id": self.camera_id, "timestamp": now}
+            if self.proximity.state == STATE_PRESENT and now - self.last_presence >= PRESENCE_INTERVAL:
+                # 接近事件只发一次，之后定期上报在场，保持主进程共享的接近状态
+                self.last_presence = now
+                return {"type": "presence", "camera_id": self.camera_id, "timestamp": now}
+            return None
+        self.last_presence = now
+        self.scheduler.report(event=True)
+        return {"type": "proximity", "camera_id": self.camera_id,
+                "distance": round(distance, 1), "timestamp": now}
+
+    def get_stats(self):
+        gate = self.motion_gate.get_stats()
+        return {
+            "fps": self.scheduler.effective_fps,
+            "scheduler_state": self.scheduler.state,
+            "cascade_ratio": gate["cascade_ratio"],
+            "tracking": self.tracker.get_stats()
+        }
+
+
+class MultiCameraManager:
+    """管理各摄像头工作进程，合并事件流并跟踪健康状态"""
+
+    def __init__(self, cameras, on_event=None, detection_distance=50, max_queue=256):
+        """
+        Args:
+            cameras: parse_camera_config() 的结果
+            on_event: 事件回调，参数为带 camera_id 的事件字典（在合并线程中调用）
+        """
+        self.cameras = cameras
+        self.on_event = on_event
+        self.detection_distance = detection_distance
+
+        ctx = mp.get_context("spawn")
+        self._ctx = ctx
+        self.events = ctx.Queue(maxsize=max_queue)
+        self.stop_event = ctx.Event()
+        self.processes = {}
+        self.restarts = {camera["camera_id"]: 0 for camera in cameras}
+        self.health = {}
+        self.event_counts = {camera["camera_id"]: 0 for camera in cameras}
+        self._lock = threading.Lock()
+        self._merge_thread = None
+        self.running = False
+
+    def _start_worker(self, camera):
+        process = self._ctx.Process(
+            target=camera_worker,
+            args=(camera, self.events, self.stop_event, self.detection_distance),
+            name=f"camera-{camera['camera_id']}",
+            daemon=True
+        )
+        process.start()
+        self.processes[camera["camera_id"]] = process
+        logger.info(f"摄像头 {camera['camera_id']} 工作进程已启动 (PID: {process.pid})")
+
+    def start(self):
+        self.running = True
+        for camera in self.cameras:
+            self._start_worker(camera)
+        self._merge_thread = threading.Thread(target=self._merge_loop, daemon=True)
+        self._merge_thread.start()
+
+    def _merge_loop(self):
+        while self.running:
+            try:
+                event = self.events.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+
+            camera_id = event.get("camera_id")
+            with self._lock:
+                if event.get("type") == "health":
+                    self.health[camera_id] = event
+                elif event.get("type") == "proximity":
+                    self.event_counts[camera_id] = self.event_counts.get(camera_id, 0) + 1
+
+            if self.on_event is not None:
+                try:
+                    self.on_event(event)
+                except Exception as e:
+                    logger.error(f"处理摄像头事件失败: {e}")
+
+    def _check_workers(self):
+        """重启意外退出的工作进程"""
+        for camera in self.cameras:
+            camera_id = camera["camera_id"]
+            process = self.processes.get(camera_id)
+            if process is not None and not process.is_alive() and self.running:
+                logger.warning(f"摄像头 {camera_id} 工作进程已退出 (exit={process.exitcode})，重启")
+                self.restarts[camera_id] += 1
+                self._start_worker(camera)
+
+    def get_health(self):
+        """各摄像头的健康状态"""
+        now = time.time()
+        result = {}
+        with self._lock:
+            for camera in self.cameras:
+                camera_id = camera["camera_id"]
+                process = self.processes.get(camera_id)
+                report = dict(self.health.get(camera_id, {}))
+                age = now - report["timestamp"] if "timestamp" in report else None
+                alive = process is not None and process.is_alive()
+                status = report.get("status", "starting")
+                if not alive:
+                    status = "down"
+                elif age is not None and age > HEALTH_TIMEOUT:
+                    status = "stale"
+                report.update({
+                    "camera_id": camera_id,
+                    "source": camera["source"],
+                    "roles": camera["roles"],
+                    "alive": alive,
+                    "status": status,
+                    "restarts": self.restarts[camera_id],
+                    "events": self.event_counts.get(camera_id, 0),
+                    "last_report_age": age
+                })
+                report.pop("type", None)
+                result[camera_id] = report
+        return result
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._merge_thread:
+            self._merge_thread.join(timeout=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多摄像头接近检测")
+    parser.add_argument("--cameras", default=None, help=f"摄像头配置，默认 FRIDGE_CAMERAS 或 {DEFAULT_CAMERAS}")
+    parser.add_argument("--web-server", default="http://localhost:8080")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cameras = parse_camera_config(args.cameras)
+
+    http = get_client(args.web_server)
+    bus = get_publisher("multi_camera")
+
+    # 所有摄像头共享一个接近状态，避免多个摄像头同时看到同一个人时重复触发
+    proximity = ProximityStateMachine.from_env()
+
+    def handle_event(event):
+        if event["type"] == "proximity":
+            if not proximity.report(event["camera_id"], camera_id=event["camera_id"],
+                                    distance=event["distance"], now=event["timestamp"]):
+                return
+            logger.info(f"👤 摄像头 {event['camera_id']} 检测到人脸接近 ({event['distance']}cm)")
+            if bus.publish("proximity", detected=True, distance="near", camera_id=event["camera_id"],
+                           distance_cm=event["distance"]):
+                return
+            try:
+                http.post("/api/proximity-sensor",
+                          json={"detected": True, "distance": "near", "camera_id": event["camera_id"],
+                                "distance_cm": event["distance"], "source": "multi_camera"},
+                          timeout=5)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"无法连接到Web服务器: {e}")
+        elif event["type"] == "presence":
+            # 任一摄像头仍看到用户就保持在场，其他摄像头随后的接近事件不会重复触发
+            proximity.keep_alive(now=event["timestamp"])
+        elif event["type"] == "motion":
+            # 只用于Web服务器预取问候，事件总线不可用时不回退HTTP
+            bus.publish("motion", camera_id=event["camera_id"])
+        elif event["type"] == "health":
+            try:
+                http.post("/api/camera-health", json=manager.get_health(), timeout=2)
+            except requests.exceptions.RequestException:
+                pass
+
+    manager = MultiCameraManager(cameras, on_event=handle_event)
+
+    def handle_signal(signum, frame):
+        manager.running = False
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    manager.start()
+    try:
+        while manager.running:
+            time.sleep(1)
+    finally:
+        manager.stop()
+
+
+if __name__ == "__main__":
+    main()
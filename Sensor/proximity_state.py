@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接近状态机
+所有接近事件来源（Agent检测循环、face_detection.py、multi_camera.py、串口/HTTP）共用一套判定：
+
+    idle ──距离 ≤ 进入距离──▶ pending ──持续 dwell 秒──▶ present（触发一次 approach）
+      ▲                         │ 距离 > 离开距离 或 无人脸                │
+      └─────────────────────────┘                                          │
+      └──────────── 超过 leave_seconds 没有任何来源的信号（离开）───────────┘
+
+进入和离开使用不同的距离阈值（迟滞），人在阈值附近晃动时不会反复触发；
+present 期间任何来源的信号只刷新状态，不再触发；两次 approach 之间至少间隔 dedup_seconds
+
+逐帧检测用 update(distance)，已经判定过的外部事件（事件总线/HTTP）用 report()，
+其他来源报告用户仍在场（不触发接近）用 keep_alive()
+
+环境变量:
+    FRIDGE_PROXIMITY_ENTER_CM / FRIDGE_PROXIMITY_LEAVE_CM   进入/离开距离（厘米），默认 50 / 70
+    FRIDGE_PROXIMITY_DWELL          进入距离内需停留的秒数，默认 0.3
+    FRIDGE_PROXIMITY_LEAVE_SECONDS  没有信号多少秒后视为离开，默认 5
+    FRIDGE_PROXIMITY_DEDUP          两次接近事件的最小间隔（秒），默认 3
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = "idle"
+STATE_PENDING = "pending"
+STATE_PRESENT = "present"
+
+
+class ProximityStateMachine:
+    def __init__(self, enter_distance=50.0, leave_distance=70.0, dwell_seconds=0.3, leave_seconds=5.0,
+                 dedup_seconds=3.0):
+        """
+        Args:
+            enter_distance: 进入距离（厘米），人脸距离不超过该值开始计时
+            leave_distance: 离开距离（厘米），大于进入距离；present 期间不超过该值视为仍在
+            dwell_seconds: 在进入距离内停留多久才确认接近
+            leave_seconds: 多久没有任何来源的信号视为离开
+            dedup_seconds: 两次 approach 的最小间隔
+        """
+        self.enter_distance = enter_distance
+        self.leave_distance = max(leave_distance, enter_distance)
+        self.dwell_seconds = dwell_seconds
+        self.leave_seconds = leave_seconds
+        self.dedup_seconds = dedup_seconds
+
+        self.state = STATE_IDLE
+        self.pending_since = None
+        self.last_seen = 0.0
+        self.last_approach = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.approaches = 0
+        self.suppressed = 0
+        self.leaves = 0
+        self.by_source = {}
+
+    @classmethod
+    def from_env(cls, prefix="FRIDGE_PROXIMITY_", **kwargs):
+        """
+        调用方传入的参数作为默认值，设置了对应环境变量时以环境变量为准
+        （调用方应使用返回对象的 enter_distance 等属性，而不是自己的常量）
+        """
+        names = {
+            "ENTER_CM": "enter_distance",
+            "LEAVE_CM": "leave_distance",
+            "DWELL": "dwell_seconds",
+            "LEAVE_SECONDS": "leave_seconds",
+            "DEDUP": "dedup_seconds",
+        }
+        for env_name, arg in names.items():
+            value = os.getenv(prefix + env_name)
+            if value:
+                kwargs[arg] = float(value)
+        return cls(**kwargs)
+
+    def add_listener(self, callback):
+        """注册接近回调 callback(event)，event 为 {"source", "camera_id", "distance", "ts"}"""
+        self._listeners.append(callback)
+
+    # ---- 输入 ----
+
+    def update(self, distance, source="local", camera_id=None, now=None) -> bool:
+        """
+        逐帧输入最近人脸距离（无人脸为 None），确认接近时返回 True 并通知回调
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if distance is None:
+                if self.state == STATE_PENDING:
+                    self.state, self.pending_since = STATE_IDLE, None
+                return False
+
+            if self.state == STATE_PRESENT:
+                if distance <= self.leave_distance:
+                    self.last_seen = now
+                return False
+
+            if self.state == STATE_PENDING and distance > self.leave_distance:
+                self.state, self.pending_since = STATE_IDLE, None
+                return False
+            if self.state == STATE_IDLE:
+                if distance > self.enter_distance:
+                    return False
+                self.state, self.pending_since = STATE_PENDING, now
+            if now - self.pending_since < self.dwell_seconds:
+                return False
+            event = self._approach(source, camera_id, distance, now)
+        return self._notify(event)
+
+    def report(self, source, camera_id=None, distance=None, now=None) -> bool:
+        """
+        输入其他来源已确认的接近事件，同一次接近内的重复事件返回 False
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if self.state == STATE_PRESENT:
+                self.last_seen = now
+                self.suppressed += 1
+                return False
+            event = self._approach(source, camera_id, distance, now)
+        return self._notify(event)
+
+    def keep_alive(self, now=None) -> bool:
+        """
+        其他来源报告用户仍在场：present 期间刷新离开计时，不触发接近也不计入重复事件
+        返回当前是否在场
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if self.state != STATE_PRESENT:
+                return False
+            self.last_seen = now
+            return True
+
+    # ---- 内部 ----
+
+    def _expire(self, now):
+        if self.state == STATE_PRESENT and now - self.last_seen > self.leave_seconds:
+            self.state = STATE_IDLE
+            self.leaves += 1
+            logger.debug("接近状态: 用户已离开")
+
+    def _approach(self, source, camera_id, distance, now):
+        if self.last_approach is not None and now - self.last_approach < self.dedup_seconds:
+            # 刚离开又回来，仍算同一次接近
+            self.state, self.pending_since, self.last_seen = STATE_PRESENT, None, now
+            self.suppressed += 1
+            return None
+        self.state, self.pending_since = STATE_PRESENT, None
+        self.last_seen = self.last_approach = now
+        self.approaches += 1
+        self.by_source[source] = self.by_source.get(source, 0) + 1
+        return {"source": source, "camera_id": camera_id, "distance": distance, "ts": now}
+
+    def _notify(self, event) -> bool:
+        if event is None:
+            return False
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"接近事件回调失败: {e}")
+        return True
+
+    # ---- 状态 ----
+
+    @property
+    def present(self) -> bool:
+        with self._lock:
+            self._expire(time.time())
+            return self.state == STATE_PRESENT
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "state": self.state,
+                "approaches": self.approaches,
+                "suppressed": self.suppressed,
+                "leaves": self.leaves,
+                "by_source": dict(self.by_source),
+                "last_approach": self.last_approach
+            }
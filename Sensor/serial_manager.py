@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运动控制器串口自动发现与断线重连
+后台线程扫描候选串口（/dev/ttyUSB*、/dev/ttyACM*、/dev/ttyAMA*），向每个端口发送握手帧，
+回复 "OK <序号> ping" 的端口即为运动控制器（ESP32，固件须支持握手命令）；连接后监视端口，拔出或读写出错时关闭驱动，
+按指数退避重新扫描，插回后自动恢复
+
+状态:
+    connecting  启动后首次扫描中
+    ready       已连接，命令交给 MotionController
+    degraded    未找到控制器或连接已断开，命令立即失败，不等待串口
+
+环境变量:
+    FRIDGE_SERIAL_PORTS        候选端口（逗号分隔的路径或通配符），默认 ttyUSB/ttyACM/ttyAMA
+    FRIDGE_SERIAL_BOOT_DELAY   打开端口后等待控制器启动的秒数（ESP32打开串口时会复位），默认2
+"""
+
+import logging
+import os
+import threading
+import time
+
+from find_ports import get_available_serial_ports
+from motion_controller import MotionCommand, MotionController, encode_ping_packet, parse_reply
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATTERNS = ['/dev/ttyUSB*', '/dev/ttyACM*', '/dev/ttyAMA*']
+
+# 握手帧使用的序号（连接建立前没有在途命令）
+HANDSHAKE_SEQ = 1
+
+STATE_CONNECTING = "connecting"
+STATE_READY = "ready"
+STATE_DEGRADED = "degraded"
+
+
+def handshake(ser, timeout=2.0, ack_prefix="OK", error_prefix="ERR") -> bool:
+    """
+    发送握手帧并等待应答，只有明确的握手应答 "OK <HANDSHAKE_SEQ> ping ..." 返回 True
+    固件必须支持握手命令：ERR 应答或其他序号的应答都不算，避免把不认识握手帧的设备
+    （包括旧固件）当成运动控制器；GPS、蓝牙、串口控制台等设备不会按协议应答，超时返回 False
+    """
+    try:
+        ser.reset_input_buffer()
+    except Exception:
+        pass
+    ser.write(encode_ping_packet(HANDSHAKE_SEQ))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        line = ser.readline().decode(errors="ignore").strip()
+        reply = parse_reply(line, ack_prefix, error_prefix)
+        if reply is None:
+            continue
+        ok, seq = reply
+        if ok and seq == HANDSHAKE_SEQ and line.split()[2:3] == ["ping"]:
+            return True
+        logger.debug(f"握手应答不符合协议: {line}")
+        return False
+    return False
+
+
+class SerialPortManager:
+    """
+    持有 MotionController 并负责发现和重连，对外提供与 MotionController 相同的命令接口
+    """
+
+    def __init__(self, baudrate=9600, patterns=None, preferred_port=None, handshake_timeout=2.0,
+                 boot_delay=None, backoff=1.0, max_backoff=30.0, check_interval=0.5,
+                 on_state_change=None, **controller_kwargs):
+        """
+        Args:
+            baudrate: 波特率
+            patterns: 候选端口路径或通配符，默认读取 FRIDGE_SERIAL_PORTS
+            preferred_port: 优先尝试的端口（上次连接成功的端口会自动优先）
+            handshake_timeout: 等待握手应答的秒数
+            boot_delay: 打开端口后等待控制器启动的秒数
+            backoff / max_backoff: 重试间隔的初始值和上限（秒），每次失败翻倍
+            check_interval: 已连接时检查端口是否仍然存在的间隔（秒）
+            on_state_change: 状态变化回调 (state, port)
+            controller_kwargs: 传给 MotionController 的参数（level_height_mm、max_in_flight等）
+        """
+        if patterns is None:
+            env_patterns = os.getenv("FRIDGE_SERIAL_PORTS")
+            patterns = [p.strip() for p in env_patterns.split(",") if p.strip()] if env_patterns \
+                else DEFAULT_PATTERNS
+        self.patterns = list(patterns)
+        self.baudrate = baudrate
+        self.preferred_port = preferred_port
+        self.handshake_timeout = handshake_timeout
+        self.boot_delay = boot_delay if boot_delay is not None \
+            else float(os.getenv("FRIDGE_SERIAL_BOOT_DELAY", "2"))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.check_interval = check_interval
+        self.on_state_change = on_state_change
+        self.controller_kwargs = controller_kwargs
+        self.timeouts = controller_kwargs.get("timeouts") or {}
+
+        self.controller = None
+        self.port = None
+        self.state = STATE_CONNECTING
+        self.last_error = None
+        self.next_retry_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 统计信息
+        self.connects = 0
+        self.disconnects = 0
+        self.probes = 0
+        self.rejected = 0
+        self.ready_since = None
+
+    # ---- 生命周期 ----
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="serial-manager", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.handshake_timeout + self.boot_delay + 2)
+        self._disconnect("manager closed")
+
+    def wait_ready(self, timeout=None) -> bool:
+        """等待进入 ready 状态，用于启动时可以等待控制器的场景"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            if self.ready:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return False
+
+    @property
+    def ready(self) -> bool:
+        controller = self.controller
+        return self.state == STATE_READY and controller is not None and controller.healthy
+
+    # ---- 命令接口（与 MotionController 一致） ----
+
+    def submit(self, name, payload, timeout=None) -> MotionCommand:
+        """未连接时立即返回失败的命令，调用方不会阻塞在失效的串口上"""
+        controller = self.controller
+        if controller is not None and self.ready:
+            return controller.submit(name, payload, timeout)
+        self.rejected += 1
+        command = MotionCommand(name, payload, timeout or self.timeouts.get(name, 10.0))
+        command.complete(False, f"motion controller {self.state}")
+        return command
+
+    def lift(self, level_index, wait=True):
+        controller = self.controller
+        if controller is not None and self.ready:
+            return controller.lift(level_index, wait=wait)
+        command = self.submit("lift", b"")
+        return command.wait() if wait else command
+
+    def turn(self, section_index, wait=True):
+        controller = self.controller
+        if controller is not None and self.ready:
+            return controller.turn(section_index, wait=wait)
+        command = self.submit("turn", b"")
+        return command.wait() if wait else command
+
+    def fetch(self, wait=True):
+        controller = self.controller
+        if controller is not None and self.ready:
+            return controller.fetch(wait=wait)
+        command = self.submit("fetch", b"")
+        return command.wait() if wait else command
+
+    def move_and_fetch(self, level_index, section_index) -> bool:
+        lift = self.lift(level_index, wait=False)
+        turn = self.turn(section_index, wait=False)
+        if not (lift.wait() and turn.wait()):
+            return False
+        return self.fetch()
+
+    # ---- 发现与重连 ----
+
+    def _candidates(self):
+        ports = get_available_serial_ports(self.patterns)
+        # 上次成功的端口和指定端口优先
+        for port in (self.preferred_port, self.port):
+            if port in ports:
+                ports.remove(port)
+                ports.insert(0, port)
+        return ports
+
+    def _probe(self, port):
+        """打开端口并握手，成功返回打开的串口对象"""
+        import serial
+
+        self.probes += 1
+        try:
+            ser = serial.Serial(port, self.baudrate, timeout=0.1, write_timeout=1.0)
+        except Exception as e:
+            logger.debug(f"无法打开 {port}: {e}")
+            return None
+        try:
+            if self.boot_delay > 0:
+                time.sleep(self.boot_delay)
+            if handshake(ser, self.handshake_timeout,
+                         self.controller_kwargs.get("ack_prefix", "OK"),
+                         self.controller_kwargs.get("error_prefix", "ERR")):
+                return ser
+            logger.debug(f"{port} 无握手应答，不是运动控制器")
+        except Exception as e:
+            logger.debug(f"{port} 握手失败: {e}")
+        try:
+            ser.close()
+        except Exception:
+            pass
+        return None
+
+    def _connect(self) -> bool:
+        for port in self._candidates():
+            if self._stop.is_set():
+                return False
+            ser = self._probe(port)
+            if ser is None:
+                continue
+            try:
+                controller = MotionController(ser, baudrate=self.baudrate, **self.controller_kwargs)
+            except Exception as e:
+                logger.error(f"运动控制器驱动启动失败 ({port}): {e}")
+                ser.close()
+                continue
+            with self._lock:
+                self.controller = controller
+                self.port = port
+                self.connects += 1
+                self.last_error = None
+                self.ready_since = time.time()
+            self._set_state(STATE_READY)
+            return True
+        self.last_error = "no motion controller found"
+        return False
+
+    def _connection_lost(self):
+        """返回断开原因，连接正常返回 None"""
+        controller = self.controller
+        if controller is None:
+            return "not connected"
+        if controller.error:
+            return controller.error
+        if self.port and self.port.startswith("/dev/") and not os.path.exists(self.port):
+            return f"{self.port} removed"
+        return None
+
+    def _disconnect(self, reason):
+        with self._lock:
+            controller, self.controller = self.controller, None
+            self.ready_since = None
+        if controller is None:
+            return
+        self.disconnects += 1
+        self.last_error = reason
+        logger.warning(f"⚠️ 运动控制器断开 ({self.port}): {reason}")
+        # 先进入 degraded 拒绝新命令，再关闭驱动使在途命令立即失败
+        self._set_state(STATE_DEGRADED)
+        controller.close()
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if state == STATE_READY:
+            logger.info(f"✅ 运动控制器就绪: {self.port}")
+        else:
+            logger.warning(f"⚠️ 运动控制器状态: {state}")
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(state, self.port)
+            except Exception as e:
+                logger.error(f"状态回调失败: {e}")
+
+    def _run(self):
+        delay = self.backoff
+        while not self._stop.is_set():
+            if self.controller is not None:
+                reason = self._connection_lost()
+                if reason is None:
+                    self._stop.wait(self.check_interval)
+                    continue
+                self._disconnect(reason)
+                delay = self.backoff
+            if self._connect():
+                delay = self.backoff
+                self.next_retry_at = None
+                continue
+            self._set_state(STATE_DEGRADED)
+            self.next_retry_at = time.time() + delay
+            logger.debug(f"未找到运动控制器，{delay:.1f}秒后重试")
+            self._stop.wait(delay)
+            delay = min(self.max_backoff, delay * 2)
+
+    # ---- 状态 ----
+
+    def get_status(self) -> dict:
+        controller = self.controller
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "port": self.port,
+            "patterns": self.patterns,
+            "last_error": self.last_error,
+            "ready_since": self.ready_since,
+            "next_retry_at": self.next_retry_at,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "probes": self.probes,
+            "rejected_commands": self.rejected,
+            "controller": controller.get_stats() if controller is not None else None
+        }
+
+    def get_stats(self) -> dict:
+        controller = self.controller
+        stats = controller.get_stats() if controller is not None else {}
+        stats.update({"state": self.state, "rejected_commands": self.rejected})
+        return stats
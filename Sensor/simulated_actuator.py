@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟运动控制器
+按 motion_controller.py 的协议解析命令帧，按耗时模型（motion_planner.MotionCostModel）
+模拟升降、旋转和取物，并按命令顺序回复带序号的 "OK <序号>"，用于在没有硬件时测试吞吐量和排队行为
+
+连接方式:
+    内存回环：驱动直接读写模拟器（默认）
+    pty回环：模拟器运行在伪终端主端，驱动通过pyserial打开从端，覆盖真实的串口读写路径
+
+Agent中设置 FRIDGE_MOTION_PORT=sim 或 sim:pty 使用，FRIDGE_SIM_SPEED 为时间倍速
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from motion_controller import CMD_FETCH, CMD_PING, CMD_TURN, MotionController
+from motion_planner import MotionCostModel
+from step import HEADER, TAIL
+
+# 帧长度：帧头、两个数据字节、序号、帧尾
+FRAME_SIZE = 5
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedFirmware:
+    """
+    模拟控制器固件：升降、旋转、机械臂三个轴
+    升降和旋转可以同时进行，取物等待两者完成；应答按命令接收顺序发出
+    """
+
+    def __init__(self, model=None, speed=1.0):
+        """
+        Args:
+            model: MotionCostModel，各轴速度和取物耗时
+            speed: 时间倍速，>1 时模拟更快（例如10表示10倍速）
+        """
+        self.model = model or MotionCostModel.from_env()
+        self.speed = speed
+        self.height_mm = 0
+        self.section = 0
+        self.lift_free = 0.0
+        self.turn_free = 0.0
+        self.arm_free = 0.0
+        self.last_ack = 0.0
+
+        self._acks = deque()
+        self._acks_ready = threading.Condition()
+        self._buffer = b""
+        self._write = None
+        self.running = False
+
+        # 统计信息
+        self.commands = 0
+        self.busy_seconds = {"lift": 0.0, "turn": 0.0, "fetch": 0.0}
+
+    def start(self, write):
+        """
+        Args:
+            write: 发送应答字节的函数
+        """
+        self._write = write
+        self.running = True
+        threading.Thread(target=self._ack_loop, name="sim-firmware-acks", daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        with self._acks_ready:
+            self._acks_ready.notify_all()
+
+    def feed(self, data):
+        """接收驱动发来的字节"""
+        self._buffer += data
+        while len(self._buffer) >= FRAME_SIZE:
+            if self._buffer[0] != HEADER:
+                # 帧错位：丢弃一个字节重新同步
+                self._buffer = self._buffer[1:]
+                continue
+            packet, self._buffer = self._buffer[:FRAME_SIZE], self._buffer[FRAME_SIZE:]
+            self._execute(packet)
+
+    def _execute(self, packet):
+        now = time.monotonic()
+        seq = packet[3]
+        if packet[4] != TAIL:
+            self._schedule(now, f"ERR {seq} bad packet")
+            return
+        self.commands += 1
+        code, value = packet[1], packet[2]
+        # 动作耗时按倍速缩短
+        scale = 1.0 / self.speed
+
+        if code == CMD_PING:
+            # 握手不动作，但应答仍排在之前命令的应答之后（按接收顺序）
+            self._schedule(now, f"OK {seq} ping sim-controller")
+        elif code == CMD_TURN:
+            start = max(now, self.turn_free, self.arm_free)
+            duration = self.model.turn_seconds(self.section, value) * scale
+            self.section = value
+            self.turn_free = start + duration
+            self.busy_seconds["turn"] += duration
+            self._schedule(self.turn_free, f"OK {seq} turn {value}")
+        elif code == CMD_FETCH:
+            start = max(now, self.lift_free, self.turn_free, self.arm_free)
+            duration = self.model.fetch_seconds * scale
+            self.arm_free = start + duration
+            self.busy_seconds["fetch"] += duration
+            self._schedule(self.arm_free, f"OK {seq} fetch")
+        elif code < 0xF0:
+            target_mm = (code << 8) | value
+            start = max(now, self.lift_free, self.arm_free)
+            duration = abs(target_mm - self.height_mm) / self.model.lift_speed_mm_s * scale
+            self.height_mm = target_mm
+            self.lift_free = start + duration
+            self.busy_seconds["lift"] += duration
+            self._schedule(self.lift_free, f"OK {seq} lift {target_mm}")
+        else:
+            self._schedule(now, f"ERR {seq} unknown command {code:#x}")
+
+    def _schedule(self, done_at, reply):
+        # 按接收顺序应答：不早于上一条应答
+        ack_at = max(done_at, self.last_ack)
+        self.last_ack = ack_at
+        with self._acks_ready:
+            self._acks.append((ack_at, reply))
+            self._acks_ready.notify()
+
+    def _ack_loop(self):
+        while self.running:
+            with self._acks_ready:
+                while self.running and not self._acks:
+                    self._acks_ready.wait(0.5)
+                if not self.running:
+                    return
+                ack_at, reply = self._acks[0]
+                delay = ack_at - time.monotonic()
+                if delay > 0:
+                    self._acks_ready.wait(delay)
+                    continue
+                self._acks.popleft()
+            try:
+                self._write((reply + "\n").encode())
+            except OSError:
+                return
+
+    def get_stats(self) -> dict:
+        return {"commands": self.commands, "speed": self.speed,
+                "busy_seconds": dict(self.busy_seconds),
+                "position": {"height_mm": self.height_mm, "section": self.section}}
+
+
+class LoopbackSerial:
+    """内存回环串口：write 交给模拟固件，readline 读取固件的应答"""
+
+    def __init__(self, firmware, timeout=0.1):
+        self.firmware = firmware
+        self.timeout = timeout
+        self.port = "sim"
+        self._lines = queue.Queue()
+        self._lock = threading.Lock()
+        firmware.start(self._lines.put)
+
+    def write(self, data):
+        with self._lock:
+            self.firmware.feed(bytes(data))
+        return len(data)
+
+    def readline(self):
+        try:
+            return self._lines.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def close(self):
+        self.firmware.stop()
+
+
+class PtyFirmware:
+    """在伪终端主端运行模拟固件，返回从端设备名供驱动打开"""
+
+    def __init__(self, firmware):
+        import pty
+        import tty
+
+        self.firmware = firmware
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        firmware.start(lambda data: os.write(self.master, data))
+        threading.Thread(target=self._read_loop, name="sim-firmware-pty", daemon=True).start()
+
+    def _read_loop(self):
+        while self.firmware.running:
+            try:
+                data = os.read(self.master, 256)
+            except OSError:
+                break
+            if not data:
+                break
+            self.firmware.feed(data)
+
+    def close(self):
+        self.firmware.stop()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def create_simulated_controller(use_pty=False, speed=1.0, model=None, **kwargs) -> MotionController:
+    """
+    创建连接到模拟固件的运动控制器驱动
+
+    Args:
+        use_pty: 是否通过pty回环（需要pyserial），否则使用内存回环
+        speed: 时间倍速
+        model: MotionCostModel
+        kwargs: 传给 MotionController 的参数（max_in_flight、timeouts等）
+    """
+    model = model or MotionCostModel.from_env()
+    firmware = SimulatedFirmware(model, speed=speed)
+    kwargs.setdefault("level_height_mm", model.level_height_mm)
+    if use_pty:
+        pty_firmware = PtyFirmware(firmware)
+        controller = MotionController(pty_firmware.port, **kwargs)
+        controller.simulator_transport = pty_firmware
+    else:
+        controller = MotionController(LoopbackSerial(firmware), **kwargs)
+    controller.simulator = firmware
+    logger.info(f"🧪 使用模拟运动控制器（{'pty' if use_pty else '内存回环'}，{speed}倍速）")
+    return controller
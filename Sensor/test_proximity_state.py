@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试接近状态机的进入/离开迟滞
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from face_detectors import create_face_detector
+from proximity_state import ProximityStateMachine, STATE_PRESENT
+
+
+def face_width_at(distance):
+    """默认距离模型下（150像素约50厘米）指定距离处的人脸宽度"""
+    return 150 * 50 / float(distance)
+
+
+def test_stays_present_between_enter_and_leave():
+    """45cm 确认接近后退到 65cm（进入和离开距离之间）持续超过 leave_seconds，仍视为在场且不重复触发"""
+    print("🧪 测试 45 → 65cm 迟滞...")
+    proximity = ProximityStateMachine(enter_distance=50, leave_distance=70, dwell_seconds=0.3,
+                                      leave_seconds=5, dedup_seconds=3)
+    assert not proximity.update(45, now=0.0)
+    assert proximity.update(45, now=0.4)
+
+    for second in range(1, 21):
+        assert not proximity.update(65, now=0.4 + second)
+        assert proximity.state == STATE_PRESENT
+    assert proximity.approaches == 1
+    print("✅ 65cm 处保持在场，只触发一次")
+
+
+def test_detector_sees_faces_up_to_leave_distance():
+    """检测器的最小人脸尺寸按离开距离计算，65cm 处的人脸不会被 minSize 过滤掉"""
+    print("🧪 测试检测器最小人脸尺寸...")
+    proximity = ProximityStateMachine(enter_distance=50, leave_distance=70)
+    detector = create_face_detector(backend="haar", detection_distance=proximity.leave_distance)
+    min_side = detector.min_face_width * detector.min_size_margin
+    assert min_side <= face_width_at(65)
+    assert min_side <= face_width_at(proximity.leave_distance)
+    print(f"✅ 最小人脸宽度 {min_side:.0f}px ≤ 65cm 处人脸宽度 {face_width_at(65):.0f}px")
+
+
+def test_presence_keeps_shared_state_alive():
+    """多摄像头共享状态：摄像头A接近后持续上报在场，摄像头B在同一次接近中随后触发不算新的接近"""
+    print("🧪 测试多摄像头在场保持...")
+    proximity = ProximityStateMachine(leave_seconds=5, dedup_seconds=3)
+    assert proximity.report("front", camera_id="front", distance=45, now=0.0)
+    for second in range(1, 11):
+        assert proximity.keep_alive(now=float(second))
+    assert not proximity.report("side", camera_id="side", distance=48, now=10.5)
+    assert proximity.approaches == 1
+
+    # 没有在场上报时超过 leave_seconds 视为离开，keep_alive 不会重新触发接近
+    assert not proximity.keep_alive(now=20.0)
+    assert proximity.approaches == 1
+    print("✅ 在场期间其他摄像头的接近事件被去重")
+
+
+if __name__ == "__main__":
+    test_stays_present_between_enter_and_leave()
+    test_detector_sees_faces_up_to_leave_distance()
+    test_presence_keeps_shared_state_alive()
@@ -17,7 +17,92 @@ class SmartFridgeSystem:
         self.web_process = None
         self.button_process = None
         self.face_detection_process = None
+        self.frame_broker_process = None
+        self.multi_camera_process = None
+        # 配置了FRIDGE_CAMERAS时，每个摄像头由多摄像头进程中的独立工作进程负责采集和检测
+        self.multi_camera = bool(os.getenv('FRIDGE_CAMERAS'))
         self.running = False
+    
+    def start_frame_broker(self):
+        """启动摄像头帧共享服务（独占摄像头，通过共享内存向其他进程发布帧）"""
+        try:
+            print("📷 启动摄像头帧共享服务...")
+            
+            activate_script = os.path.expanduser('~/env/bin/activate')
+            if os.path.exists(activate_script):
+                cmd = f"source {activate_script} && cd Sensor && python frame_broker.py --camera 0"
+                self.frame_broker_process = subprocess.Popen(
+                    ['bash', '-c', cmd],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+            else:
+                self.frame_broker_process = subprocess.Popen(
+                    ['python', 'frame_broker.py', '--camera', '0'],
+                    cwd='Sensor',
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+            
+            print(f"✅ 帧共享服务已启动 (PID: {self.frame_broker_process.pid})")
+            return True
+        except Exception as e:
+            print(f"❌ 启动帧共享服务失败: {e}")
+            return False
+    
+    def start_multi_camera(self):
+        """启动多摄像头进程（每个摄像头一个采集+检测工作进程）"""
+        try:
+            print(f"📷 启动多摄像头检测: {os.getenv('FRIDGE_CAMERAS')}")
+            
+            activate_script = os.path.expanduser('~/env/bin/activate')
+            if os.path.exists(activate_script):
+                cmd = f"source {activate_script} && cd Sensor && python multi_camera.py"
+                self.multi_camera_process = subprocess.Popen(
+                    ['bash', '-c', cmd],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+            else:
+                self.multi_camera_process = subprocess.Popen(
+                    ['python', 'multi_camera.py'],
+                    cwd='Sensor',
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+            
+            print(f"✅ 多摄像头检测已启动 (PID: {self.multi_camera_process.pid})")
+            return True
+        except Exception as e:
+            print(f"❌ 启动多摄像头检测失败: {e}")
+            return False
+    
+    def wait_for_frame_broker(self, timeout=10):
+        """等待共享内存中出现第一帧"""
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sensor'))
+        try:
+            from frame_broker import SharedCamera
+        except ImportError as e:
+            print(f"⚠️  无法导入帧共享模块: {e}")
+            return False
+        
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            if self.frame_broker_process and self.frame_broker_process.poll() is not None:
+                break
+            try:
+                camera = SharedCamera(0)
+                ok = camera.read()[0]
+                camera.release()
+                if ok:
+                    print("✅ 共享摄像头帧已就绪")
+                    return True
+            except (FileNotFoundError, RuntimeError, ValueError):
+                pass
+            time.sleep(0.2)
+        
+        print("⚠️  帧共享服务未就绪，各进程将直接打开摄像头")
+        return False
         
     def start_web_interface(self):
         """启动Web界面"""
@@ -181,6 +266,25 @@ class SmartFridgeSystem:
                 print("⚠️  按键检测进程已停止")
                 self.button_process = None
             
+            # 检查帧共享服务
+            if self.frame_broker_process and self.frame_broker_process.poll() is not None:
+                if self.frame_broker_process.returncode == 1:
+                    # 摄像头不可用，各进程已回退为直接打开摄像头
+                    print("⚠️  帧共享服务无法打开摄像头")
+                    self.frame_broker_process = None
+                else:
+                    print("⚠️  帧共享服务已停止，尝试重启...")
+                    if self.start_frame_broker():
+                        print("✅ 帧共享服务重启成功")
+                    else:
+                        self.frame_broker_process = None
+            
+            # 检查多摄像头进程（工作进程由其自身负责重启）
+            if self.multi_camera_process and self.multi_camera_process.poll() is not None:
+                print("⚠️  多摄像头进程已停止，尝试重启...")
+                if not self.start_multi_camera():
+                    self.multi_camera_process = None
+            
             # 检查人脸检测进程
             if self.face_detection_process and self.face_detection_process.poll() is not None:
                 print("⚠️  人脸检测进程已停止，尝试重启...")
@@ -196,6 +300,13 @@ class SmartFridgeSystem:
         print("🚀 启动智慧冰箱系统...")
         print("=" * 50)
         
+        # 先启动摄像头采集，其他进程从共享内存读取摄像头帧
+        if self.multi_camera:
+            if self.start_multi_camera():
+                self.wait_for_frame_broker()
+        elif self.start_frame_broker():
+            self.wait_for_frame_broker()
+        
         # 启动Web界面
         if not self.start_web_interface():
             return False
@@ -208,8 +319,8 @@ class SmartFridgeSystem:
         if not self.start_button_detector():
             return False
         
-        # 启动人脸检测
-        if not self.start_face_detection():
+        # 启动人脸检测（多摄像头模式下由各摄像头工作进程负责）
+        if not self.multi_camera and not self.start_face_detection():
             return False
         
         self.running = True
@@ -260,6 +371,24 @@ class SmartFridgeSystem:
             except subprocess.TimeoutExpired:
                 self.web_process.kill()
         
+        # 停止多摄像头进程
+        if self.multi_camera_process:
+            print("🛑 停止多摄像头检测...")
+            self.multi_camera_process.terminate()
+            try:
+                self.multi_camera_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.multi_camera_process.kill()
+        
+        # 最后停止帧共享服务
+        if self.frame_broker_process:
+            print("🛑 停止帧共享服务...")
+            self.frame_broker_process.terminate()
+            try:
+                self.frame_broker_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.frame_broker_process.kill()
+        
         print("✅ 系统已停止")
 
 def signal_handler(signum, frame):